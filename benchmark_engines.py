@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""Rows/second of the python and numpy generation engines (no database writes).
+
+    python benchmark_engines.py --scales 0.1 1 3
+"""
+from time import perf_counter
+import argparse
+
+import database_generator_FIXED as gen
+
+
+def run(scale, engine):
+    gen.RND.seed(gen.SEED)
+    sizes = gen.target_sizes(scale)
+    airports, airlines, city_to_airports = gen.build_reference_data(sizes)
+
+    t0 = perf_counter()
+    flights = tickets = 0
+    for _, flight_tickets in gen.iter_flights(sizes, airports, airlines, city_to_airports, engine=engine):
+        flights += 1
+        tickets += len(flight_tickets)
+    return flights + tickets, perf_counter() - t0
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Benchmark the flight/ticket generation engines.")
+    ap.add_argument("--scales", type=float, nargs="+", default=[0.1, 1.0, 3.0])
+    ap.add_argument("--engines", nargs="+", choices=gen.ENGINES, default=list(gen.ENGINES))
+    args = ap.parse_args()
+
+    if "numpy" in args.engines and gen.np is None:
+        ap.error("numpy is not installed")
+
+    print(f"{'scale':>6} {'engine':>8} {'rows':>12} {'seconds':>9} {'rows/s':>12}")
+    for scale in args.scales:
+        for engine in args.engines:
+            rows, secs = run(scale, engine)
+            print(f"{scale:>6g} {engine:>8} {rows:>12,} {secs:>9.2f} {rows / secs:>12,.0f}")
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""Itineraries/second of itineraries.py at several dataset scales.
+
+Each scale is seeded by database_generator_FIXED.py into data/bench/ (kept
+with --keep, reused when present), then the itinerary table is built in this
+process and timed per phase. The itinerary count levels off once every city
+pair has connections on every day, so flights/s is the figure that scales.
+
+    python benchmark_itineraries.py --scales 1 10 [--keep]
+"""
+from pathlib import Path
+import argparse, sqlite3, subprocess, sys
+
+import itineraries
+
+THIS_DIR = Path(__file__).resolve().parent
+BENCH_DIR = THIS_DIR / "data" / "bench"
+GENERATOR = THIS_DIR / "database_generator_FIXED.py"
+
+
+def run(scale, keep):
+    db = BENCH_DIR / f"itineraries-{scale:g}.db"
+    if not db.exists():
+        print(f"• Seeding scale {scale:g} into {db} …", file=sys.stderr)
+        subprocess.run([sys.executable, str(GENERATOR), "--scale", str(scale), "--db", str(db), "--start-date",
+                        "2026-01-05", "--stream", "--fast-load"], check=True, capture_output=True)
+    conn = sqlite3.connect(db)
+    conn.execute("BEGIN")
+    rows, timings, flights = itineraries.build(conn)
+    conn.rollback()
+    conn.close()
+    if not keep:
+        db.unlink()
+    return flights, rows, timings
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Benchmark the connection-itinerary engine.")
+    ap.add_argument("--scales", type=float, nargs="+", default=[1.0, 10.0])
+    ap.add_argument("--keep", action="store_true", help="keep the seeded databases under data/bench/ for the next run")
+    args = ap.parse_args()
+    BENCH_DIR.mkdir(parents=True, exist_ok=True)
+
+    print(f"{'scale':>6} {'flights':>10} {'itineraries':>12} {'load s':>7} {'scan s':>7} {'write s':>8} "
+          f"{'itin/s scan':>12} {'itin/s total':>13} {'flights/s scan':>15}")
+    for scale in args.scales:
+        flights, rows, t = run(scale, args.keep)
+        total = sum(t.values())
+        print(f"{scale:>6g} {flights:>10,} {rows:>12,} {t['load']:>7.2f} {t['scan']:>7.2f} {t['write']:>8.2f} "
+              f"{rows / t['scan']:>12,.0f} {rows / total:>13,.0f} {flights / t['scan']:>15,.0f}")
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""Total seeding time of the on-disk and in-memory load modes.
+
+Each mode runs database_generator_FIXED.py in a fresh process against a new
+file under data/bench/ and reads its --run-report for the phase split.
+
+    python benchmark_load.py --scales 0.3 1 3 [--stream]
+"""
+from pathlib import Path
+from time import perf_counter
+import argparse, json, subprocess, sys
+
+THIS_DIR = Path(__file__).resolve().parent
+BENCH_DIR = THIS_DIR / "data" / "bench"
+GENERATOR = THIS_DIR / "database_generator_FIXED.py"
+MODES = {
+    "disk": [],
+    "disk --fast-load": ["--fast-load"],
+    "memory": ["--in-memory"],
+    "memory --fast-load": ["--in-memory", "--fast-load"],
+}
+
+
+def run(scale, flags, extra):
+    db = BENCH_DIR / f"load-{scale:g}.db"
+    report = db.with_suffix(".json")
+    db.unlink(missing_ok=True)
+    t0 = perf_counter()
+    subprocess.run([sys.executable, str(GENERATOR), "--scale", str(scale), "--db", str(db), "--start-date",
+                    "2026-01-05", "--run-report", str(report), *flags, *extra], check=True, capture_output=True)
+    total = perf_counter() - t0
+    phases = {p["phase"]: p["wall_s"] for p in json.loads(report.read_text())["phases"]}
+    db.unlink()
+    report.unlink()
+    return total, phases.get("post-load", 0.0), phases.get("flush to disk", 0.0)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Benchmark on-disk vs in-memory seeding.")
+    ap.add_argument("--scales", type=float, nargs="+", default=[0.3, 1.0])
+    ap.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    ap.add_argument("--stream", action="store_true", help="pass --stream to every run")
+    args = ap.parse_args()
+    BENCH_DIR.mkdir(parents=True, exist_ok=True)
+
+    print(f"{'scale':>6} {'mode':>20} {'total s':>9} {'post-load s':>12} {'flush s':>8}")
+    for scale in args.scales:
+        for mode in args.modes:
+            total, post_load, flush = run(scale, MODES[mode], ["--stream"] if args.stream else [])
+            print(f"{scale:>6g} {mode:>20} {total:>9.2f} {post_load:>12.2f} {flush:>8.2f}")
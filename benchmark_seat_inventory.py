@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""seat_inventory.py's bitmaps against a row-per-seat table: bytes and operations/second.
+
+A sample of --flights flights is copied from --db with its tickets into two
+scratch files under data/bench/, one holding seat_map (a BLOB per flight and
+class) and one a `seat` table with a row per seat:
+
+    seat (flight_id, class, seat_row, seat_col, free)  PRIMARY KEY (flight_id, class, seat_row, seat_col)
+
+Both start from the same drawn maps. The timed operations, each --ops times on
+random flights and classes:
+
+    availability   popcount of the map        | COUNT(*) of the free rows
+    find block     find_block() on the map    | first free seat with no taken seat among the next n-1
+    reserve+release  reserve() then release()   | the same as UPDATEs of n rows, plus ticket.availability
+
+    python benchmark_seat_inventory.py [--db data/flights.db] [--flights 2000] [--ops 5000] [--block 2]
+"""
+from pathlib import Path
+from random import Random
+from time import perf_counter
+import argparse, sqlite3, sys
+
+import index_pack
+import schema
+import seat_inventory
+
+THIS_DIR = Path(__file__).resolve().parent
+DB_PATH = THIS_DIR / "data" / "flights.db"
+BENCH_DIR = THIS_DIR / "data" / "bench"
+
+SEAT_ROWS_SQL = """
+CREATE TABLE seat (
+    flight_id TEXT    NOT NULL,
+    class     TEXT    NOT NULL,
+    seat_row  INTEGER NOT NULL,
+    seat_col  INTEGER NOT NULL,  -- index into the layout's seat letters
+    free      INTEGER NOT NULL,
+    PRIMARY KEY (flight_id, class, seat_row, seat_col)
+) STRICT, WITHOUT ROWID
+"""
+# a free seat opening a block: a valid start (per the layout's aisles) with no taken seat in the next n-1
+ROWS_FIND_BLOCK = """
+SELECT s.seat_row, s.seat_col FROM seat s
+WHERE s.flight_id = ? AND s.class = ? AND s.free = 1 AND s.seat_col IN ({starts})
+  AND NOT EXISTS (SELECT 1 FROM seat x WHERE x.flight_id = s.flight_id AND x.class = s.class
+                  AND x.seat_row = s.seat_row AND x.seat_col BETWEEN s.seat_col + 1 AND s.seat_col + ? AND x.free = 0)
+ORDER BY s.seat_row, s.seat_col LIMIT 1
+"""
+ROWS_AVAILABILITY = "SELECT COUNT(*) FROM seat WHERE flight_id = ? AND class = ? AND free = 1"
+ROWS_SET = ("UPDATE seat SET free = ? WHERE flight_id = ? AND class = ? AND seat_row = ? "
+            "AND seat_col BETWEEN ? AND ? AND free = ?")
+ROWS_TICKET = "UPDATE ticket SET availability = availability + ? WHERE code = ?"
+
+
+def prepare(src, n_flights, engine):
+    """The two scratch databases and the sampled ``[(flight_id, class)]``."""
+    BENCH_DIR.mkdir(parents=True, exist_ok=True)
+    paths = {name: BENCH_DIR / f"seats-{name}.db" for name in ("bitmap", "rows")}
+    for path in paths.values():
+        path.unlink(missing_ok=True)
+
+    conn = sqlite3.connect(paths["bitmap"])
+    schema.create(conn)
+    conn.execute("ATTACH DATABASE ? AS src", (str(src),))
+    ids = [fid for fid, in conn.execute("SELECT id FROM src.flight ORDER BY id")]
+    sample = sorted(Random(0).sample(ids, min(n_flights, len(ids))))
+    conn.execute("BEGIN")
+    conn.executemany("INSERT INTO main.ticket SELECT * FROM src.ticket WHERE flight_id = ?", ((fid,) for fid in sample))
+    conn.commit()
+    conn.execute("DETACH DATABASE src")
+    conn.execute("BEGIN")
+    seat_inventory.build(conn, engine=engine)
+    conn.commit()
+    keys = conn.execute("SELECT flight_id, class FROM seat_map ORDER BY 1, 2").fetchall()
+
+    rows = sqlite3.connect(paths["rows"])
+    schema.create(rows)
+    rows.execute(SEAT_ROWS_SQL)
+    rows.execute("BEGIN")
+    rows.executemany("INSERT INTO ticket SELECT ?,?,?,?,?,?", conn.execute("SELECT * FROM ticket"))
+    by_class = seat_inventory.cabins()
+    for fid, cls, seats in conn.execute("SELECT flight_id, class, seats FROM seat_map"):
+        cabin, bits = by_class[cls], int.from_bytes(seats, "little")
+        rows.executemany("INSERT INTO seat VALUES (?,?,?,?,?)",
+                         [(fid, cls, cabin.first_row + i // cabin.width, i % cabin.width, bits >> i & 1)
+                          for i in range(cabin.capacity)])
+    rows.commit()
+    for db in (conn, rows):
+        index_pack.apply(db, show_plans=False)  # reserve() finds the ticket through idx_ticket_flight
+        db.commit()
+        db.execute("VACUUM")
+        db.close()
+    return paths, keys
+
+def stored_bytes(path, table):
+    conn = sqlite3.connect(path)
+    data, index = schema.table_sizes(conn)[table]
+    conn.close()
+    return data + index
+
+def time_ops(label, ops, fn):
+    t0 = perf_counter()
+    for op in ops:
+        fn(*op)
+    secs = perf_counter() - t0
+    return label, len(ops) / secs
+
+def bench_bitmap(path, ops, n):
+    conn = sqlite3.connect(path)
+    by_class = seat_inventory.cabins()
+
+    def availability(fid, cls):
+        seat_inventory.free_count(conn.execute("SELECT seats FROM seat_map WHERE flight_id = ? AND class = ?",
+                                               (fid, cls)).fetchone()[0])
+
+    def find(fid, cls):
+        seats, = conn.execute("SELECT seats FROM seat_map WHERE flight_id = ? AND class = ?", (fid, cls)).fetchone()
+        seat_inventory.find_block(by_class[cls], int.from_bytes(seats, "little"), n)
+
+    def reserve_release(fid, cls):
+        try:
+            taken = seat_inventory.reserve(conn, fid, cls, n)
+        except seat_inventory.SeatsUnavailable:
+            return
+        conn.commit()
+        seat_inventory.release(conn, fid, cls, taken)
+        conn.commit()
+
+    results = [time_ops("availability", ops, availability), time_ops(f"find block of {n}", ops, find),
+               time_ops(f"reserve+release {n}", ops, reserve_release)]
+    conn.close()
+    return results
+
+def bench_rows(path, ops, n):
+    conn = sqlite3.connect(path)
+    by_class = seat_inventory.cabins()
+    codes = {(fid, cls): code for code, fid, cls in conn.execute("SELECT code, flight_id, lower(class) FROM ticket")}
+    starts = {cls: ",".join(str(col + k) for col, size in cabin.groups for k in range(size - n + 1))
+              for cls, cabin in by_class.items()}
+
+    def availability(fid, cls):
+        conn.execute(ROWS_AVAILABILITY, (fid, cls)).fetchone()
+
+    def find(fid, cls):
+        return conn.execute(ROWS_FIND_BLOCK.format(starts=starts[cls]), (fid, cls, n - 1)).fetchone()
+
+    def reserve_release(fid, cls):
+        conn.execute("BEGIN")
+        block = find(fid, cls)
+        for free, delta in ((0, -n), (1, n)) if block else ():  # take the block, commit, give it back, commit
+            if free:
+                conn.execute("BEGIN")
+            row, col = block
+            if conn.execute(ROWS_SET, (free, fid, cls, row, col, col + n - 1, 1 - free)).rowcount == n:
+                conn.execute(ROWS_TICKET, (delta, codes[fid, cls]))
+            conn.commit()
+        if not block:
+            conn.commit()
+
+    results = [time_ops("availability", ops, availability), time_ops(f"find block of {n}", ops, find),
+               time_ops(f"reserve+release {n}", ops, reserve_release)]
+    conn.close()
+    return results
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Benchmark seat bitmaps against a row-per-seat table.")
+    ap.add_argument("--db", type=Path, default=DB_PATH, help="source database (default: data/flights.db)")
+    ap.add_argument("--flights", type=int, default=2000, help="flights copied into the scratch databases")
+    ap.add_argument("--ops", type=int, default=5000, help="operations per measurement")
+    ap.add_argument("--block", type=int, default=2, help="adjacent seats per find / reservation")
+    ap.add_argument("--engine", choices=seat_inventory.ENGINES,
+                    default="numpy" if seat_inventory.np is not None else "python")
+    ap.add_argument("--keep", action="store_true", help="keep the scratch databases under data/bench/")
+    args = ap.parse_args()
+    if not args.db.exists():
+        ap.error(f"{args.db} does not exist")
+
+    print(f"• Copying {args.flights:,} flights from {args.db} …", file=sys.stderr)
+    paths, keys = prepare(args.db, args.flights, args.engine)
+    ops = [keys[i] for i in Random(1).choices(range(len(keys)), k=args.ops)]
+    by_class = seat_inventory.cabins()
+    seats = sum(by_class[cls].capacity for _, cls in keys)
+
+    stored = {"bitmap": stored_bytes(paths["bitmap"], "seat_map"), "rows": stored_bytes(paths["rows"], "seat")}
+    results = {"bitmap": bench_bitmap(paths["bitmap"], ops, args.block), "rows": bench_rows(paths["rows"], ops, args.block)}
+    print(f"{len(keys):,} seat maps, {seats:,} seats")
+    print(f"{'':>22} {'bitmap':>12} {'row per seat':>13} {'ratio':>7}")
+    print(f"{'stored MB':>22} {stored['bitmap'] / 1e6:>12.2f} {stored['rows'] / 1e6:>13.2f} "
+          f"{stored['rows'] / stored['bitmap']:>6.1f}×")
+    print(f"{'bytes per seat':>22} {stored['bitmap'] / seats:>12.2f} {stored['rows'] / seats:>13.2f}")
+    for (label, bitmap), (_, rows) in zip(results["bitmap"], results["rows"]):
+        print(f"{label + ' /s':>22} {bitmap:>12,.0f} {rows:>13,.0f} {bitmap / rows:>6.1f}×")
+    if not args.keep:
+        for path in paths.values():
+            path.unlink()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Content-addressed cache of finished databases under data/cache/.
+
+A build is keyed by everything that decides its bytes: the generator version
+(a hash of final_base_generation.py and every module of this repo it imports,
+found by walking their import statements), a hash of the schema, the seed,
+scale and other build options, and the pinned start date. Builds with a pinned
+start date are byte-identical, so a hit can simply be copied into place (or
+poured into an open connection with the SQLite backup API) instead of
+regenerated.
+
+    python build_cache.py list
+    python build_cache.py clear [--older-than DAYS]
+"""
+from datetime import datetime, timedelta
+from pathlib import Path
+from time import perf_counter
+import argparse, ast, hashlib, json, os, shutil, sqlite3
+
+import derived_tables, index_pack, schema
+
+THIS_DIR = Path(__file__).resolve().parent
+CACHE_DIR = THIS_DIR / "data" / "cache"
+BUILD_ENTRY = "final_base_generation.py"  # the cached build; every repo module it imports is hashed
+BACKUP_PAGES = 4096  # pages per backup() step
+
+
+def build_sources(entry=BUILD_ENTRY):
+    """File names of `entry` and every module of this repo it imports, directly or not."""
+    seen, todo = set(), [entry]
+    while todo:
+        name = todo.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        for node in ast.walk(ast.parse((THIS_DIR / name).read_text(encoding="utf-8"))):
+            if isinstance(node, ast.Import):
+                modules = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                modules = [node.module]
+            else:
+                continue
+            todo += [f"{module}.py" for module in modules if (THIS_DIR / f"{module}.py").exists()]
+    return sorted(seen)
+
+def generator_version():
+    digest = hashlib.sha256()
+    for name in build_sources():
+        digest.update((THIS_DIR / name).read_bytes())
+    return digest.hexdigest()[:16]
+
+def schema_hash():
+    ddl = [schema.SCHEMA_SQL, schema.SURROGATE_SQL, schema.SCHEDULE_SQL,
+           *(sql for _, sql in index_pack.INDEXES + index_pack.SURROGATE_INDEXES),
+           derived_tables.FLIGHT_SEARCH_SQL, derived_tables.ROUTE_DAY_MIN_PRICE_SQL,
+           derived_tables.ROUND_TRIP_MATRIX_SQL, derived_tables.DESTINATION_POPULARITY_SQL,
+           derived_tables.HEARTS_TRIGGERS_SQL]
+    return hashlib.sha256("\n".join(ddl).encode()).hexdigest()[:16]
+
+def cache_key(**params):
+    """``(key, descriptor)`` for a build; `params` must include the pinned start_date."""
+    descriptor = {"generator": generator_version(), "schema": schema_hash(), **params}
+    blob = json.dumps(descriptor, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode()).hexdigest()[:32], descriptor
+
+def entry_path(key):
+    return CACHE_DIR / f"{key}.db"
+
+def lookup(key):
+    path = entry_path(key)
+    return path if path.exists() else None
+
+def store(src, key, descriptor, build_s=None):
+    """Copy the finished database `src` into the cache (atomically) with its descriptor."""
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = entry_path(key).with_suffix(".db.tmp")
+    shutil.copyfile(src, tmp)
+    os.replace(tmp, entry_path(key))
+    meta = {"key": key, "stored_at": datetime.now().isoformat(timespec="seconds"),
+            "bytes": entry_path(key).stat().st_size, "build_s": build_s, "params": descriptor}
+    entry_path(key).with_suffix(".json").write_text(json.dumps(meta, indent=2, default=str), encoding="utf-8")
+    return entry_path(key)
+
+def restore(key, dest, method="copy"):
+    """Materialize a cached build at `dest`; returns seconds taken.
+
+    copy is a file copy (byte-identical result); backup runs the SQLite backup
+    API page batch by page batch, which also works into a database that is
+    already open elsewhere.
+    """
+    src = entry_path(key)
+    dest = Path(dest)
+    t0 = perf_counter()
+    if method == "copy":
+        tmp = dest.with_name(dest.name + ".tmp")
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, dest)
+    else:
+        source = sqlite3.connect(f"file:{src}?mode=ro", uri=True)
+        target = sqlite3.connect(dest)
+        source.backup(target, pages=BACKUP_PAGES)
+        target.close()
+        source.close()
+    os.utime(src)  # last use, for clear --older-than
+    return perf_counter() - t0
+
+def entries():
+    for meta in sorted(CACHE_DIR.glob("*.json")):
+        info = json.loads(meta.read_text(encoding="utf-8"))
+        info["last_used"] = datetime.fromtimestamp(entry_path(info["key"]).stat().st_mtime)
+        yield info
+
+def clear(older_than=None):
+    """Delete entries (only those unused for `older_than` days, if given); returns bytes freed."""
+    cutoff = datetime.now() - timedelta(days=older_than) if older_than is not None else None
+    freed = 0
+    for info in list(entries()):
+        if cutoff and info["last_used"] > cutoff:
+            continue
+        freed += info["bytes"]
+        entry_path(info["key"]).unlink(missing_ok=True)
+        entry_path(info["key"]).with_suffix(".json").unlink(missing_ok=True)
+    return freed
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Inspect or clear the generated-database cache.")
+    ap.add_argument("command", choices=("list", "clear"))
+    ap.add_argument("--older-than", type=float, metavar="DAYS", help="with clear: only entries unused this long")
+    args = ap.parse_args()
+
+    if args.command == "list":
+        for info in entries():
+            params = ", ".join(f"{k}={v}" for k, v in info["params"].items() if k not in ("generator", "schema"))
+            print(f"{info['key']}  {info['bytes'] / 2**20:8.1f} MiB  last used {info['last_used']:%Y-%m-%d %H:%M}  "
+                  f"{params}")
+    else:
+        print(f"✔ Freed {clear(args.older_than) / 2**20:.1f} MiB from {CACHE_DIR}")
@@ -1,65 +1,42 @@
 #!/usr/bin/env python3
 from pathlib import Path
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from random import Random
-import argparse, hashlib, os, sqlite3, string, sys
+from array import array
+from itertools import islice
+from math import floor
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from tempfile import TemporaryDirectory
+from queue import Queue, Empty
+from threading import Thread
+import multiprocessing
+import argparse, hashlib, json, os, sqlite3, sys
 from time import perf_counter
-SCHEMA_SQL = """/* ===== USER ============================================================= */
-CREATE TABLE IF NOT EXISTS user (
-    id        TEXT PRIMARY KEY,
-    password  TEXT NOT NULL
-);
-
-CREATE TABLE IF NOT EXISTS airport (
-    id      TEXT PRIMARY KEY,
-    city    TEXT NOT NULL,
-    country TEXT NOT NULL
-);
-
-CREATE TABLE IF NOT EXISTS airline (
-    id           TEXT PRIMARY KEY,
-    name         TEXT NOT NULL,
-    website_link TEXT
-);
-
-CREATE TABLE IF NOT EXISTS flight (
-    id                TEXT PRIMARY KEY,
-    airline_id        TEXT NOT NULL,
-    airport_depart_id TEXT NOT NULL,
-    airport_arrive_id TEXT NOT NULL,
-    time_departure    TEXT NOT NULL,
-    time_arrival      TEXT NOT NULL,
-    num_tickets       INTEGER NOT NULL CHECK (num_tickets >= 0),
-    FOREIGN KEY (airline_id)        REFERENCES airline (id),
-    FOREIGN KEY (airport_depart_id) REFERENCES airport (id),
-    FOREIGN KEY (airport_arrive_id) REFERENCES airport (id)
-);
-
-CREATE TABLE IF NOT EXISTS ticket (
-    code         TEXT,
-    flight_id    TEXT NOT NULL,
-    airline_id   TEXT NOT NULL,
-    class        TEXT NOT NULL,
-    price        INTEGER NOT NULL CHECK (price >= 0),
-    availability INTEGER NOT NULL CHECK (availability >= 0),
-    PRIMARY KEY (code, flight_id, airline_id),
-    FOREIGN KEY (flight_id)  REFERENCES flight  (id),
-    FOREIGN KEY (airline_id) REFERENCES airline (id)
-);
-
-CREATE TABLE IF NOT EXISTS hearts (
-    ticket_code TEXT NOT NULL,
-    flight_id   TEXT NOT NULL,
-    airline_id  TEXT NOT NULL,
-    user_id     TEXT NOT NULL,
-    PRIMARY KEY (ticket_code, flight_id, airline_id, user_id),
-    FOREIGN KEY (ticket_code, flight_id, airline_id)
-        REFERENCES ticket (code, flight_id, airline_id),
-    FOREIGN KEY (user_id) REFERENCES user (id)
-);
-
-"""
-RND = Random(42)
+from id_allocator import FlightIdAllocator, iata_space, ticket_code, check_capacity
+import validate_db, index_pack, derived_tables, schema, seat_inventory
+import instrumentation
+from instrumentation import phase
+try:
+    import numpy as np
+except ImportError:  # only needed for --engine numpy
+    np = None
+SEED = 42
+RND = Random(SEED)
+START_DATE = None  # first departure day; None = two days after the run (--start-date pins it)
+
+# --fast-load: nothing below survives a crash mid-load, and SAFE_PRAGMAS are
+# put back before the file is handed to lib/db.js. Secondary indexes (see
+# index_pack.py) are built after the data in every mode; --fast-load also drops
+# existing ones first and relies on the validate_db pass instead of per-row
+# FK enforcement.
+LOAD_PAGE_SIZE = 8192  # only takes effect on a new database file
+LOAD_PRAGMAS = ["journal_mode = MEMORY", "synchronous = OFF", "cache_size = -262144", "temp_store = MEMORY"]
+SAFE_PRAGMAS = ["journal_mode = DELETE", "synchronous = FULL", "foreign_keys = ON"]
+# --in-memory: the whole load, indexing and aggregation run on a :memory:
+# database that is then copied to DB_PATH by the backup API, FLUSH_PAGES at a
+# time, into a temporary file that replaces DB_PATH only once complete.
+FLUSH_PAGES = 16384
 CLASSES = [('economy', 1.0), ('business', 2.5), ('first', 5)]
 CITY_NAMES = ["Athens", "London", "Paris", "Rome", "Berlin", "Madrid",
                "New York", "Chicago", "Tokyo", "Sydney", "Toronto", "Dubai",
@@ -73,6 +50,9 @@ BASE = {
     "hearts": 15000,
 }
 
+FIRST_NAMES = ["alex", "maria", "john", "kate", "nick", "sofia", "paul", "irene",
+               "george", "lena", "bruce", "clark", "diana", "peter", "natasha"]
+
 THIS_DIR = Path(__file__).resolve().parent
 DB_PATH = THIS_DIR / "data" / "flights.db"
 
@@ -81,20 +61,37 @@ ROUTE_FREQUENCY = {
     "medium": 1,    # daily
     "low": 0.3     # every ~3 days
 }
-def create_db_schema():
-    conn = sqlite3.connect(DB_PATH)
-    conn.executescript(SCHEMA_SQL)
-    conn.commit()
-    conn.close()
-    print("✔ Database schema created.")
-
-def iata_code(n, width):
-    seen = set()
-    while len(seen) < n:
-        code = ''.join(RND.choices(string.ascii_uppercase, k=width))
-        if code not in seen:
-            seen.add(code)
-            yield code
+CHUNK_SIZE = 10000  # flights per executemany() batch in --stream mode
+PIPELINE_DEPTH = 4  # --pipeline: chunks queued between producer, writer thread and SQLite before generation blocks
+HORIZON_DAYS = 120
+NUMPY_ROUTE_BATCH = 512  # routes per vectorized draw with --engine numpy
+ENGINES = ("python", "numpy")
+def configure(seed=SEED, db_path=DB_PATH, start_date=None):
+    """Point the module at a seed, database file and start date, as the CLI flags do."""
+    global SEED, DB_PATH, START_DATE
+    SEED = seed
+    RND.seed(seed)
+    DB_PATH = Path(db_path)
+    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    START_DATE = start_date
+
+def pinned_epoch():
+    """Unix time a --start-date build stands in for "now" (two days before it); None when unpinned."""
+    if START_DATE is None:
+        return None
+    return int((START_DATE - timedelta(days=2)).replace(tzinfo=timezone.utc).timestamp())
+
+def create_db_schema(conn, fast_load=False, surrogate_keys=False):
+    """Create any missing table (commits; call it before the load transaction).
+
+    A database that already has tables keeps its layout.
+    """
+    if fast_load:
+        conn.execute(f"PRAGMA page_size = {LOAD_PAGE_SIZE}")  # no-op once the file has tables
+    layout, existing = "surrogate" if surrogate_keys else "compact", schema.layout_of(conn)
+    if existing and existing != layout:
+        print(f"• Keeping the {existing} layout of the existing database", file=sys.stderr)
+    schema.create(conn, layout)
 
 def iso(dt: datetime):
     return dt.strftime("%Y-%m-%d %H:%M")
@@ -118,31 +115,45 @@ def seasonal_price_adjustment(dep_date):
         return 1.3
     return 1.0
 
-def generate_unique_flight_id(al_code, flight_ids):
-    while True:
-        num = RND.randint(1, 9999)
-        fid = f"{al_code}{num:04}"
-        if fid not in flight_ids:
-            flight_ids.add(fid)
-            return fid
+if np is not None:
+    SEASON_BY_MONTH = np.array([seasonal_price_adjustment(datetime(2000, m, 1)) for m in range(1, 13)])
 
-def generate_flight_and_tickets(dep_time, src_id, dst_id, al_code, flight_ids, flights, tickets):
-    fid = generate_unique_flight_id(al_code, flight_ids)
-    arr_time = dep_time + timedelta(minutes=RND.randint(60, 720))
-    flights.append((fid, 200, iso(dep_time), iso(arr_time), src_id, dst_id, al_code))
+def generate_flight_and_tickets(dep_time, src_id, dst_id, al_code, flight_ids, rng=RND):
+    fid = flight_ids.next(al_code)
+    arr_time = dep_time + timedelta(minutes=rng.randint(60, 720))
+    flight = (fid, 200, iso(dep_time), iso(arr_time), src_id, dst_id, al_code)
 
-    base_price = RND.randint(40, 600) * seasonal_price_adjustment(dep_time)
+    tickets = []
+    base_price = rng.randint(40, 600) * seasonal_price_adjustment(dep_time)
     for cls, mul in CLASSES:
-        code = f"{fid}-{cls[0].upper()}"
+        code = ticket_code(fid, cls)
         price = int(base_price * mul)   # integer euros
 
-        avail = RND.randint(80, 200) if cls == 'economy' else RND.randint(10, 50)
+        avail = rng.randint(80, 200) if cls == 'economy' else rng.randint(10, 50)
         tickets.append((code, fid, al_code, cls, price, avail))
+    return flight, tickets
 
+def chunked(iterable, size):
+    it = iter(iterable)
+    while chunk := list(islice(it, size)):
+        yield chunk
 
-def build(scale: float):
-    sizes = {k: int(v * scale) for k, v in BASE.items()}
-    print(f"• Target sizes {sizes}", file=sys.stderr)
+
+def target_sizes(scale: float):
+    return {k: int(v * scale) for k, v in BASE.items()}
+
+def report_id_capacity(sizes, widen_ids=True):
+    print("• ID capacity (needed / available):", file=sys.stderr)
+    n_airlines = max(sizes["airlines"], 1)
+    check_capacity([
+        ("airport codes", max(sizes["airports"], len(CITY_NAMES)), 26 ** 3),
+        ("airline codes", sizes["airlines"], 26 ** 2),
+        ("flight ids (≤ target)", sizes["flights"], n_airlines * 9999),
+    ], widen=widen_ids)
+
+def build_reference_data(sizes, widen_ids=True):
+    airport_codes = iata_space(3, SEED, widen=widen_ids, label="airport")
+    airline_codes = iata_space(2, SEED, widen=widen_ids, label="airline")
 
     # ✅ Generate Airports and Ensure Each City Has at Least One Airport
     airports = []
@@ -150,36 +161,57 @@ def build(scale: float):
 
     # First, one airport per city
     for city in CITY_NAMES:
-        code = next(iata_code(1, 3))
+        code = airport_codes.next()
         airports.append((code, city, "CountryX"))
         city_to_airports.setdefault(city, []).append(code)
 
     # Then, remaining airports assigned randomly to cities
     remaining_airports = sizes["airports"] - len(CITY_NAMES)
-    for code in iata_code(remaining_airports, 3):
+    for code in airport_codes.take(max(remaining_airports, 0)):
         city = RND.choice(CITY_NAMES)
         airports.append((code, city, "CountryX"))
         city_to_airports.setdefault(city, []).append(code)
 
-    airport_ids = [a[0] for a in airports]
-
     # ✅ Generate Airlines
-    airline_ids = [code for code in iata_code(sizes["airlines"], 2)]
+    airline_ids = airline_codes.take(sizes["airlines"])
     adjectives = ["Global", "Blue", "Sky", "Prime", "Express", "United", "Star", "Swift", "Aero", "Atlantic"]
     nouns = ["Air", "Jet", "Fly", "Wings", "Lines"]
     airlines = [(code, f"{RND.choice(adjectives)} {RND.choice(nouns)}", None) for code in airline_ids]
 
-    # ✅ Generate Users
-    fnames = ["alex", "maria", "john", "kate", "nick", "sofia", "paul", "irene",
-              "george", "lena", "bruce", "clark", "diana", "peter", "natasha"]
-    users = [(f"{RND.choice(fnames)}{idx}@example.com", hash_pw(f"{RND.choice(fnames)}{idx}@example.com"))
-             for idx in range(sizes["users"])]
-
-    start_date = datetime.now() + timedelta(days=2)
-    end_date = start_date + timedelta(days=120)
-
-    flights, tickets = [], []
-    flight_ids = set()
+    return airports, airlines, city_to_airports
+
+def iter_users(n):
+    for idx in range(n):
+        yield (f"{RND.choice(FIRST_NAMES)}{idx}@example.com", hash_pw(f"{RND.choice(FIRST_NAMES)}{idx}@example.com"))
+
+@lru_cache(maxsize=None)
+def departure_days(freq_per_day, horizon_days=HORIZON_DAYS):
+    """Offsets from start_date of each departure's day for a route flown `freq_per_day`.
+
+    The random time of day is added on top by the engine; the pattern itself is
+    the same for every route with the same frequency. A shorter horizon gives a
+    prefix of a longer one, which is what --advance extends.
+    """
+    horizon = timedelta(days=horizon_days)
+    offsets, current = [], timedelta(0)
+    if freq_per_day >= 1:
+        while current < horizon:
+            offsets += [current] * int(freq_per_day)
+            current += timedelta(days=1)
+    else:
+        flights_per_week = max(1, int(round(freq_per_day * 7)))
+        days_between_flights = 7 / flights_per_week
+
+        while current < horizon:
+            for _ in range(flights_per_week):
+                offsets.append(current)
+                current += timedelta(days=days_between_flights)
+            current += timedelta(weeks=1)
+    return tuple(offsets)
+
+def iter_popular_routes(airlines, city_to_airports, rng=RND):
+    """Yield ``(airline, depart airport, arrive airport, flights per day)`` per route."""
+    airline_ids = [a[0] for a in airlines]
 
     # ✅ Force Popular Routes to Have a Flight Every Day (Both Directions)
     popular_routes = [
@@ -194,7 +226,7 @@ def build(scale: float):
     for src_city, dst_city in popular_routes:
         for direction in [(src_city, dst_city), (dst_city, src_city)]:
             src_city_dir, dst_city_dir = direction
-            al_code = RND.choice(airline_ids)
+            al_code = rng.choice(airline_ids)
 
             src_candidates = city_to_airports.get(src_city_dir, [])
             dst_candidates = city_to_airports.get(dst_city_dir, [])
@@ -202,46 +234,265 @@ def build(scale: float):
             if not src_candidates or not dst_candidates:
                 continue  # Skip if no airport found for either city
 
-            src_id = RND.choice(src_candidates)
-            dst_id = RND.choice(dst_candidates)
+            src_id = rng.choice(src_candidates)
+            dst_id = rng.choice(dst_candidates)
+            yield al_code, src_id, dst_id, 1
 
-            current_date = start_date
-            while current_date < end_date:
-                dep_time = current_date + timedelta(hours=RND.randint(0, 23), minutes=RND.randint(0, 59))
-                generate_flight_and_tickets(dep_time, src_id, dst_id, al_code, flight_ids, flights, tickets)
-                current_date += timedelta(days=1)
+def iter_random_routes(sizes, airports, airlines, rng=RND):
+    airport_ids = [a[0] for a in airports]
+    airline_ids = [a[0] for a in airlines]
 
     # ✅ Generate Random Routes for Remaining Flights
     num_routes = max(1, sizes["flights"] // 50)
     for _ in range(num_routes):
-        al_code = RND.choice(airline_ids)
-        src_id, dst_id = RND.sample(airport_ids, 2)
+        al_code = rng.choice(airline_ids)
+        src_id, dst_id = rng.sample(airport_ids, 2)
         freq_level = assign_frequency(src_id, dst_id)
-        freq_per_day = ROUTE_FREQUENCY[freq_level]
-
-        current_date = start_date
-
-        if freq_per_day >= 1:
-            while current_date < end_date:
-                for _ in range(int(freq_per_day)):
-                    dep_time = current_date + timedelta(hours=RND.randint(0, 23), minutes=RND.randint(0, 59))
-                    generate_flight_and_tickets(dep_time, src_id, dst_id, al_code, flight_ids, flights, tickets)
-                current_date += timedelta(days=1)
-        else:
-            flights_per_week = max(1, int(round(freq_per_day * 7)))
-            days_between_flights = 7 / flights_per_week
-
-            while current_date < end_date:
-                for _ in range(flights_per_week):
-                    dep_time = current_date + timedelta(hours=RND.randint(0, 23), minutes=RND.randint(0, 59))
-                    generate_flight_and_tickets(dep_time, src_id, dst_id, al_code, flight_ids, flights, tickets)
-                    current_date += timedelta(days=days_between_flights)
-                current_date += timedelta(weeks=1)
+        yield al_code, src_id, dst_id, ROUTE_FREQUENCY[freq_level]
+
+def iter_routes(sizes, airports, airlines, city_to_airports, rng=RND):
+    yield from iter_popular_routes(airlines, city_to_airports, rng)
+    yield from iter_random_routes(sizes, airports, airlines, rng)
+
+def shard_seed(seed, shard):
+    """Independent, reproducible RNG seed for one shard of the route loop."""
+    return int.from_bytes(hashlib.sha256(f"{seed}:shard:{shard}".encode()).digest()[:8], "big")
+
+def python_route_rows(route, start_date, flight_ids, rng=RND, from_days=0, to_days=HORIZON_DAYS):
+    """Flights of `route` departing in days [from_days, to_days) of the horizon."""
+    al_code, src_id, dst_id, freq_per_day = route
+    for day in departure_days(freq_per_day, to_days)[len(departure_days(freq_per_day, from_days)):]:
+        dep_time = start_date + day + timedelta(hours=rng.randint(0, 23), minutes=rng.randint(0, 59))
+        yield generate_flight_and_tickets(dep_time, src_id, dst_id, al_code, flight_ids, rng)
+
+def numpy_route_rows(routes, start_date, flight_ids, gen):
+    """Vectorized python_route_rows() for a batch of routes.
+
+    Every random column of the batch (time of day, duration, base price,
+    availability per class) is drawn in one call and the timestamps,
+    seasonal multipliers and class prices are computed as arrays; only the
+    final tuple assembly is a Python loop.
+    """
+    days = [np.array(departure_days(route[3]), dtype="timedelta64[us]") for route in routes]
+    counts = [len(d) for d in days]
+    n = sum(counts)
+    if n == 0:
+        return
+
+    dep = np.datetime64(start_date, "us") + np.concatenate(days)
+    dep = (dep + (gen.integers(0, 24, n) * 60 + gen.integers(0, 60, n)).astype("timedelta64[m]")).astype("datetime64[m]")
+    arr = dep + gen.integers(60, 721, n).astype("timedelta64[m]")
+
+    season = SEASON_BY_MONTH[dep.astype("datetime64[M]").astype(np.int64) % 12]
+    base_price = gen.integers(40, 601, n) * season
+    prices = [(base_price * mul).astype(np.int64).tolist() for _, mul in CLASSES]
+    avails = [(gen.integers(80, 201, n) if cls == 'economy' else gen.integers(10, 51, n)).tolist()
+              for cls, _ in CLASSES]
+
+    dep_s = np.char.replace(np.datetime_as_string(dep), "T", " ").tolist()
+    arr_s = np.char.replace(np.datetime_as_string(arr), "T", " ").tolist()
+
+    start = 0
+    for (al_code, src_id, dst_id, _), count in zip(routes, counts):
+        for i in range(start, start + count):
+            fid = flight_ids.next(al_code)
+            flight = (fid, 200, dep_s[i], arr_s[i], src_id, dst_id, al_code)
+            tickets = [(ticket_code(fid, cls), fid, al_code, cls, prices[c][i], avails[c][i])
+                       for c, (cls, _) in enumerate(CLASSES)]
+            yield flight, tickets
+        start += count
+
+def iter_route_rows(routes, start_date, flight_ids, engine, rng):
+    """Rows for `routes`; `rng` is a random.Random (python) or numpy Generator (numpy)."""
+    if engine == "numpy":
+        for batch in chunked(routes, NUMPY_ROUTE_BATCH):
+            yield from numpy_route_rows(batch, start_date, flight_ids, rng)
+    else:
+        for route in routes:
+            yield from python_route_rows(route, start_date, flight_ids, rng)
+
+SHARD_SCHEMA_SQL = """
+CREATE TABLE flight (id, num_tickets, time_departure, time_arrival, airport_depart_id, airport_arrive_id, airline_id);
+CREATE TABLE ticket (code, flight_id, airline_id, class, price, availability);
+"""
+
+def generate_shard(task):
+    """Process-pool worker: write one shard's flights and tickets to its own SQLite file."""
+    routes, start_date, engine, widen_ids, seed, shard, shards, path = task
+    t0 = perf_counter()
+    flight_ids = FlightIdAllocator(seed, widen=widen_ids, shard=shard, shards=shards)
+    rng_seed = shard_seed(seed, shard)
+    rng = np.random.default_rng(rng_seed) if engine == "numpy" else Random(rng_seed)
+
+    conn = sqlite3.connect(path)
+    conn.executescript(SHARD_SCHEMA_SQL)
+    for chunk in chunked(iter_route_rows(routes, start_date, flight_ids, engine, rng), CHUNK_SIZE):
+        conn.executemany("INSERT INTO flight VALUES (?,?,?,?,?,?,?)", [flight for flight, _ in chunk])
+        conn.executemany("INSERT INTO ticket VALUES (?,?,?,?,?,?)", (t for _, tickets in chunk for t in tickets))
+    conn.commit()
+    conn.close()
+    return path, perf_counter() - t0, flight_ids.state()
+
+def iter_shard_rows(path):
+    conn = sqlite3.connect(path)
+    tickets = conn.execute("SELECT * FROM ticket ORDER BY rowid")
+    for flight in conn.execute("SELECT * FROM flight ORDER BY rowid"):
+        yield flight, tickets.fetchmany(len(CLASSES))
+    conn.close()
+
+def iter_sharded_rows(routes, start_date, engine, widen_ids, workers, id_states=None):
+    """Generate `routes` in `workers` contiguous shards on a process pool.
+
+    Each shard draws from its own shard_seed() stream and a strided slice of
+    the flight-number spaces, and shards are yielded back in order, so the
+    output depends only on the seed and the shard count. Each shard's
+    allocator state is appended to `id_states`.
+    """
+    bounds = [len(routes) * i // workers for i in range(workers + 1)]
+    with TemporaryDirectory(dir=DB_PATH.parent, prefix="shards-") as tmp, \
+         ProcessPoolExecutor(max_workers=workers) as pool:
+        tasks = [(routes[bounds[i]:bounds[i + 1]], start_date, engine, widen_ids, SEED, i, workers,
+                  str(Path(tmp) / f"shard{i}.db")) for i in range(workers)]
+        for shard, (path, secs, state) in enumerate(pool.map(generate_shard, tasks)):
+            instrumentation.add(f"shard {shard} (worker)", secs)
+            if id_states is not None:
+                id_states.append(state)
+            yield from iter_shard_rows(path)
+
+def iter_flights(sizes, airports, airlines, city_to_airports, widen_ids=True, engine="python", workers=1,
+                 schedule=None):
+    """Yield ``(flight, tickets)`` per departure, in the order build() inserts them.
+
+    `schedule`, if given, is filled with what --advance needs to extend the
+    horizon later (see save_schedule()).
+    """
+    start_date = START_DATE or datetime.now() + timedelta(days=2)
+    if schedule is None:
+        schedule = {}
+    schedule.update(start_date=start_date, horizon_days=HORIZON_DAYS, seed=SEED, widen_ids=widen_ids,
+                    routes=[], id_states=[])
+    recorded = schedule["routes"]
+
+    def record(routes):
+        for route in routes:
+            recorded.append(route)
+            yield route
+
+    if workers > 1:
+        recorded.extend(iter_routes(sizes, airports, airlines, city_to_airports))
+        yield from instrumentation.iterate(f"flights ({workers} shards)", iter_sharded_rows(
+            recorded, start_date, engine, widen_ids, workers, schedule["id_states"]))
+        return
+    flight_ids = FlightIdAllocator(SEED, widen=widen_ids)
+    if engine == "numpy":
+        # vectorized batches span both route loops; splitting them would change the draws
+        routes = record(iter_routes(sizes, airports, airlines, city_to_airports))
+        yield from instrumentation.iterate("flights (numpy batches)", iter_route_rows(
+            routes, start_date, flight_ids, engine, np.random.default_rng(SEED)))
+    else:
+        # The two route loops stay lazy, so RND is drawn in the same order as
+        # one iter_routes() pass; they are separate only to be timed apart.
+        for label, routes in (("flights (popular routes)", iter_popular_routes(airlines, city_to_airports)),
+                              ("flights (random routes)", iter_random_routes(sizes, airports, airlines))):
+            yield from instrumentation.iterate(label, iter_route_rows(record(routes), start_date, flight_ids,
+                                                                      engine, RND))
+    schedule["id_states"].append(flight_ids.state())
+
+def flight_batches(rows, chunk_size):
+    """``(flights, tickets)`` lists per `chunk_size` departures of iter_flights()."""
+    for chunk in chunked(rows, chunk_size):
+        yield [flight for flight, _ in chunk], [t for _, tickets in chunk for t in tickets]
+
+def produce_flights(task, out):
+    """--pipeline producer process: run iter_flights() and ship its batches through `out`.
+
+    Ends with ``("done", (RND state, schedule, seconds, flights))`` so the
+    parent continues with the same random stream, or ``("error", message)``.
+    """
+    global SEED, START_DATE
+    sizes, airports, airlines, city_to_airports, widen_ids, engine, workers, chunk_size, seed, start_date, state = task
+    SEED, START_DATE = seed, start_date
+    RND.setstate(state)
+    try:
+        schedule, busy, n = {}, 0.0, 0
+        t0 = perf_counter()
+        for batch in flight_batches(iter_flights(sizes, airports, airlines, city_to_airports, widen_ids, engine,
+                                                 workers, schedule), chunk_size):
+            busy += perf_counter() - t0
+            out.put(("batch", batch))
+            n += len(batch[0])
+            t0 = perf_counter()
+        out.put(("done", (RND.getstate(), schedule, busy + perf_counter() - t0, n)))
+    except BaseException as exc:
+        out.put(("error", f"{type(exc).__name__}: {exc}"))
+        raise
+
+def iter_produced_batches(sizes, airports, airlines, city_to_airports, widen_ids, engine, workers, chunk_size,
+                          schedule):
+    """flight_batches() computed by a produce_flights() process, up to PIPELINE_DEPTH batches ahead."""
+    out = multiprocessing.Queue(maxsize=PIPELINE_DEPTH)
+    task = (sizes, airports, airlines, city_to_airports, widen_ids, engine, workers, chunk_size,
+            SEED, START_DATE, RND.getstate())
+    producer = multiprocessing.Process(target=produce_flights, args=(task, out), name="flight-producer")
+    producer.start()
+    kind = None
+    try:
+        while True:
+            try:
+                kind, payload = out.get(timeout=1)
+            except Empty:
+                if not producer.is_alive():
+                    raise RuntimeError(f"flight producer exited with code {producer.exitcode}")
+                continue
+            if kind == "error":
+                raise RuntimeError(f"flight producer failed: {payload}")
+            if kind == "done":
+                state, produced, secs, n = payload
+                RND.setstate(state)
+                schedule.update(produced)
+                instrumentation.add("flights (producer process)", secs, n)
+                return
+            yield payload
+    finally:
+        if producer.is_alive() and kind != "done":  # we stopped early; it may be blocked on a full queue
+            producer.terminate()
+        producer.join()
+
+def iter_heart_picks(n_tickets, n_users, k):
+    """Yield ``(ticket_index, user_index)`` pairs for the hearts.
+
+    Draws from RND exactly like ``RND.choices(tickets, k=k)`` followed by one
+    ``RND.choice(users)`` per heart, so both seed modes produce the same rows.
+    """
+    n = float(n_tickets)
+    ticket_picks = array('q', (floor(RND.random() * n) for _ in range(k)))
+    for ticket_idx in ticket_picks:
+        yield ticket_idx, RND.randrange(n_users)
+
+
+def build(scale: float, widen_ids: bool = True, engine: str = "python", workers: int = 1, schedule=None):
+    sizes = target_sizes(scale)
+    print(f"• Target sizes {sizes}", file=sys.stderr)
+    report_id_capacity(sizes, widen_ids)
+
+    with phase("reference data") as p:
+        airports, airlines, city_to_airports = build_reference_data(sizes, widen_ids)
+        p.rows += len(airports) + len(airlines)
+
+    # ✅ Generate Users
+    users = list(instrumentation.iterate("users", iter_users(sizes["users"])))
+
+    flights, tickets = [], []
+    for flight, flight_tickets in iter_flights(sizes, airports, airlines, city_to_airports, widen_ids, engine, workers,
+                                               schedule):
+        flights.append(flight)
+        tickets.extend(flight_tickets)
 
     # ✅ Generate Hearts (Favorites)
-    ticket_lookup = [(t[0], t[1], t[2]) for t in tickets]  
-    selected_tickets = RND.choices(ticket_lookup, k=sizes["hearts"])
-    hearts = [(code, fid, aid, RND.choice(users)[0]) for (code, fid, aid) in selected_tickets]
+    with phase("hearts") as p:
+        hearts = [(*tickets[t_idx][:3], users[u_idx][0])
+                  for t_idx, u_idx in iter_heart_picks(len(tickets), len(users), sizes["hearts"])]
+        p.rows += len(hearts)
 
     print(f"Generated flights: {len(flights)}")
     print(f"Generated tickets: {len(tickets)}")
@@ -250,54 +501,458 @@ def build(scale: float):
     return airports, airlines, users, flights, tickets, hearts
 
 
-
-def seed(scale: float):
-    data = build(scale)
+INSERT_AIRPORT = 'INSERT OR IGNORE INTO "AIRPORT" (id, city, country) VALUES (?,?,?)'
+INSERT_AIRLINE = 'INSERT OR IGNORE INTO "AIRLINE" (id, name, website_link) VALUES (?,?,?)'
+INSERT_USER = 'INSERT OR IGNORE INTO "USER" (id, password) VALUES (?,?)'
+INSERT_FLIGHT = 'INSERT OR IGNORE INTO "FLIGHT" (id, num_tickets, time_departure, time_arrival, airport_depart_id, airport_arrive_id, airline_id) VALUES (?,?,?,?,?,?,?)'
+INSERT_TICKET = 'INSERT OR IGNORE INTO "TICKET" (code, flight_id, airline_id, class, price, availability) VALUES (?,?,?,?,?,?)'
+INSERT_HEART = 'INSERT OR IGNORE INTO "Hearts" (ticket_code, flight_id, airline_id, user_id) VALUES (?,?,?,?)'
+
+# Streaming mode resolves heart picks through the generation order: the ids of
+# the generated flights and users are numbered 1, 2, … in temp tables as they
+# are written (rows INSERT OR IGNORE skipped in an existing database included),
+# and each flight is followed by exactly len(CLASSES) tickets, so ticket #i is
+# class i % 3 of flight #i // 3. Hearts are then joined on the real keys.
+SEED_ORDER_SQL = '''
+CREATE TEMP TABLE IF NOT EXISTS seed_flight (n INTEGER PRIMARY KEY, id TEXT NOT NULL);
+CREATE TEMP TABLE IF NOT EXISTS seed_user (n INTEGER PRIMARY KEY, id TEXT NOT NULL);
+DELETE FROM temp.seed_flight;
+DELETE FROM temp.seed_user;
+'''
+INSERT_SEED_FLIGHT = "INSERT INTO temp.seed_flight (id) VALUES (?)"
+INSERT_SEED_USER = "INSERT INTO temp.seed_user (id) VALUES (?)"
+INSERT_HEART_BY_ORDER = '''
+    INSERT OR IGNORE INTO "Hearts" (ticket_code, flight_id, airline_id, user_id)
+    SELECT f.id || ?, f.id, f.airline_id, u.id
+    FROM temp.seed_flight s JOIN flight f ON f.id = s.id, temp.seed_user u
+    WHERE s.n = ? AND u.n = ?
+'''
+# The same for the --surrogate-keys layout, where a ticket is found by its UNIQUE code.
+INSERT_HEART_BY_ORDER_SK = '''
+    INSERT OR IGNORE INTO hearts_base (ticket_sk, user_id)
+    SELECT t.sk, u.id
+    FROM temp.seed_flight s JOIN ticket_base t ON t.code = s.id || ?, temp.seed_user u
+    WHERE s.n = ? AND u.n = ?
+'''
+
+def insert(cur, table, sql, rows):
+    with phase(f"insert {table}") as p:
+        before = cur.connection.total_changes  # rowcount misses rows a --surrogate-keys view trigger writes
+        cur.executemany(sql, rows)
+        p.rows += cur.connection.total_changes - before
+
+class BatchWriter:
+    """insert() on a writer thread, fed batch by batch through a bounded queue.
+
+    put() blocks while `depth` batches are waiting (back-pressure), batches run
+    in submission order on the one connection and transaction, and the first
+    writer error is re-raised in the producer at its next put(), sync() or
+    close(). The producer must not use the connection between sync() calls.
+    Timings are kept here and handed to instrumentation at close(), from the
+    producer's thread.
+    """
+
+    def __init__(self, conn, depth=PIPELINE_DEPTH):
+        self.cur = conn.cursor()
+        self.queue = Queue(maxsize=depth)
+        self.error = None
+        self.timings = {}  # table → [seconds, rows]
+        self.blocked_s = 0.0
+        self.thread = Thread(target=self._drain, name="sqlite-writer", daemon=True)
+        self.thread.start()
+
+    def _drain(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                if self.error is None:  # after a failure, keep draining so put() never deadlocks
+                    table, sql, rows = item
+                    t0, before = perf_counter(), self.cur.connection.total_changes
+                    self.cur.executemany(sql, rows)
+                    stats = self.timings.setdefault(table, [0.0, 0])
+                    stats[0] += perf_counter() - t0
+                    stats[1] += self.cur.connection.total_changes - before
+            except BaseException as exc:
+                self.error = exc
+            finally:
+                self.queue.task_done()
+
+    def _check(self):
+        if self.error is not None:
+            raise self.error
+
+    def put(self, table, sql, rows):
+        self._check()
+        rows = list(rows)  # materialized by the producer, not the writer
+        t0 = perf_counter()
+        self.queue.put((table, sql, rows))
+        self.blocked_s += perf_counter() - t0
+
+    def sync(self):
+        """Wait until every queued batch is written."""
+        t0 = perf_counter()
+        self.queue.join()
+        self.blocked_s += perf_counter() - t0
+        self._check()
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+        for table, (secs, rows) in self.timings.items():
+            instrumentation.add(f"insert {table} (writer thread)", secs, rows)
+        instrumentation.add("waiting for writer", self.blocked_s)
+        self._check()
+
+def open_for_load(fast_load=False, in_memory=False, surrogate_keys=False):
+    # check_same_thread=False: with --pipeline a writer thread takes over the inserts
+    if in_memory:
+        conn = sqlite3.connect(":memory:", check_same_thread=False)
+        if DB_PATH.exists():  # seeding adds to what is there, so start from a copy of it
+            with phase("read existing database"):
+                disk = sqlite3.connect(DB_PATH)
+                disk.backup(conn)
+                disk.close()
+    else:
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+    create_db_schema(conn, fast_load, surrogate_keys)
+    derived_tables.drop_triggers(conn)  # finish_load() rebuilds the aggregates in one pass
+    if fast_load:
+        for pragma in LOAD_PRAGMAS:
+            conn.execute(f"PRAGMA {pragma}")
+        conn.execute("PRAGMA foreign_keys = OFF")
+        index_pack.drop(conn)
+    else:
+        conn.execute("PRAGMA foreign_keys = ON")
+    return conn
+
+def flush_to_disk(conn, pages=FLUSH_PAGES):
+    """Copy the (in-memory) database behind `conn` to DB_PATH with the backup API."""
+    tmp = DB_PATH.with_name(DB_PATH.name + ".tmp")
+    tmp.unlink(missing_ok=True)
+    disk = sqlite3.connect(tmp)
+
+    def progress(status, remaining, total):
+        print(f"\r• Flushing to {DB_PATH.name}: {total - remaining:,}/{total:,} pages", end="", file=sys.stderr)
+
+    with phase("flush to disk") as p:
+        conn.backup(disk, pages=pages, progress=progress)
+        p.rows += disk.execute("PRAGMA page_count").fetchone()[0]
+        disk.close()
+        os.replace(tmp, DB_PATH)
+    print(file=sys.stderr)
+
+def finish_load(conn, fast_load=False, report_path=None, in_memory=False):
+    """Derive, index, validate and commit the load; with --fast-load, restore safe pragmas afterwards.
+
+    With in_memory the committed database is then flushed to DB_PATH.
+    """
+    with phase("post-load"):
+        for name, secs, rows in derived_tables.build(conn, added_at=pinned_epoch()):
+            instrumentation.add(name, secs, rows)
+        instrumentation.add("index pack + ANALYZE", index_pack.apply(conn))
+
+        report = validate_db.validate(conn)
+        report["database"] = str(DB_PATH)
+        instrumentation.add("validation", report["elapsed_s"], report["violations"])
+        if report_path:
+            validate_db.write_report(report, report_path)
+        print(validate_db.summary(report), file=sys.stderr)
+        if not report["ok"]:
+            conn.rollback()
+            raise sqlite3.IntegrityError(validate_db.summary(report))
+
+    with phase("commit"):
+        conn.commit()
+    if fast_load:
+        for pragma in SAFE_PRAGMAS:
+            conn.execute(f"PRAGMA {pragma}")
+    if in_memory:
+        flush_to_disk(conn)
+    instrumentation.summary()
+
+# ---------------------------------------------------------------------------
+# Rolling horizon (--advance)
+# ---------------------------------------------------------------------------
+# A seed records its route plan, where its window starts and ends, and how far
+# each airline's flight-number space has been drawn. --advance continues from
+# there: it generates only the days between the stored end of the window and
+# today + 2 + HORIZON_DAYS, moves flights that have departed (with their
+# tickets and hearts) to *_archive tables, and refreshes the derived tables for
+# just those flights.
+ARCHIVED = [  # children first, so FK enforcement never sees an orphan
+    ("hearts", "(ticket_code, flight_id, airline_id) IN "
+               "(SELECT code, flight_id, airline_id FROM ticket WHERE flight_id IN (SELECT id FROM expired_flight))"),
+    ("ticket", "flight_id IN (SELECT id FROM expired_flight)"),
+    ("flight", "id IN (SELECT id FROM expired_flight)"),
+]
+
+def save_schedule(conn, schedule):
+    """Persist the route plan and window filled in by iter_flights()."""
+    for statement in schema.SCHEDULE_SQL.split(";")[:-1]:
+        conn.execute(statement)
+    conn.execute("DELETE FROM schedule_route")
+    conn.executemany("INSERT INTO schedule_route VALUES (?,?,?,?)", schedule["routes"])
+    issued = {}
+    for shard, state in enumerate(schedule["id_states"]):
+        for al_code, n in state.items():
+            issued.setdefault(al_code, [0] * len(schedule["id_states"]))[shard] = n
+    meta = {
+        "seed": schedule["seed"],
+        "start_date": schedule["start_date"].isoformat(),
+        "horizon_days": schedule["horizon_days"],
+        "widen_ids": schedule["widen_ids"],
+        "id_shards": len(schedule["id_states"]),
+        "id_issued": issued,  # airline → codes drawn per shard
+    }
+    conn.executemany("INSERT OR REPLACE INTO schedule_meta VALUES (?, ?)",
+                     [(key, json.dumps(value)) for key, value in meta.items()])
+
+def load_schedule(conn, required=True):
+    """``(meta, routes)`` saved by the last seed; ``(None, [])`` without one unless `required`."""
+    try:
+        meta = {key: json.loads(value) for key, value in conn.execute("SELECT key, value FROM schedule_meta")}
+        routes = conn.execute("SELECT * FROM schedule_route ORDER BY rowid").fetchall()
+    except sqlite3.OperationalError:
+        meta, routes = {}, []
+    if not meta and required:
+        raise SystemExit(f"✖ {DB_PATH} has no stored schedule; seed it with this version first")
+    return meta or None, routes
+
+def continue_flight_ids(meta):
+    """A FlightIdAllocator picking up where the stored one stopped (in shard 0's stride, for sharded seeds)."""
+    flight_ids = FlightIdAllocator(meta["seed"], widen=meta["widen_ids"], shards=meta["id_shards"])
+    return flight_ids.restore({al_code: counts[0] for al_code, counts in meta["id_issued"].items()})
+
+def save_flight_ids(conn, meta, flight_ids):
+    issued = meta["id_issued"]
+    for al_code, n in flight_ids.state().items():
+        issued.setdefault(al_code, [0] * flight_ids.shards)[0] = n
+    conn.execute("INSERT OR REPLACE INTO schedule_meta VALUES ('id_issued', ?)", (json.dumps(issued),))
+
+def expire_departed(conn, now, archive=True):
+    """Remove flights that departed before `now` with their tickets and hearts; returns their ids."""
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS expired_flight (id TEXT PRIMARY KEY)")
+    conn.execute("DELETE FROM expired_flight")
+    conn.execute("INSERT INTO expired_flight SELECT id FROM flight WHERE time_departure < ?", (iso(now),))
+    archived_at = iso(now)
+    if seat_inventory.enabled(conn):  # a departed flight's seat map is not kept
+        with phase("expire seat_map") as p:
+            p.rows += conn.execute("DELETE FROM seat_map WHERE flight_id IN (SELECT id FROM expired_flight)").rowcount
+    for table, where in ARCHIVED:
+        if archive:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {table}_archive AS "
+                         f"SELECT *, NULL AS archived_at FROM {table} WHERE 0")
+            conn.execute(f"INSERT INTO {table}_archive SELECT *, ? FROM {table} WHERE {where}", (archived_at,))
+        with phase(f"expire {table}") as p:
+            p.rows += conn.execute(f"DELETE FROM {table} WHERE {where}").rowcount
+    return [fid for fid, in conn.execute("SELECT id FROM expired_flight")]
+
+def advance(days=None, archive=True, now=None):
+    """Roll the stored window forward to `now` (or by `days`) without regenerating what is already there."""
+    now = now or datetime.now()
     conn = sqlite3.connect(DB_PATH)
     conn.execute("PRAGMA foreign_keys = ON")
-    cur = conn.cursor()
+    conn.execute("PRAGMA cache_size = -262144")  # flight_search's covering indexes are updated at random spots
+    meta, routes = load_schedule(conn)
+    start_date = datetime.fromisoformat(meta["start_date"])
+    from_days = meta["horizon_days"]
+    if days is None:
+        window_end = now + timedelta(days=2 + HORIZON_DAYS)
+        days = max((window_end - (start_date + timedelta(days=from_days))).days, 0)
+    to_days = from_days + days
+    print(f"• Advancing {DB_PATH.name}: +{days} days (horizon day {from_days} → {to_days}), "
+          f"expiring departures before {iso(now)}", file=sys.stderr)
+
+    flight_ids = continue_flight_ids(meta)
+    rng = Random(f"{meta['seed']}:advance:{from_days}")
 
-    print("• Inserting …", file=sys.stderr)
     t0 = perf_counter()
+    cur = conn.cursor()
     cur.execute("BEGIN")
-    cur.executemany('INSERT OR IGNORE INTO "AIRPORT" (id, city, country) VALUES (?,?,?)', data[0])
-    cur.executemany('INSERT OR IGNORE INTO "AIRLINE" (id, name, website_link) VALUES (?,?,?)', data[1])
-    cur.executemany('INSERT OR IGNORE INTO "USER" (id, password) VALUES (?,?)', data[2])
-    airport_ids = set(a[0] for a in data[0])
-    airline_ids = set(a[0] for a in data[1])
-
-    for flight in data[3]:
-        fid, num_tickets, time_dep, time_arr, dep_id, arr_id, al_id = flight
-        if dep_id not in airport_ids:
-            print(f"Invalid Departure Airport ID: {dep_id}")
-        if arr_id not in airport_ids:
-            print(f"Invalid Arrival Airport ID: {arr_id}")
-        if al_id not in airline_ids:
-            print(f"Invalid Airline ID: {al_id}")
-    cur.executemany('INSERT OR IGNORE INTO "FLIGHT" (id, num_tickets, time_departure, time_arrival, airport_depart_id, airport_arrive_id, airline_id) VALUES (?,?,?,?,?,?,?)', data[3])
-    cur.executemany('INSERT OR IGNORE INTO "TICKET" (code, flight_id, airline_id, class, price, availability) VALUES (?,?,?,?,?,?)', data[4])
-
-    cur.executemany('INSERT OR IGNORE INTO "Hearts" (ticket_code, flight_id, airline_id, user_id) VALUES (?,?,?,?)', data[5])
-
-    # cur.executemany('INSERT OR IGNORE INTO airport  (id, city, country) VALUES (?,?,?)', data[0])
-    # cur.executemany('INSERT OR IGNORE INTO airline  (id, name, website_link) VALUES (?,?,?)', data[1])
-    # cur.executemany('INSERT OR IGNORE INTO "user"   (id, password) VALUES (?,?)', data[2])
-    # cur.executemany('INSERT OR IGNORE INTO flight   (id, airline_id, airport_depart_id, airport_arrive_id, time_departure, time_arrival, num_tickets) VALUES (?,?,?,?,?,?,?)', data[3])
-    # cur.executemany('INSERT OR IGNORE INTO ticket   (code, flight_id, airline_id, class, price, availability) VALUES (?,?,?,?,?,?)', data[4])
-    # cur.executemany('INSERT OR IGNORE INTO hearts   (ticket_code, flight_id, airline_id, user_id) VALUES (?,?,?,?)', data[5])
+    with phase("advance"):
+        new_ids = []
+        rows = (row for route in routes
+                for row in python_route_rows(route, start_date, flight_ids, rng, from_days, to_days))
+        for chunk in chunked(instrumentation.iterate("flights (new days)", rows), CHUNK_SIZE):
+            insert(cur, "flight", INSERT_FLIGHT, [flight for flight, _ in chunk])
+            insert(cur, "ticket", INSERT_TICKET, (t for _, tickets in chunk for t in tickets))
+            new_ids += [flight[0] for flight, _ in chunk]
+
+        if seat_inventory.enabled(conn):
+            with phase("seat maps") as p:
+                p.rows += seat_inventory.build(conn, new_ids, seed=f"{meta['seed']}:seats:{from_days}")[0]
+        expired = expire_departed(conn, now, archive)
+        with phase("refresh derived tables") as p:
+            p.rows += derived_tables.refresh(conn, new_ids + expired)
+
+        save_flight_ids(conn, meta, flight_ids)
+        conn.execute("INSERT OR REPLACE INTO schedule_meta VALUES ('horizon_days', ?)", (json.dumps(to_days),))
+    with phase("commit"):
+        conn.commit()
+    instrumentation.summary()
+    print(f"✔ Advanced in {perf_counter()-t0:.2f}s "
+          f"({len(new_ids):,} flights added | {len(expired):,} departed flights "
+          f"{'archived' if archive else 'deleted'})", file=sys.stderr)
+    conn.close()
 
-    conn.commit()
+def load(conn, scale: float, widen_ids: bool = True, engine: str = "python", workers: int = 1):
+    """Generate everything in memory, then insert it in `conn`'s open transaction; returns (flights, tickets)."""
+    schedule = {}
+    with phase("build"):
+        data = build(scale, widen_ids, engine, workers, schedule)
+    cur = conn.cursor()
+
+    print("• Inserting …", file=sys.stderr)
+    with phase("load"):
+        insert(cur, "airport", INSERT_AIRPORT, data[0])
+        insert(cur, "airline", INSERT_AIRLINE, data[1])
+        insert(cur, "user", INSERT_USER, data[2])
+        insert(cur, "flight", INSERT_FLIGHT, data[3])
+        insert(cur, "ticket", INSERT_TICKET, data[4])
+
+        insert(cur, "hearts", INSERT_HEART, data[5])
+        save_schedule(conn, schedule)
+
+    return len(data[3]), len(data[4])
+
+def load_stream(conn, scale: float, chunk_size: int = CHUNK_SIZE, widen_ids: bool = True, engine: str = "python",
+                workers: int = 1, pipeline: bool = False):
+    """Same rows as load(), but generated and inserted `chunk_size` flights at a time.
+
+    Nothing proportional to the flight count is held in memory: flights and
+    tickets go straight from iter_flights() into the open transaction and the
+    hearts are resolved through the generated ids' order, recorded in temp
+    tables (see SEED_ORDER_SQL). With `pipeline` flights are generated in a
+    produce_flights() process and inserted by a BatchWriter thread, so
+    generation and SQLite work overlap; the rows are the same.
+    """
+    sizes = target_sizes(scale)
+    print(f"• Target sizes {sizes} (streaming, {chunk_size:,} flights/chunk)", file=sys.stderr)
+    report_id_capacity(sizes, widen_ids)
+
+    with phase("reference data") as p:
+        airports, airlines, city_to_airports = build_reference_data(sizes, widen_ids)
+        p.rows += len(airports) + len(airlines)
+    cur = conn.cursor()
+
+    surrogate = schema.layout_of(conn) == "surrogate"
+    for statement in SEED_ORDER_SQL.split(";")[:-1]:  # not executescript(): that would commit the open transaction
+        cur.execute(statement)
+    writer = BatchWriter(conn) if pipeline else None
+    write = writer.put if writer else lambda table, sql, rows: insert(cur, table, sql, rows)
+
+    print(f"• Generating + inserting{' (pipelined)' if pipeline else ''} …", file=sys.stderr)
+    with phase("stream"):
+        try:
+            write("airport", INSERT_AIRPORT, airports)
+            write("airline", INSERT_AIRLINE, airlines)
+            for users in chunked(instrumentation.iterate("users", iter_users(sizes["users"])), chunk_size):
+                write("user", INSERT_USER, users)
+                write("seed order", INSERT_SEED_USER, [(user[0],) for user in users])
+
+            n_flights = n_tickets = 0
+            schedule = {}
+            if pipeline:
+                batches = iter_produced_batches(sizes, airports, airlines, city_to_airports, widen_ids, engine,
+                                                workers, chunk_size, schedule)
+            else:
+                batches = flight_batches(iter_flights(sizes, airports, airlines, city_to_airports, widen_ids, engine,
+                                                      workers, schedule), chunk_size)
+            for flights, tickets in batches:
+                write("flight", INSERT_FLIGHT, flights)
+                write("ticket", INSERT_TICKET, tickets)
+                write("seed order", INSERT_SEED_FLIGHT, [(flight[0],) for flight in flights])
+                n_flights += len(flights)
+                n_tickets += len(tickets)
+
+            suffixes = [ticket_code("", cls) for cls, _ in CLASSES]
+            heart_rows = ((suffixes[t_idx % len(CLASSES)], t_idx // len(CLASSES) + 1, u_idx + 1)
+                          for t_idx, u_idx in iter_heart_picks(n_tickets, sizes["users"], sizes["hearts"]))
+            for hearts in chunked(instrumentation.iterate("hearts", heart_rows), chunk_size):
+                write("hearts", INSERT_HEART_BY_ORDER_SK if surrogate else INSERT_HEART_BY_ORDER, hearts)
+        finally:
+            if writer:
+                writer.close()
+        save_schedule(conn, schedule)
+
+    print(f"Generated flights: {n_flights}")
+    print(f"Generated tickets: {n_tickets}")
+    print(f"Generated hearts: {sizes['hearts']}")
+    return n_flights, n_tickets
+
+def seed(scale: float, widen_ids: bool = True, engine: str = "python", workers: int = 1,
+         fast_load: bool = False, report_path=None, stream: bool = False, chunk_size: int = CHUNK_SIZE,
+         in_memory: bool = False, pipeline: bool = False, surrogate_keys: bool = False, seat_maps: bool = False):
+    """Seed DB_PATH in one transaction: load() (or load_stream()), the seat maps if asked, then finish_load()."""
+    conn = open_for_load(fast_load, in_memory, surrogate_keys)
+    t0 = perf_counter()
+    conn.execute("BEGIN")
+    if stream or pipeline:
+        n_flights, n_tickets = load_stream(conn, scale, chunk_size, widen_ids, engine, workers, pipeline)
+    else:
+        n_flights, n_tickets = load(conn, scale, widen_ids, engine, workers)
+    if seat_maps:
+        with phase("seat maps") as p:
+            p.rows += seat_inventory.build(conn, engine=engine, seed=SEED)[0]
+    finish_load(conn, fast_load, report_path, in_memory)
     print(f"✔ Done in {perf_counter()-t0:.2f}s "
-          f"({len(data[3]):,} flights | {len(data[4]):,} tickets)", file=sys.stderr)
+          f"({n_flights:,} flights | {n_tickets:,} tickets)", file=sys.stderr)
     conn.close()
 
 if __name__ == "__main__":
     ap = argparse.ArgumentParser(description="Create and Populate AirTickets DB with Synthetic Data.")
     ap.add_argument("--scale", type=float, default=1.0, help="× multiplier for base dataset sizes")
+    ap.add_argument("--stream", action="store_true", help="generate and insert in fixed-size chunks (flat memory)")
+    ap.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="flights per insert batch with --stream")
+    ap.add_argument("--pipeline", action="store_true",
+                    help="--stream with inserts on a writer thread, overlapping generation of the next chunk")
+    ap.add_argument("--no-widen", dest="widen_ids", action="store_false",
+                    help="fail fast instead of widening an exhausted ID format")
+    ap.add_argument("--engine", choices=ENGINES, default="python",
+                    help="flight/ticket generation engine (numpy needs `pip install numpy`)")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="generate the route loop in N shards on a process pool (deterministic per seed and N)")
+    ap.add_argument("--seed", type=int, default=SEED, help="master random seed")
+    ap.add_argument("--fast-load", action="store_true",
+                    help="bulk-load pragmas, indexes built after the data, one FK check at the end")
+    ap.add_argument("--in-memory", action="store_true",
+                    help="build in a :memory: database and flush it to --db with the backup API (needs RAM ≈ file size)")
+    ap.add_argument("--surrogate-keys", action="store_true",
+                    help="integer keys for airports, airlines, flights and tickets behind views with the usual columns")
+    ap.add_argument("--seat-maps", action="store_true",
+                    help="a seat bitmap per flight and class (seat_inventory.py), kept up to date by --advance")
+    ap.add_argument("--validation-report", type=Path, help="write the FK validation report (JSON) here")
+    ap.add_argument("--db", type=Path, default=DB_PATH, help="database file (default: data/flights.db)")
+    ap.add_argument("--start-date", type=datetime.fromisoformat,
+                    help="first departure day (YYYY-MM-DD[ HH:MM]) instead of two days from now; "
+                         "with the same seed and options the file is byte-identical")
+    ap.add_argument("--run-report", type=Path, help="write per-phase timings (JSON) here")
+    ap.add_argument("--profile", nargs="+", default=[], metavar="PHASE",
+                    help="cProfile these phases (e.g. users 'insert ticket') into data/profiles/")
+    ap.add_argument("--trace-memory", action="store_true", help="record peak traced memory per phase (slower)")
+    ap.add_argument("--advance", nargs="?", const=-1, type=int, metavar="DAYS",
+                    help="extend an existing database's window to today (or by DAYS) and expire departed flights")
+    ap.add_argument("--expire", choices=("archive", "delete"), default="archive",
+                    help="with --advance: move departed flights, tickets and hearts to *_archive, or drop them")
     args = ap.parse_args()
-
-    if not DB_PATH.exists():
-        print("• Creating DB and schema …")
-        create_db_schema()
-
-    seed(max(args.scale, 0.01))
+    if args.engine == "numpy" and np is None:
+        ap.error("--engine numpy requires numpy (pip install numpy)")
+
+    configure(args.seed, args.db, args.start_date)
+    instrumentation.configure(trace_memory=args.trace_memory, profile=args.profile)
+
+    if args.advance is not None:
+        if not DB_PATH.exists():
+            ap.error(f"--advance needs an existing database ({DB_PATH} not found)")
+        advance(None if args.advance < 0 else args.advance, args.expire == "archive")
+    else:
+        if not DB_PATH.exists():
+            print("• Creating DB and schema …")
+        seed(max(args.scale, 0.01), args.widen_ids, args.engine, max(args.workers, 1), args.fast_load,
+             args.validation_report, args.stream, max(args.chunk_size, 1), args.in_memory, args.pipeline,
+             args.surrogate_keys, args.seat_maps)
+    if args.run_report:
+        instrumentation.write(args.run_report)
+        print(f"• Run report written to {args.run_report}", file=sys.stderr)
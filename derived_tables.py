@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+"""Read-optimized tables derived from flight/ticket/airport/airline/hearts.
+
+The app's queries join four or five tables and wrap the join columns in
+LOWER()/DATE()/strftime(), so even with index_pack.py they walk every flight of
+a route. The tables here store those expressions precomputed, keyed the way the
+endpoints filter and sort, and are rebuilt in one pass after every seeding run:
+
+    flight_search        one row per ticket for searchTickets(), a WITHOUT ROWID
+                         table plus a covering index per sortBy option
+    route_day_min_price  cheapest fare and flight count per route, day and class
+                         for getCalendarPrices()/getDateGrid*()
+    round_trip_matrix    per city pair and class, the cheapest outbound + return
+                         total for every outbound day × trip length, one BLOB
+                         per row so a whole date grid is a single read
+    destination_popularity
+                         hearts per arrival city for getTopDestinations(), kept
+                         current by triggers on hearts insert/delete
+
+refresh(conn, flight_ids) brings both up to date after flights or prices
+change, touching only the route-days those flights fall on.
+
+    python derived_tables.py [--db data/flights.db] [--only flight_search]
+
+rebuilds them in an existing database and prints the plans of the queries they
+serve.
+"""
+from pathlib import Path
+from datetime import date, timedelta
+from array import array
+from time import perf_counter
+import argparse, sqlite3, sys
+
+import query_shapes
+try:
+    import numpy as np
+except ImportError:  # round_trip_matrix falls back to plain Python
+    np = None
+
+THIS_DIR = Path(__file__).resolve().parent
+DB_PATH = THIS_DIR / "data" / "flights.db"
+
+# ---------------------------------------------------------------------------
+# flight_search
+# ---------------------------------------------------------------------------
+FLIGHT_SEARCH_SQL = """
+CREATE TABLE flight_search (
+    origin           TEXT    NOT NULL,  -- lower(departure city)
+    destination      TEXT    NOT NULL,  -- lower(arrival city)
+    class            TEXT    NOT NULL,  -- lower(ticket class)
+    dep_date         TEXT    NOT NULL,  -- DATE(time_departure)
+    duration_minutes INTEGER NOT NULL,
+    price            INTEGER NOT NULL,
+    availability     INTEGER NOT NULL,
+    departure_city   TEXT    NOT NULL,  -- the displayed values, as stored; the keys above only filter
+    arrival_city     TEXT    NOT NULL,
+    ticket_class     TEXT    NOT NULL,
+    time_departure   TEXT    NOT NULL,
+    time_arrival     TEXT    NOT NULL,
+    airline_name     TEXT    NOT NULL,
+    ticket_code      TEXT    NOT NULL,
+    flight_id        TEXT    NOT NULL,
+    airline_id       TEXT    NOT NULL,
+    PRIMARY KEY (origin, destination, class, dep_date, price, ticket_code, flight_id, airline_id)
+) WITHOUT ROWID;
+"""
+
+# The primary key already serves "date + price order" and the unsorted search.
+# Each index below carries every remaining column, so no search touches the table.
+_FLIGHT_SEARCH_SHOWN = "departure_city, arrival_city, ticket_class, time_departure, time_arrival, airline_name"
+FLIGHT_SEARCH_INDEXES = [
+    # departureDate + duration_asc/desc
+    "CREATE INDEX fs_date_duration ON flight_search "
+    f"(origin, destination, class, dep_date, duration_minutes, price, availability, {_FLIGHT_SEARCH_SHOWN})",
+    # no departureDate + price_asc/desc
+    "CREATE INDEX fs_price ON flight_search "
+    f"(origin, destination, class, price, dep_date, duration_minutes, availability, {_FLIGHT_SEARCH_SHOWN})",
+    # no departureDate + duration_asc/desc
+    "CREATE INDEX fs_duration ON flight_search "
+    f"(origin, destination, class, duration_minutes, price, dep_date, availability, {_FLIGHT_SEARCH_SHOWN})",
+    # refresh(): find a changed flight's rows
+    "CREATE INDEX fs_flight ON flight_search (flight_id)",
+]
+
+FLIGHT_SEARCH_FILL = """
+INSERT INTO flight_search
+SELECT lower(a1.city), lower(a2.city), lower(t.class),
+       DATE(f.time_departure),
+       (strftime('%s', f.time_arrival) - strftime('%s', f.time_departure)) / 60,
+       t.price, t.availability,
+       a1.city, a2.city, t.class, f.time_departure, f.time_arrival, al.name,
+       t.code, t.flight_id, t.airline_id
+FROM ticket t
+JOIN flight f   ON f.id = t.flight_id
+JOIN airport a1 ON a1.id = f.airport_depart_id
+JOIN airport a2 ON a2.id = f.airport_arrive_id
+JOIN airline al ON al.id = f.airline_id
+{where}
+ORDER BY 1, 2, 3, 4, 6, 14, 15, 16
+"""
+
+def build_flight_search(conn):
+    """Rebuild flight_search from scratch; returns the row count."""
+    conn.execute("DROP TABLE IF EXISTS flight_search")
+    conn.execute(FLIGHT_SEARCH_SQL)
+    rows = conn.execute(FLIGHT_SEARCH_FILL.format(where="")).rowcount
+    for sql in FLIGHT_SEARCH_INDEXES:
+        conn.execute(sql)
+    return rows
+
+
+# ---------------------------------------------------------------------------
+# route_day_min_price
+# ---------------------------------------------------------------------------
+ROUTE_DAY_MIN_PRICE_SQL = """
+CREATE TABLE route_day_min_price (
+    origin      TEXT    NOT NULL,  -- lower(departure city)
+    destination TEXT    NOT NULL,  -- lower(arrival city)
+    dep_date    TEXT    NOT NULL,
+    class       TEXT    NOT NULL,  -- lower(ticket class)
+    min_price   INTEGER NOT NULL,
+    flights     INTEGER NOT NULL,
+    PRIMARY KEY (origin, destination, dep_date, class)
+) WITHOUT ROWID;
+"""
+
+# Aggregated from flight_search, which already holds the lower-cased keys.
+# Unlike searchTickets(), the calendar queries ignore availability.
+ROUTE_DAY_MIN_PRICE_FILL = """
+INSERT INTO route_day_min_price
+SELECT s.origin, s.destination, s.dep_date, s.class, MIN(s.price), COUNT(DISTINCT s.flight_id)
+FROM {source}
+GROUP BY s.origin, s.destination, s.dep_date, s.class
+"""
+
+def build_route_day_min_price(conn):
+    conn.execute("DROP TABLE IF EXISTS route_day_min_price")
+    conn.execute(ROUTE_DAY_MIN_PRICE_SQL)
+    return conn.execute(ROUTE_DAY_MIN_PRICE_FILL.format(source="flight_search s")).rowcount
+
+
+# ---------------------------------------------------------------------------
+# round_trip_matrix
+# ---------------------------------------------------------------------------
+# A full outbound × return matrix is ~HORIZON_DAYS² cells per pair; the date
+# grid only ever looks a few days ahead, so rows are stored banded: cell
+# [i, k] is the cheapest round trip leaving on first_date + i and coming back
+# k = 0..MAX_TRIP_DAYS days later. totals is the row-major little-endian array;
+# NO_TRIP[dtype] marks cells without an outbound or a return flight.
+MAX_TRIP_DAYS = 30
+ANY_CLASS = "any"  # cheapest over all classes, as getDateGrid*() compute it
+NO_TRIP = {"u2": 0xFFFF, "i4": -1}
+
+ROUND_TRIP_MATRIX_SQL = """
+CREATE TABLE round_trip_matrix (
+    origin      TEXT    NOT NULL,  -- lower(outbound departure city)
+    destination TEXT    NOT NULL,  -- lower(outbound arrival city)
+    class       TEXT    NOT NULL,  -- lower(ticket class) or 'any'
+    first_date  TEXT    NOT NULL,  -- outbound date of row 0
+    days        INTEGER NOT NULL,  -- rows: outbound dates
+    span        INTEGER NOT NULL,  -- columns: return 0..span-1 days after departure
+    dtype       TEXT    NOT NULL,  -- 'u2' or 'i4'
+    totals      BLOB    NOT NULL,
+    PRIMARY KEY (origin, destination, class)
+);
+"""
+
+def _day_minimums(conn, where=""):
+    """``({(origin, destination, class): [min price or None per day]}, first date)``."""
+    source = f"SELECT origin, destination, dep_date, class, min_price FROM route_day_min_price {where}"
+    first, last = conn.execute(f"SELECT MIN(dep_date), MAX(dep_date) FROM ({source})").fetchone()
+    if first is None:
+        return {}, None
+    d0 = date.fromisoformat(first).toordinal()
+    n_days = date.fromisoformat(last).toordinal() - d0 + 1
+    ordinal = {}
+    mins = {}
+    for origin, destination, dep_date, cls, price in conn.execute(source):
+        day = ordinal.get(dep_date)
+        if day is None:
+            day = ordinal[dep_date] = date.fromisoformat(dep_date).toordinal() - d0
+        for key in ((origin, destination, cls), (origin, destination, ANY_CLASS)):
+            row = mins.get(key)
+            if row is None:
+                row = mins[key] = [None] * n_days
+            if row[day] is None or price < row[day]:
+                row[day] = price
+    return mins, date.fromordinal(d0)
+
+# out[i] + ret[i + k] for k < span; len(ret) == len(out) + span - 1
+def _numpy_band(out, ret, span):
+    out = np.array([np.inf if p is None else p for p in out])
+    ret = np.array([np.inf if p is None else p for p in ret])
+    totals = out[:, None] + np.lib.stride_tricks.sliding_window_view(ret, span)
+    finite = np.isfinite(totals)
+    dtype = "u2" if not finite.any() or totals[finite].max() < NO_TRIP["u2"] else "i4"
+    return dtype, np.where(finite, totals, NO_TRIP[dtype]).astype("<" + dtype).tobytes()
+
+def _python_band(out, ret, span):
+    totals = [o + ret[i + k] if o is not None and ret[i + k] is not None else None
+              for i, o in enumerate(out) for k in range(span)]
+    dtype = "u2" if max((t for t in totals if t is not None), default=0) < NO_TRIP["u2"] else "i4"
+    encoded = array("H" if dtype == "u2" else "i", (NO_TRIP[dtype] if t is None else t for t in totals))
+    if sys.byteorder == "big":
+        encoded.byteswap()
+    return dtype, encoded.tobytes()
+
+def round_trip_rows(conn, span=MAX_TRIP_DAYS + 1, where=""):
+    """round_trip_matrix rows for every route in route_day_min_price (`where` narrows it)."""
+    mins, first = _day_minimums(conn, where)
+    band = _numpy_band if np is not None else _python_band
+    for (origin, destination, cls), out in mins.items():
+        ret = mins.get((destination, origin, cls))
+        if ret is None:
+            continue
+        # trim to the outbound days that exist; returns may run past the last one
+        lo = next(i for i, p in enumerate(out) if p is not None)
+        hi = len(out) - next(i for i, p in enumerate(reversed(out)) if p is not None)
+        ret = ret[lo:hi + span - 1]
+        dtype, blob = band(out[lo:hi], ret + [None] * (hi - lo + span - 1 - len(ret)), span)
+        yield origin, destination, cls, (first + timedelta(days=lo)).isoformat(), hi - lo, span, dtype, blob
+
+INSERT_ROUND_TRIP = "INSERT INTO round_trip_matrix VALUES (?,?,?,?,?,?,?,?)"
+
+def build_round_trip_matrix(conn):
+    conn.execute("DROP TABLE IF EXISTS round_trip_matrix")
+    conn.execute(ROUND_TRIP_MATRIX_SQL)
+    return conn.executemany(INSERT_ROUND_TRIP, round_trip_rows(conn)).rowcount
+
+def round_trip_grid(conn, origin, destination, out_start, out_days=7, ret_days=7, cls=ANY_CLASS):
+    """``{(out_date, ret_date): total}`` for the date grid, from one round_trip_matrix row.
+
+    Returns are taken from out_start onwards, like getDateGrid(); cells without
+    a round trip (or beyond the stored trip length) are left out.
+    """
+    row = conn.execute(query_shapes.ROUND_TRIP_ROW, (origin, destination, cls)).fetchone()
+    if row is None:
+        return {}
+    first_date, days, span, dtype, blob = row
+    totals = array("H" if dtype == "u2" else "i", blob)
+    if sys.byteorder == "big":
+        totals.byteswap()
+
+    start = date.fromisoformat(str(out_start))
+    offset = (start - date.fromisoformat(first_date)).days
+    grid = {}
+    for i in range(max(offset, 0), min(offset + out_days, days)):
+        for j in range(ret_days):
+            k = j - (i - offset)  # return out_start + j, i.e. k days after this departure
+            if 0 <= k < span and totals[i * span + k] != NO_TRIP[dtype]:
+                out_date = start + timedelta(days=i - offset)
+                grid[out_date.isoformat(), (out_date + timedelta(days=k)).isoformat()] = totals[i * span + k]
+    return grid
+
+
+# ---------------------------------------------------------------------------
+# destination_popularity
+# ---------------------------------------------------------------------------
+# score is a time-decayed heart count: every heart weighs 2^((added - EPOCH) /
+# half-life), so relative order is final without rescaling old rows and a
+# removed heart subtracts exactly the weight it added. Divide by
+# 2^((now - EPOCH) / half-life) for "hearts, decayed to now". hearts has no
+# timestamp, so hearts_added records when each one arrived (the build time
+# for hearts that predate the table). The triggers also run in the app's
+# better-sqlite3, which may be built without SQLite's math functions, so the
+# weight avoids pow(): the age is counted in 1/DECAY_STEPS of a half-life, k,
+# and 2^(k / DECAY_STEPS) is the product of 2^(2^b / DECAY_STEPS) over the set
+# bits b of k. 16 bits reach 2^1024, as far as a REAL goes (~84 years).
+DECAY_EPOCH = 1735689600  # 2025-01-01T00:00:00Z
+DECAY_HALF_LIFE_DAYS = 30
+DECAY_STEPS = 64  # ≈ 11 hours at a 30-day half-life
+_DECAY_BITS = 16
+_DECAY_FACTORS = " * ".join(f"(CASE WHEN k & {1 << b} THEN {2 ** ((1 << b) / DECAY_STEPS)!r} ELSE 1.0 END)"
+                           for b in range(_DECAY_BITS))
+_WEIGHT = (f"(SELECT {_DECAY_FACTORS} FROM (SELECT MIN(MAX(CAST({{added}} AS INTEGER) - {DECAY_EPOCH}, 0) * "
+           f"{DECAY_STEPS} / {DECAY_HALF_LIFE_DAYS * 86400}, {(1 << _DECAY_BITS) - 1}) AS k))")
+
+DESTINATION_POPULARITY_SQL = """
+CREATE TABLE destination_popularity (
+    city   TEXT    PRIMARY KEY,  -- airport.city of the hearted flights' arrival
+    hearts INTEGER NOT NULL,
+    score  REAL    NOT NULL
+);
+CREATE INDEX dp_hearts ON destination_popularity (hearts DESC, city);
+CREATE INDEX dp_score ON destination_popularity (score DESC, city);
+
+CREATE TABLE hearts_added (
+    ticket_code TEXT    NOT NULL,
+    flight_id   TEXT    NOT NULL,
+    airline_id  TEXT    NOT NULL,
+    user_id     TEXT    NOT NULL,
+    added_at    INTEGER NOT NULL,  -- unix seconds
+    PRIMARY KEY (ticket_code, flight_id, airline_id, user_id)
+) WITHOUT ROWID;
+"""
+
+# Kept on hearts, or on hearts_base when hearts is a --surrogate-keys view
+# (schema.SURROGATE_SQL; views cannot have AFTER triggers). {new}/{old} are
+# the affected heart as a one-row (ticket_code, flight_id, airline_id, user_id).
+HEARTS_TRIGGERS_SQL = f"""
+CREATE TRIGGER hearts_popularity_insert AFTER INSERT ON {{on}} BEGIN
+    INSERT OR REPLACE INTO hearts_added
+    SELECT ticket_code, flight_id, airline_id, user_id, CAST(strftime('%s', 'now') AS INTEGER) FROM {{new}};
+    INSERT INTO destination_popularity (city, hearts, score)
+    SELECT a.city, 1, {_WEIGHT.format(added="strftime('%s', 'now')")}
+    FROM {{new}} h JOIN flight f ON f.id = h.flight_id JOIN airport a ON a.id = f.airport_arrive_id
+    WHERE true
+    ON CONFLICT (city) DO UPDATE SET hearts = hearts + 1, score = score + excluded.score;
+END;
+
+CREATE TRIGGER hearts_popularity_delete AFTER DELETE ON {{on}} BEGIN
+    UPDATE destination_popularity
+    SET hearts = hearts - 1,
+        score = MAX(score - COALESCE((
+            SELECT {_WEIGHT.format(added="ha.added_at")} FROM hearts_added ha
+            JOIN {{old}} h USING (ticket_code, flight_id, airline_id, user_id)), 0), 0)
+    WHERE city = (SELECT a.city FROM {{old}} h JOIN flight f ON f.id = h.flight_id
+                  JOIN airport a ON a.id = f.airport_arrive_id);
+    DELETE FROM hearts_added
+    WHERE (ticket_code, flight_id, airline_id, user_id) IN (SELECT * FROM {{old}});
+    DELETE FROM destination_popularity WHERE hearts <= 0;
+END;
+"""
+_HEART_ROW = {
+    "hearts": "(SELECT {row}.ticket_code AS ticket_code, {row}.flight_id AS flight_id, "
+              "{row}.airline_id AS airline_id, {row}.user_id AS user_id)",
+    "hearts_base": "(SELECT t.code AS ticket_code, f.id AS flight_id, al.id AS airline_id, {row}.user_id AS user_id "
+                   "FROM ticket_base t JOIN flight_base f ON f.sk = t.flight_sk "
+                   "JOIN airline_base al ON al.sk = f.airline_sk WHERE t.sk = {row}.ticket_sk)",
+}
+
+def hearts_triggers(conn):
+    """HEARTS_TRIGGERS_SQL for the layout of `conn`."""
+    surrogate = conn.execute("SELECT 1 FROM sqlite_schema WHERE type = 'view' AND name = 'hearts'").fetchone()
+    on = "hearts_base" if surrogate else "hearts"
+    return HEARTS_TRIGGERS_SQL.format(on=on, new=_HEART_ROW[on].format(row="NEW"), old=_HEART_ROW[on].format(row="OLD"))
+
+# hearts carries flight_id, so the arrival city is two lookups away; ticket is not needed
+DESTINATION_POPULARITY_FILL = f"""
+INSERT INTO destination_popularity
+SELECT a.city, COUNT(*), SUM({_WEIGHT.format(added="ha.added_at")})
+FROM hearts h
+JOIN hearts_added ha USING (ticket_code, flight_id, airline_id, user_id)
+JOIN flight f  ON f.id = h.flight_id
+JOIN airport a ON a.id = f.airport_arrive_id
+GROUP BY a.city
+"""
+
+def drop_triggers(conn):
+    """Stop per-row maintenance during a bulk load; build() recreates it."""
+    conn.execute("DROP TRIGGER IF EXISTS hearts_popularity_insert")
+    conn.execute("DROP TRIGGER IF EXISTS hearts_popularity_delete")
+
+def build_destination_popularity(conn, added_at=None):
+    """`added_at` (unix seconds) stamps hearts without a hearts_added row; default now."""
+    drop_triggers(conn)
+    # keep the arrival times of hearts that are still there
+    has_log = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'hearts_added'").fetchone()
+    old = conn.execute("SELECT * FROM hearts_added").fetchall() if has_log else []
+    conn.execute("DROP TABLE IF EXISTS hearts_added")
+    conn.execute("DROP TABLE IF EXISTS destination_popularity")
+    for statement in _statements(DESTINATION_POPULARITY_SQL + hearts_triggers(conn)):
+        conn.execute(statement)
+    conn.executemany("INSERT INTO hearts_added VALUES (?,?,?,?,?)", old)
+    conn.execute("INSERT OR IGNORE INTO hearts_added "
+                 "SELECT ticket_code, flight_id, airline_id, user_id, COALESCE(?, CAST(strftime('%s', 'now') AS INTEGER)) "
+                 "FROM hearts", (added_at,))
+    conn.execute("DELETE FROM hearts_added WHERE (ticket_code, flight_id, airline_id, user_id) NOT IN "
+                 "(SELECT ticket_code, flight_id, airline_id, user_id FROM hearts)")
+    return conn.execute(DESTINATION_POPULARITY_FILL).rowcount
+
+def _statements(script):
+    """Split a DDL script into statements (trigger bodies included) for conn.execute()."""
+    statement = ""
+    for line in script.strip().splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            yield statement.strip()
+            statement = ""
+
+
+# name → builder(conn) -> rows, in build order
+TABLES = {
+    "flight_search": build_flight_search,
+    "route_day_min_price": build_route_day_min_price,
+    "round_trip_matrix": build_round_trip_matrix,
+    "destination_popularity": build_destination_popularity,
+}
+
+def build(conn, names=None, added_at=None):
+    """Rebuild the derived tables (all, or `names`) inside the caller's transaction.
+
+    `added_at` pins the arrival time of hearts seen for the first time, for
+    builds that must not depend on the clock. Returns ``[(name, seconds, rows), …]``.
+    """
+    timings = []
+    for name, builder in TABLES.items():
+        if names and name not in names:
+            continue
+        t0 = perf_counter()
+        rows = builder(conn, added_at) if builder is build_destination_popularity else builder(conn)
+        timings.append((name, perf_counter() - t0, rows))
+    return timings
+
+def refresh(conn, flight_ids):
+    """Re-derive the rows of `flight_ids` after they were inserted, repriced or deleted.
+
+    Only the (route, day, class) keys those flights had before or have now are
+    recomputed, so a flight that moved or disappeared also fixes the day it
+    left; round_trip_matrix is rebuilt for the city pairs involved. Returns the
+    number of route_day_min_price keys recomputed.
+    """
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS changed_flight (id TEXT PRIMARY KEY)")
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS changed_route_day (origin TEXT, destination TEXT, class TEXT, "
+                 "dep_date TEXT, PRIMARY KEY (origin, destination, class, dep_date))")
+    conn.execute("DELETE FROM changed_flight")
+    conn.execute("DELETE FROM changed_route_day")
+    conn.executemany("INSERT OR IGNORE INTO changed_flight VALUES (?)", ((fid,) for fid in flight_ids))
+
+    changed_keys = """
+        INSERT OR IGNORE INTO changed_route_day
+        SELECT origin, destination, class, dep_date
+        FROM flight_search WHERE flight_id IN (SELECT id FROM changed_flight)
+    """
+    conn.execute(changed_keys)  # before …
+    conn.execute("DELETE FROM flight_search WHERE flight_id IN (SELECT id FROM changed_flight)")
+    conn.execute(FLIGHT_SEARCH_FILL.format(where="WHERE t.flight_id IN (SELECT id FROM changed_flight)"))
+    conn.execute(changed_keys)  # … and after
+
+    conn.execute("DELETE FROM route_day_min_price WHERE (origin, destination, class, dep_date) IN "
+                 "(SELECT origin, destination, class, dep_date FROM changed_route_day)")
+    conn.execute(ROUTE_DAY_MIN_PRICE_FILL.format(
+        source="changed_route_day c CROSS JOIN flight_search s ON s.origin = c.origin "
+               "AND s.destination = c.destination AND s.class = c.class AND s.dep_date = c.dep_date"))
+
+    # a pair's matrix rows need both directions of it
+    pairs = """(SELECT origin, destination FROM changed_route_day
+                UNION SELECT destination, origin FROM changed_route_day)"""
+    conn.execute(f"DELETE FROM round_trip_matrix WHERE (origin, destination) IN {pairs}")
+    conn.executemany(INSERT_ROUND_TRIP, round_trip_rows(conn, where=f"WHERE (origin, destination) IN {pairs}"))
+    return conn.execute("SELECT COUNT(*) FROM changed_route_day").fetchone()[0]
+
+def show_plans(conn):
+    values = query_shapes.sample_values(conn)
+    for name in query_shapes.DERIVED_SHAPES:
+        sql, params = query_shapes.bind(name, values)
+        print(f"  {name}")
+        for line in query_shapes.explain(conn, sql, params):
+            print(f"      {line}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Rebuild the read-optimized derived tables.")
+    ap.add_argument("--db", type=Path, default=DB_PATH, help="database file (default: data/flights.db)")
+    ap.add_argument("--only", nargs="+", choices=list(TABLES), help="rebuild just these tables")
+    args = ap.parse_args()
+
+    if not args.db.exists():
+        ap.error(f"{args.db} does not exist")
+    conn = sqlite3.connect(args.db)
+    conn.execute("BEGIN")
+    for name, secs, rows in build(conn, args.only):
+        print(f"• {name:<24} {rows:>10,} rows  {secs:6.2f}s", file=sys.stderr)
+    conn.execute("ANALYZE")
+    conn.commit()
+    show_plans(conn)
+    conn.close()
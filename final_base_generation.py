@@ -1,26 +1,119 @@
-import subprocess
+#!/usr/bin/env python3
+"""Build data/flights.db: the synthetic seed plus the fixed-city schedule, in one process.
+
+    python final_base_generation.py [--scale 1.0] [--stream] [--stages seed inject] [--run-report run.json]
+    python final_base_generation.py --cache [--start-date 2026-01-05]
+    python final_base_generation.py --advance
+
+Both stages are library calls on one connection: the schema is created once
+from schema.py, the selected stages insert inside a single transaction, and
+the derived tables, index pack and FK validation run once over the result
+before the only commit.
+
+With --cache the start date is pinned (to --start-date, or midnight two days
+from today) and finished builds are kept in data/cache/ by build_cache.py, so
+the same options restore a byte-identical file instead of regenerating it.
+"""
+from datetime import date, datetime, time, timedelta
 from pathlib import Path
+from time import perf_counter
+import argparse, sys
+
+import database_generator_FIXED as generator
+import random_base_optimized as random_base
+import build_cache
+import instrumentation
+from instrumentation import phase
 
 THIS_DIR = Path(__file__).resolve().parent
-print("📂 Current directory:", THIS_DIR)
+DB_PATH = THIS_DIR / "data" / "flights.db"
+STAGES = ("seed", "inject")  # in run order
 
-data_dir = THIS_DIR / "data"
-data_dir.mkdir(parents=True, exist_ok=True)
 
-db_file = data_dir / "flights.db"
+def run(stages=STAGES, scale=1.0, stream=False, engine="python", workers=1, fast_load=False, report_path=None,
+        in_memory=False, pipeline=False, surrogate_keys=False):
+    """Run `stages` against generator.DB_PATH in one transaction and commit once."""
+    conn = generator.open_for_load(fast_load, in_memory, surrogate_keys)
+    cur = conn.cursor()
+    t0 = perf_counter()
+    cur.execute("BEGIN")
+    if "seed" in stages:
+        print("🚀 Seeding synthetic data …", file=sys.stderr)
+        with phase("seed"):
+            if stream or pipeline:
+                generator.load_stream(conn, scale, engine=engine, workers=workers, pipeline=pipeline)
+            else:
+                generator.load(conn, scale, engine=engine, workers=workers)
+    if "inject" in stages:
+        print("📦 Injecting the fixed-city schedule …", file=sys.stderr)
+        with phase("inject"):
+            random_base.insert_data(cur)
+    generator.finish_load(conn, fast_load, report_path, in_memory)
+    conn.close()
+    print(f"✔ {' + '.join(stages)} in {perf_counter() - t0:.2f}s → {generator.DB_PATH}", file=sys.stderr)
 
-if db_file.exists():
-    print('🗑  Removing old flights.db …')
-    db_file.unlink()
-db_generator = THIS_DIR / "database_generator_FIXED.py"
-random_base = THIS_DIR / "random_base_optimized.py"
 
-# Step 1: Run Database Generator (create schema + seed)
-print("🚀 Running database generator...")
-subprocess.run(["python", str(db_generator), "--scale", "1.0"], check=True)
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Regenerate data/flights.db from scratch.")
+    ap.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES),
+                    help="stages to run (default: all); without seed the existing database is kept")
+    ap.add_argument("--scale", type=float, default=1.0, help="× multiplier for the seed's dataset sizes")
+    ap.add_argument("--stream", action="store_true", help="seed in fixed-size chunks (flat memory)")
+    ap.add_argument("--pipeline", action="store_true", help="stream with inserts on a writer thread")
+    ap.add_argument("--engine", choices=generator.ENGINES, default="python", help="seed generation engine")
+    ap.add_argument("--workers", type=int, default=1, help="seed the route loop on N processes")
+    ap.add_argument("--seed", type=int, default=generator.SEED, help="master random seed")
+    ap.add_argument("--fast-load", action="store_true", help="bulk-load pragmas, indexes and FK check at the end")
+    ap.add_argument("--in-memory", action="store_true", help="build in RAM, then flush to --db with the backup API")
+    ap.add_argument("--surrogate-keys", action="store_true",
+                    help="integer keys for airports, airlines, flights and tickets behind views with the usual columns")
+    ap.add_argument("--keep", action="store_true", help="add to the existing database instead of replacing it")
+    ap.add_argument("--start-date", type=datetime.fromisoformat,
+                    help="first departure day (YYYY-MM-DD) instead of two days from now; makes the build reproducible")
+    ap.add_argument("--cache", action="store_true",
+                    help="restore an identical earlier build from data/cache/ (or build and store it)")
+    ap.add_argument("--restore", choices=("copy", "backup"), default="copy",
+                    help="with --cache: restore a hit by file copy or the SQLite backup API")
+    ap.add_argument("--db", type=Path, default=DB_PATH, help="database file (default: data/flights.db)")
+    ap.add_argument("--advance", action="store_true",
+                    help="keep the existing database and only roll its flight window forward")
+    ap.add_argument("--validation-report", type=Path, help="write the FK validation report (JSON) here")
+    ap.add_argument("--run-report", type=Path, help="write per-phase timings (JSON) here")
+    args = ap.parse_args()
+    if args.engine == "numpy" and generator.np is None:
+        ap.error("--engine numpy requires numpy (pip install numpy)")
 
-# Step 2: Run Random Base Optimized to refine the data
-print("📦 Running random base data injector...")
-subprocess.run(["python", str(random_base)], check=True)
+    stages = [stage for stage in STAGES if stage in args.stages]
+    cached = args.cache and "seed" in stages and not args.keep and not args.advance
+    start_date = args.start_date
+    if cached and start_date is None:
+        start_date = datetime.combine(date.today() + timedelta(days=2), time())
+    generator.configure(args.seed, args.db, start_date)
+    print("📂 Database:", args.db)
 
-print("✔️ Database fully created and populated.")
+    if args.advance:
+        if not args.db.exists():
+            ap.error(f"--advance needs an existing database ({args.db} not found)")
+        generator.advance()
+    else:
+        if "seed" in stages and not args.keep and args.db.exists():
+            print('🗑  Removing old flights.db …')
+            args.db.unlink()
+        options = dict(stages=stages, scale=max(args.scale, 0.01), stream=args.stream, engine=args.engine,
+                       workers=max(args.workers, 1), fast_load=args.fast_load, pipeline=args.pipeline,
+                       surrogate_keys=args.surrogate_keys)
+        if cached:
+            key, descriptor = build_cache.cache_key(seed=args.seed, start_date=start_date.isoformat(), **options)
+        if cached and build_cache.lookup(key):
+            secs = build_cache.restore(key, args.db, args.restore)
+            print(f"⚡ Restored cached build {key} ({args.restore}) in {secs:.2f}s")
+        else:
+            t0 = perf_counter()
+            run(**options, report_path=args.validation_report, in_memory=args.in_memory)
+            if cached:
+                build_cache.store(args.db, key, descriptor, round(perf_counter() - t0, 2))
+                print(f"• Stored build {key} in {build_cache.CACHE_DIR}", file=sys.stderr)
+            print("✔️ Database fully created and populated.")
+    if args.run_report:
+        instrumentation.write(args.run_report)
+        print(f"• Run report written to {args.run_report}", file=sys.stderr)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Covering indexes for the query shapes in query_shapes.py, plus planner statistics.
+
+Every route query in model/model-betterSqlite3.mjs filters airports by
+LOWER(city), flights by (depart, arrive) airport and tickets by flight_id, and
+favourites by hearts.user_id. Without these indexes each of them scans ticket.
+
+    python index_pack.py [--db data/flights.db]
+
+applies the pack to an existing database and prints before/after plans.
+"""
+from pathlib import Path
+from time import perf_counter
+import argparse, re, sqlite3, sys
+
+import query_shapes
+
+THIS_DIR = Path(__file__).resolve().parent
+DB_PATH = THIS_DIR / "data" / "flights.db"
+
+INDEXES = [
+    # LOWER(a.city) = LOWER(?) in every route query → expression index, id for the flight join
+    ("idx_airport_city", "CREATE INDEX IF NOT EXISTS idx_airport_city ON airport (lower(city), id)"),
+    # route lookup; time_departure + id make calendar/date-grid scans index-only
+    ("idx_flight_route", "CREATE INDEX IF NOT EXISTS idx_flight_route "
+                         "ON flight (airport_depart_id, airport_arrive_id, time_departure, id)"),
+    # --advance expires departed flights by time
+    ("idx_flight_departure", "CREATE INDEX IF NOT EXISTS idx_flight_departure ON flight (time_departure)"),
+    # ticket ⋈ flight with MIN(price) / class filter answered from the index
+    ("idx_ticket_flight", "CREATE INDEX IF NOT EXISTS idx_ticket_flight ON ticket (flight_id, class, price)"),
+    # getFavorites / searchTickets favourites list
+    ("idx_hearts_user", "CREATE INDEX IF NOT EXISTS idx_hearts_user ON hearts (user_id, ticket_code)"),
+]
+# The same pack for the --surrogate-keys layout (schema.SURROGATE_SQL), where
+# the app's tables are views and the indexes go on the *_base tables.
+SURROGATE_INDEXES = [
+    # the view joins airport by code, so a city lookup yields the code first
+    ("idx_airport_city", "CREATE INDEX IF NOT EXISTS idx_airport_city ON airport_base (lower(city), id, sk)"),
+    ("idx_flight_route", "CREATE INDEX IF NOT EXISTS idx_flight_route "
+                         "ON flight_base (depart_sk, arrive_sk, time_departure, id)"),
+    ("idx_flight_departure", "CREATE INDEX IF NOT EXISTS idx_flight_departure ON flight_base (time_departure)"),
+    ("idx_ticket_flight", "CREATE INDEX IF NOT EXISTS idx_ticket_flight ON ticket_base (flight_sk, class, price)"),
+    ("idx_hearts_user", "CREATE INDEX IF NOT EXISTS idx_hearts_user ON hearts_base (user_id, ticket_sk)"),
+]
+
+_STEP = re.compile(r"^(SCAN|SEARCH) (\S+)(?: USING (?:COVERING )?(?:INDEX|PRIMARY KEY) ?(\S*))?")
+
+def plan_summary(lines):
+    """One-line plan: `scan t` for full scans, `t→index` for searches, `temp(GROUP BY)` for sorters."""
+    steps = []
+    for line in lines:
+        line = line.strip()
+        m = _STEP.match(line)
+        if m:
+            kind, table, index = m.groups()
+            steps.append(f"scan {table}" if kind == "SCAN" and not index else f"{table}→{index or 'rowid'}")
+        elif line.startswith("USE TEMP B-TREE FOR "):
+            steps.append(f"temp({line[len('USE TEMP B-TREE FOR '):]})")
+    return ", ".join(steps)
+
+def query_plans(conn):
+    values = query_shapes.sample_values(conn)
+    return {name: plan_summary(query_shapes.explain(conn, *query_shapes.bind(name, values)))
+            for name in query_shapes.SHAPES}
+
+def pack(conn):
+    """INDEXES, or SURROGATE_INDEXES when flight is a view over flight_base."""
+    surrogate = conn.execute("SELECT 1 FROM sqlite_schema WHERE type = 'view' AND name = 'flight'").fetchone()
+    return SURROGATE_INDEXES if surrogate else INDEXES
+
+def drop(conn):
+    for name, _ in pack(conn):
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+
+def apply(conn, show_plans=True):
+    """Create the pack, run ANALYZE + PRAGMA optimize and print before/after plans."""
+    before = query_plans(conn) if show_plans else None
+    t0 = perf_counter()
+    for _, sql in pack(conn):
+        conn.execute(sql)
+    conn.execute("ANALYZE")
+    conn.execute("PRAGMA optimize")
+    elapsed = perf_counter() - t0
+
+    if show_plans:
+        after = query_plans(conn)
+        print(f"• Index pack + ANALYZE in {elapsed:.2f}s. Query plans (before → after):", file=sys.stderr)
+        for name in after:
+            print(f"  {name}\n      {before[name]}", file=sys.stderr)
+            if after[name] != before[name]:
+                print(f"    → {after[name]}", file=sys.stderr)
+    return elapsed
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Create the covering index pack and refresh planner statistics.")
+    ap.add_argument("--db", type=Path, default=DB_PATH, help="database file (default: data/flights.db)")
+    args = ap.parse_args()
+
+    if not args.db.exists():
+        ap.error(f"{args.db} does not exist")
+    conn = sqlite3.connect(args.db)
+    apply(conn)
+    conn.commit()
+    conn.close()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""Per-phase timing for the data generators.
+
+A phase is a named block (``with phase("users"):``) or the time spent inside
+an iterator (``iterate("users", iter_users(n))``, for generation that is
+interleaved with inserts). Each one records wall time, rows, rows/second and,
+with trace_memory, the peak tracemalloc'd memory while it ran. Phases nest
+(``build/users``) and repeated calls of the same phase accumulate, so a
+chunked insert loop shows up as one line.
+
+Any phase can also be run under cProfile; its stats are dumped as
+``<profile_dir>/<phase>.prof`` (``python -m pstats`` or snakeviz to read).
+The recorder is a module-level singleton, like the generators' RND.
+"""
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+import atexit, cProfile, json, sys, tracemalloc
+
+THIS_DIR = Path(__file__).resolve().parent
+PROFILE_DIR = THIS_DIR / "data" / "profiles"
+
+
+class PhaseStats:
+    __slots__ = ("name", "calls", "wall_s", "rows", "peak_bytes")
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.wall_s = 0.0
+        self.rows = 0
+        self.peak_bytes = None
+
+    def as_dict(self):
+        return {
+            "phase": self.name,
+            "calls": self.calls,
+            "wall_s": round(self.wall_s, 4),
+            "rows": self.rows,
+            "rows_per_s": round(self.rows / self.wall_s) if self.rows and self.wall_s else None,
+            "peak_traced_bytes": self.peak_bytes,
+        }
+
+
+class Recorder:
+    def __init__(self):
+        self.phases = {}
+        self.trace_memory = False
+        self.profile = set()
+        self.profile_dir = PROFILE_DIR
+        self._stack = []      # [stats, peak seen by children]
+        self._profilers = {}
+        self._profiling = False
+        self._t0 = perf_counter()
+        self._started = datetime.now()
+
+    def configure(self, *, trace_memory=False, profile=(), profile_dir=PROFILE_DIR):
+        """trace_memory turns on tracemalloc (slows Python code ~2×); profile names phases to cProfile."""
+        self.trace_memory = trace_memory
+        self.profile = set(profile)
+        self.profile_dir = Path(profile_dir)
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if profile:
+            atexit.register(self.dump_profiles)
+
+    def stats(self, name):
+        path = "/".join([frame[0].name for frame in self._stack] + [name])
+        stats = self.phases.get(path)
+        if stats is None:
+            stats = self.phases[path] = PhaseStats(path)
+        return stats
+
+    def _enter(self, stats):
+        if self.trace_memory:
+            if self._stack:
+                self._stack[-1][1] = max(self._stack[-1][1], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        self._stack.append([stats, 0])
+
+        profiler = None
+        if not self._profiling and (stats.name in self.profile or stats.name.rsplit("/", 1)[-1] in self.profile):
+            profiler = self._profilers.setdefault(stats.name, cProfile.Profile())
+            self._profiling = True
+            profiler.enable()
+        return perf_counter(), profiler
+
+    def _exit(self, stats, t0, profiler):
+        stats.wall_s += perf_counter() - t0
+        stats.calls += 1
+        if profiler:
+            profiler.disable()
+            self._profiling = False
+
+        _, children_peak = self._stack.pop()
+        if self.trace_memory:
+            peak = max(children_peak, tracemalloc.get_traced_memory()[1])
+            stats.peak_bytes = max(stats.peak_bytes or 0, peak)
+            if self._stack:
+                self._stack[-1][1] = max(self._stack[-1][1], peak)
+
+    @contextmanager
+    def phase(self, name, rows=0):
+        """Time the block; add produced rows with ``p.rows += n`` on the yielded stats."""
+        stats = self.stats(name)
+        stats.rows += rows
+        t0, profiler = self._enter(stats)
+        try:
+            yield stats
+        finally:
+            self._exit(stats, t0, profiler)
+
+    def iterate(self, name, iterable):
+        """Yield from `iterable`, charging the time spent producing each item (one row) to `name`."""
+        stats = self.stats(name)
+        it = iter(iterable)
+        while True:
+            t0, profiler = self._enter(stats)
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+            finally:
+                self._exit(stats, t0, profiler)
+                stats.calls -= 1  # count rows, not next() calls
+            stats.rows += 1
+            yield item
+
+    def add(self, name, secs, rows=0):
+        """Record a phase timed elsewhere (another process, a helper that returns its own timing)."""
+        stats = self.stats(name)
+        stats.calls += 1
+        stats.wall_s += secs
+        stats.rows += rows
+
+    def profile_path(self, name):
+        return self.profile_dir / f"{name.replace('/', '-')}.prof"
+
+    def dump_profiles(self):
+        for name, profiler in self._profilers.items():
+            self.profile_dir.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(self.profile_path(name))
+
+    def report(self):
+        self.dump_profiles()
+        return {
+            "started_at": self._started.isoformat(timespec="seconds"),
+            "argv": sys.argv,
+            "python": sys.version.split()[0],
+            "elapsed_s": round(perf_counter() - self._t0, 3),
+            "trace_memory": self.trace_memory,
+            "profiles": {name: str(self.profile_path(name)) for name in self._profilers},
+            "phases": [stats.as_dict() for stats in self.phases.values()],
+        }
+
+    def summary(self, file=sys.stderr):
+        for stats in self.phases.values():
+            d = stats.as_dict()
+            depth = stats.name.count("/")
+            label = "  " * depth + stats.name.rsplit("/", 1)[-1]
+            rate = f"{d['rows_per_s']:>11,}/s" if d["rows_per_s"] else " " * 13
+            peak = f"{stats.peak_bytes / 2**20:8.1f} MiB" if stats.peak_bytes is not None else ""
+            print(f"    {label:<32} {stats.rows:>12,} rows {stats.wall_s:>8.2f}s {rate} {peak}", file=file)
+
+    def write(self, path):
+        report = self.report()
+        Path(path).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        return report
+
+
+RECORDER = Recorder()
+configure = RECORDER.configure
+phase = RECORDER.phase
+iterate = RECORDER.iterate
+add = RECORDER.add
+summary = RECORDER.summary
+write = RECORDER.write
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""One- and two-stop itineraries between cities, precomputed into `itinerary`.
+
+searchTickets() only matches a single flight row, and connections in SQL
+would be a self-join per request. Here the schedule is loaded once into
+parallel arrays sorted by departure (Schedule) and walked in one Connection
+Scan pass (scan): every flight starts a one-leg journey, and a flight leaving
+an airport extends the journeys that reached it, within the connection rules:
+
+    MCT_MINUTES           minimum connection time, online (same airline) or interline
+    MAX_LAYOVER_MINUTES   longest wait at a connecting airport
+    MAX_JOURNEY_MINUTES   first departure to last arrival
+
+Transfers stay at the arrival airport, and a journey never enters a city
+twice. For every flight and group of journeys reaching it with the same
+origin, day and cities so far, only the (fare, first departure) Pareto front
+is extended. That front always holds the cheapest and the fastest
+continuation, so both are exact. Fares are each leg's cheapest ticket with
+seats left, in any class.
+
+    python itineraries.py [--db data/flights.db] [--mct-online 45] [--max-layover 720]
+
+builds the table in an existing database. Rebuild it after every load or
+--advance. benchmark_itineraries.py measures itineraries/s.
+"""
+from array import array
+from collections import deque
+from datetime import date
+from heapq import heappop, heappush
+from itertools import count
+from pathlib import Path
+from time import perf_counter
+import argparse, gc, sqlite3, sys
+
+THIS_DIR = Path(__file__).resolve().parent
+DB_PATH = THIS_DIR / "data" / "flights.db"
+
+MCT_MINUTES = {True: 45, False: 90}  # keyed by "same airline as the inbound leg"
+MAX_LAYOVER_MINUTES = 12 * 60
+MAX_JOURNEY_MINUTES = 36 * 60
+MAX_STOPS = 2
+KINDS = ("cheapest", "fastest")
+
+ITINERARY_SQL = """
+CREATE TABLE itinerary (
+    origin           TEXT    NOT NULL,  -- lower(departure city)
+    destination      TEXT    NOT NULL,  -- lower(arrival city)
+    dep_date         TEXT    NOT NULL,  -- DATE() of the first departure
+    stops            INTEGER NOT NULL,  -- 1 or 2
+    kind             TEXT    NOT NULL,  -- 'cheapest' or 'fastest'
+    price            INTEGER NOT NULL,  -- sum of the legs' fares
+    duration_minutes INTEGER NOT NULL,  -- first departure to last arrival
+    time_departure   TEXT    NOT NULL,
+    time_arrival     TEXT    NOT NULL,
+    via              TEXT    NOT NULL,  -- connecting airports, space-separated
+    flight_ids       TEXT    NOT NULL,  -- one per leg, space-separated
+    ticket_codes     TEXT    NOT NULL,  -- the fare taken on each leg
+    PRIMARY KEY (origin, destination, dep_date, stops, kind)
+) WITHOUT ROWID;
+CREATE INDEX itinerary_price ON itinerary (origin, destination, kind, price, dep_date);
+"""
+
+# each flight with its cheapest ticket that still has seats (bare column of MIN())
+SCHEDULE_QUERY = """
+SELECT f.id, f.airline_id, f.airport_depart_id, f.airport_arrive_id, lower(a1.city), lower(a2.city),
+       f.time_departure, f.time_arrival,
+       CAST(strftime('%s', f.time_departure) AS INTEGER) / 60,
+       CAST(strftime('%s', f.time_arrival) AS INTEGER) / 60,
+       t.code, t.price
+FROM flight f
+JOIN airport a1 ON a1.id = f.airport_depart_id
+JOIN airport a2 ON a2.id = f.airport_arrive_id
+JOIN (SELECT flight_id, code, MIN(price) AS price FROM ticket WHERE availability > 0 GROUP BY flight_id) t
+     ON t.flight_id = f.id
+ORDER BY 9, f.id
+"""
+
+
+class Schedule:
+    """Flights as parallel arrays sorted by departure; times in minutes since the epoch."""
+
+    def __init__(self, conn):
+        self.airports, self.cities, self.airlines = [], [], []
+        airport_ix, city_ix, airline_ix = {}, {}, {}
+        self.airport_city = array("H")  # airport index → city index
+        self.dep, self.arr = array("q"), array("q")
+        self.src, self.dst, self.airline, self.price = array("I"), array("I"), array("I"), array("I")
+        self.flight_ids, self.ticket_codes, self.dep_text, self.arr_text = [], [], [], []
+
+        def airport(code, city):
+            ix = airport_ix.get(code)
+            if ix is None:
+                ix = airport_ix[code] = len(self.airports)
+                self.airports.append(code)
+                if city not in city_ix:
+                    city_ix[city] = len(self.cities)
+                    self.cities.append(city)
+                self.airport_city.append(city_ix[city])
+            return ix
+
+        for (fid, al, src, dst, src_city, dst_city, dep_text, arr_text, dep, arr, code,
+             price) in conn.execute(SCHEDULE_QUERY):
+            if al not in airline_ix:
+                airline_ix[al] = len(self.airlines)
+                self.airlines.append(al)
+            self.src.append(airport(src, src_city))
+            self.dst.append(airport(dst, dst_city))
+            self.airline.append(airline_ix[al])
+            self.dep.append(dep)
+            self.arr.append(arr)
+            self.price.append(price)
+            self.flight_ids.append(fid)
+            self.ticket_codes.append(code)
+            self.dep_text.append(dep_text)
+            self.arr_text.append(arr_text)
+        if len(self.cities) > 63:
+            raise ValueError(f"{len(self.cities)} cities; the visited-city bitmask holds 63")
+
+    def __len__(self):
+        return len(self.dep)
+
+
+def _pareto(labels):
+    """Labels not beaten on both fare (lower) and first departure (later)."""
+    labels.sort(key=lambda label: (label[2], -label[1]))
+    front, latest = [], None
+    for label in labels:
+        if latest is None or label[1] > latest:
+            front.append(label)
+            latest = label[1]
+    return front
+
+def scan(s, mct=MCT_MINUTES, max_layover=MAX_LAYOVER_MINUTES, max_journey=MAX_JOURNEY_MINUTES,
+         max_stops=MAX_STOPS):
+    """Best itineraries: ``{(origin city, destination city, day, stops): [cheapest, fastest]}``.
+
+    An itinerary is ``(price, duration, legs)``; legs are flight indexes into
+    `s`, and day counts days since the epoch. A journey label is ``(arrival,
+    first departure, fare, airline, legs, visited-city mask, origin city)``.
+    """
+    dep, arr, src, dst, airline, price, city = s.dep, s.arr, s.src, s.dst, s.airline, s.price, s.airport_city
+    earliest = min(mct.values())
+    seq = count()
+    pending = [[] for _ in s.airports]  # per airport: (ready at, seq, label), released in arrival order …
+    ready = [deque() for _ in s.airports]  # … so each airport's queue also expires from the left
+    best = {}
+
+    for c in range(len(s)):
+        t, x, y = dep[c], src[c], dst[c]
+        here, arriving = ready[x], pending[x]
+        while arriving and arriving[0][0] <= t:
+            here.append(heappop(arriving)[2])
+        while here and t - here[0][0] > max_layover:
+            here.popleft()
+
+        y_city, a = city[y], arr[c]
+        y_bit = 1 << y_city
+        groups = {}
+        for label in here:
+            arrival, first, _, inbound, _, mask, origin = label
+            if mask & y_bit or t < arrival + mct[inbound == airline[c]] or a - first > max_journey:
+                continue
+            groups.setdefault((origin, first // 1440, mask), []).append(label)
+
+        for (origin, day, mask), labels in groups.items():
+            for _, first, fare, _, legs, _, _ in _pareto(labels) if len(labels) > 1 else labels:
+                fare += price[c]
+                legs += (c,)
+                key = (origin, y_city, day, len(legs) - 1)
+                found = best.get(key)
+                if found is None:
+                    best[key] = [(fare, a - first, legs)] * 2
+                else:
+                    if (fare, a - first) < found[0][:2]:
+                        found[0] = (fare, a - first, legs)
+                    if (a - first, fare) < (found[1][1], found[1][0]):
+                        found[1] = (fare, a - first, legs)
+                if len(legs) <= max_stops:
+                    heappush(pending[y], (a + earliest, next(seq), (a, first, fare, airline[c], legs, mask | y_bit, origin)))
+
+        x_city = city[x]
+        if x_city != y_city:
+            heappush(pending[y], (a + earliest, next(seq), (a, t, price[c], airline[c], (c,), (1 << x_city) | y_bit, x_city)))
+    return best
+
+def itinerary_rows(s, best):
+    """`itinerary` rows for scan() results, in primary-key order."""
+    rows = []
+    for (origin, destination, day, stops), found in best.items():
+        for kind, (fare, minutes, legs) in zip(KINDS, found):
+            rows.append((s.cities[origin], s.cities[destination], date.fromordinal(date(1970, 1, 1).toordinal() + day).isoformat(),
+                         stops, kind, fare, minutes, s.dep_text[legs[0]], s.arr_text[legs[-1]],
+                         " ".join(s.airports[s.dst[leg]] for leg in legs[:-1]),
+                         " ".join(s.flight_ids[leg] for leg in legs), " ".join(s.ticket_codes[leg] for leg in legs)))
+    rows.sort(key=lambda row: row[:5])
+    return rows
+
+def build(conn, **rules):
+    """Rebuild `itinerary` inside the caller's transaction.
+
+    `rules` are scan()'s keyword arguments. Returns ``(rows, {phase: seconds},
+    flights)``: the itineraries written, the time of the load, scan and write
+    phases, and the number of flights loaded into the Schedule.
+    """
+    timings = {}
+    t0 = perf_counter()
+    schedule = Schedule(conn)
+    timings["load"] = perf_counter() - t0
+    t0 = perf_counter()
+    gc.disable()  # labels are acyclic tuples; full collections over the live ones cost ~40% of a 10× scan
+    try:
+        best = scan(schedule, **rules)
+    finally:
+        gc.enable()
+    timings["scan"] = perf_counter() - t0
+    t0 = perf_counter()
+    conn.execute("DROP TABLE IF EXISTS itinerary")
+    for statement in ITINERARY_SQL.strip().split(";\n"):
+        conn.execute(statement)
+    rows = conn.executemany("INSERT INTO itinerary VALUES (?,?,?,?,?,?,?,?,?,?,?,?)",
+                            itinerary_rows(schedule, best)).rowcount
+    timings["write"] = perf_counter() - t0
+    return rows, timings, len(schedule)
+
+def lookup(conn, origin, destination, dep_date):
+    """The stored itineraries for one city pair and day, cheapest first."""
+    return conn.execute("SELECT * FROM itinerary WHERE origin = lower(?) AND destination = lower(?) AND dep_date = ? "
+                        "ORDER BY price, duration_minutes", (origin, destination, str(dep_date))).fetchall()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Precompute one- and two-stop itineraries into the itinerary table.")
+    ap.add_argument("--db", type=Path, default=DB_PATH, help="database file (default: data/flights.db)")
+    ap.add_argument("--mct-online", type=int, default=MCT_MINUTES[True], help="minimum connection, same airline (min)")
+    ap.add_argument("--mct-interline", type=int, default=MCT_MINUTES[False], help="minimum connection, other airline (min)")
+    ap.add_argument("--max-layover", type=int, default=MAX_LAYOVER_MINUTES, help="longest connection (min)")
+    ap.add_argument("--max-journey", type=int, default=MAX_JOURNEY_MINUTES, help="longest first departure → last arrival (min)")
+    ap.add_argument("--max-stops", type=int, choices=(1, 2), default=MAX_STOPS)
+    args = ap.parse_args()
+
+    if not args.db.exists():
+        ap.error(f"{args.db} does not exist")
+    conn = sqlite3.connect(args.db)
+    conn.execute("BEGIN")
+    rows, timings, flights = build(conn, mct={True: args.mct_online, False: args.mct_interline},
+                                   max_layover=args.max_layover, max_journey=args.max_journey, max_stops=args.max_stops)
+    conn.commit()
+    for phase, secs in timings.items():
+        print(f"• {phase:<6} {secs:6.2f}s", file=sys.stderr)
+    print(f"✔ {rows:,} itineraries from {flights:,} flights in {sum(timings.values()):.2f}s "
+          f"({rows / timings['scan']:,.0f}/s scanning) → {args.db}")
+    sample = conn.execute("SELECT origin, destination, dep_date FROM itinerary LIMIT 1").fetchone()
+    if sample:
+        for row in lookup(conn, *sample):
+            print("  ", row)
+    conn.close()
@@ -25,28 +25,28 @@ const db = new Database(dbFile);
 db.pragma('foreign_keys = ON');
 
 /* ----------------------------------------------------------------------------
- * Full schema (idempotent - uses IF NOT EXISTS)
+ * Full schema (idempotent - uses IF NOT EXISTS); keep in step with schema.py
  * ------------------------------------------------------------------------- */
 const schema = `
 /* ===== USER ============================================================= */
 CREATE TABLE IF NOT EXISTS user (
     id        TEXT PRIMARY KEY,                /* USER.id        */
     password  TEXT NOT NULL                    /* USER.password  */
-);
+) STRICT;
 
 /* ===== AIRPORT ========================================================== */
 CREATE TABLE IF NOT EXISTS airport (
     id      TEXT PRIMARY KEY,                  /* AIRPORT.id     */
     city    TEXT NOT NULL,                     /* AIRPORT.city   */
     country TEXT NOT NULL                      /* AIRPORT.country*/
-);
+) STRICT;
 
 /* ===== AIRLINE ========================================================== */
 CREATE TABLE IF NOT EXISTS airline (
     id           TEXT PRIMARY KEY,             /* AIRLINE.id           */
     name         TEXT NOT NULL,                /* AIRLINE.name         */
     website_link TEXT                          /* AIRLINE.website link */
-);
+) STRICT;
 
 /* ===== FLIGHT =========================================================== */
 CREATE TABLE IF NOT EXISTS flight (
@@ -63,22 +63,22 @@ CREATE TABLE IF NOT EXISTS flight (
         ON UPDATE RESTRICT ON DELETE RESTRICT,
     FOREIGN KEY (airport_arrive_id) REFERENCES airport (id)
         ON UPDATE RESTRICT ON DELETE RESTRICT
-);
+) STRICT;
 
 /* ===== TICKET =========================================================== */
 CREATE TABLE IF NOT EXISTS ticket (
-    code        TEXT,                          /* TICKET.code  (e.g., A1B2C3) */
+    code        TEXT NOT NULL,                 /* TICKET.code  (e.g., AB1234-E) */
     flight_id   TEXT NOT NULL,                 /* FK → flight.id              */
     airline_id  TEXT NOT NULL,                 /* FK → airline.id             */
     class       TEXT NOT NULL,                 /* economy | business | first  */
-    price       REAL NOT NULL CHECK (price >= 0),
+    price       INTEGER NOT NULL CHECK (price >= 0),   /* whole euros */
     availability INTEGER NOT NULL CHECK (availability >= 0),
     PRIMARY KEY (code, flight_id, airline_id),
     FOREIGN KEY (flight_id)  REFERENCES flight  (id)
         ON UPDATE RESTRICT ON DELETE RESTRICT,
     FOREIGN KEY (airline_id) REFERENCES airline (id)
         ON UPDATE RESTRICT ON DELETE RESTRICT
-);
+) STRICT, WITHOUT ROWID;                       /* row lives in the PK B-tree */
 
 /* ===== HEARTS  (user favourites) ======================================= */
 CREATE TABLE IF NOT EXISTS hearts (
@@ -92,7 +92,7 @@ CREATE TABLE IF NOT EXISTS hearts (
         ON UPDATE RESTRICT ON DELETE RESTRICT,
     FOREIGN KEY (user_id) REFERENCES user (id)
         ON UPDATE RESTRICT ON DELETE RESTRICT
-);
+) STRICT, WITHOUT ROWID;
 `;
 
 /* Execute schema once (fast / idempotent) */
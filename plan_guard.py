@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""Query-plan regression guard for the SQL statements the app issues.
+
+The statements are read straight from the JavaScript (SOURCES), not from a
+copy: every db.prepare() argument is resolved through the string literals,
+template literals, `+`/`+=` concatenations, `${cond ? '…' : ''}` splices and
+`if (…) sql += …` appends that build it, and each combination of those
+optional parts becomes its own statement (`searchTickets.outboundSQL
+[departureDate, sortBy === 'price_asc']`). Parameters are bound from the
+generated database by what each `?` is compared with (departure city, date,
+class, LIMIT, …), then EXPLAIN QUERY PLAN runs on it.
+
+A statement regresses when its plan SCANs a table with at least
+--large-rows rows, or uses a temp B-tree (ORDER BY / GROUP BY / DISTINCT
+sorter), that its entry in the baseline does not allow. A statement missing
+from the baseline may do neither.
+
+    python plan_guard.py [--db data/flights.db]      # exit 1 on a regression
+    python plan_guard.py --update                    # accept the current plans
+    python plan_guard.py --list                      # show extracted SQL + binds
+"""
+from datetime import datetime
+from difflib import unified_diff
+from itertools import product
+from pathlib import Path
+import argparse, hashlib, json, re, sqlite3, sys
+
+import query_shapes
+
+THIS_DIR = Path(__file__).resolve().parent
+DB_PATH = THIS_DIR / "data" / "flights.db"
+BASELINE_PATH = THIS_DIR / "data" / "query_plan_baseline.json"
+SOURCES = [THIS_DIR / "model" / "model-betterSqlite3.mjs", THIS_DIR / "lib" / "db.js"]
+LARGE_TABLE_ROWS = 10_000
+
+_SQL_START = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b", re.I)
+_PLACEHOLDER = re.compile(r"§(\d+)§")
+
+
+# ---------------------------------------------------------------------------
+# Extraction
+# ---------------------------------------------------------------------------
+def _string_end(src, i):
+    """Index just past the quoted string or template literal starting at src[i]."""
+    quote, j = src[i], i + 1
+    while src[j] != quote:
+        if src[j] == "\\":
+            j += 1
+        elif quote == "`" and src.startswith("${", j):
+            j = _brace_end(src, j + 1) - 1
+        j += 1
+    return j + 1
+
+def _brace_end(src, i):
+    """Index just past the `}` matching the `{` at src[i]."""
+    depth, j = 0, i
+    while True:
+        if src[j] in "'\"`":
+            j = _string_end(src, j)
+            continue
+        depth += {"{": 1, "}": -1}.get(src[j], 0)
+        j += 1
+        if depth == 0:
+            return j
+
+def tokenize(src):
+    """``(skeleton, literals)``: comments blanked and every literal replaced by ``§n§``.
+
+    A literal is ``(raw source, parts)``; parts are text, or for a template
+    literal's ``${…}`` the tokenized expression. Regex literals are not
+    recognized (the model code has none).
+    """
+    out, literals, i = [], [], 0
+    while i < len(src):
+        if src.startswith("//", i):
+            i = src.find("\n", i) if "\n" in src[i:] else len(src)
+        elif src.startswith("/*", i):
+            i = src.index("*/", i) + 2
+            out.append(" ")
+        elif src[i] in "'\"`":
+            end = _string_end(src, i)
+            body, parts, j, text = src[i + 1:end - 1], [], 0, ""
+            while j < len(body):
+                if body[j] == "\\":
+                    text += body[j + 1]
+                    j += 2
+                elif src[i] == "`" and body.startswith("${", j):
+                    k = _brace_end(body, j + 1)
+                    parts += [text, tokenize(body[j + 2:k - 1])]
+                    text, j = "", k
+                else:
+                    text += body[j]
+                    j += 1
+            literals.append((src[i:end], parts + [text]))
+            out.append(f"§{len(literals) - 1}§")
+            i = end
+        else:
+            out.append(src[i])
+            i += 1
+    return "".join(out), literals
+
+def _split_top(expr, sep):
+    """Split `expr` on `sep` outside parentheses."""
+    parts, depth, start = [], 0, 0
+    for i, c in enumerate(expr):
+        depth += {"(": 1, ")": -1}.get(c, 0)
+        if c == sep and depth == 0:
+            parts.append(expr[start:i])
+            start = i + 1
+    return parts + [expr[start:]]
+
+def _restore(text, literals):
+    return " ".join(_PLACEHOLDER.sub(lambda m: literals[int(m.group(1))][0], text).split())
+
+def evaluate(expr, literals, env):
+    """All values of a JS string expression: ``[(labels, text), …]``, one per choice of its optional parts."""
+    expr = expr.strip()
+    q = _split_top(expr, "?")
+    if len(q) > 1:  # cond ? a : b
+        cond = _restore(q[0], literals)
+        then, other = (_split_top("?".join(q[1:]), ":") + [""])[:2]
+        off = evaluate(other, literals, env)
+        off_labels = () if off == [((), "")] else (f"!({cond})",)
+        return ([(labels + (cond,), text) for labels, text in evaluate(then, literals, env)]
+                + [(labels + off_labels, text) for labels, text in off])
+    if expr.startswith("(") and expr.endswith(")") and len(_split_top(expr[1:-1], ")")) == 1:
+        return evaluate(expr[1:-1], literals, env)
+    values = [((), "")]
+    for operand in _split_top(expr, "+"):
+        operand = operand.strip()
+        literal = re.fullmatch(r"§(\d+)§", operand)
+        if literal:
+            options = [((), "")]
+            for part in literals[int(literal.group(1))][1]:
+                sub = [((), part)] if isinstance(part, str) else evaluate(part[0], part[1], env)
+                options = [(a + b, x + y) for (a, x), (b, y) in product(options, sub)]
+        elif operand in env:
+            options = expand(env[operand])
+        else:  # a number, call or anything else that is not a string here
+            return [((), "")]
+        values = [(a + b, x + y) for (a, x), (b, y) in product(values, options)]
+    return values
+
+def expand(pieces):
+    """Values of a variable built from pieces (each a list of alternatives), in append order."""
+    values = [((), "")]
+    for piece in pieces:
+        values = [(a + b, x + y) for (a, x), (b, y) in product(values, piece["alts"])]
+    return values
+
+def _blocks(skeleton):
+    """``[(start, end, header)]`` for every ``{ … }`` block."""
+    blocks, stack = [], []
+    for i, c in enumerate(skeleton):
+        if c == "{":
+            header = re.split(r"[;{}]", skeleton[:i])[-1].strip()
+            stack.append((i, header))
+        elif c == "}" and stack:
+            start, header = stack.pop()
+            blocks.append((start, i, header))
+    return blocks
+
+def _conditions(skeleton, pos, blocks, literals):
+    """The `if (…)` conditions guarding the statement at `pos`."""
+    conds = [header for start, end, header in blocks if start < pos < end]
+    conds.append(re.split(r"[;{}]", skeleton[:pos])[-1].strip())  # `if (x) sql += …;`
+    return [_restore(m.group(1), literals) for m in (re.fullmatch(r"if\s*\((.*)\)", c, re.S) for c in conds) if m]
+
+_STATEMENT = re.compile(r"(?P<function>\bfunction\s+(?P<fname>\w+))"
+                        r"|(?:\b(?:const|let|var)\s+(?P<decl>\w+)\s*=(?!=)\s*(?P<init>[^;]*);)"
+                        r"|(?:\b(?P<target>\w+)\s*\+=\s*(?P<append>[^;]*);)")
+_PREPARE = re.compile(r"\.prepare\(\s*([^()]*?)\s*\)")
+
+def extract(path):
+    """``[(name, sql)]`` for every statement variant prepared in the file at `path`."""
+    skeleton, literals = tokenize(Path(path).read_text(encoding="utf-8"))
+    blocks = _blocks(skeleton)
+    statements, seen = [], set()
+    function, env, counts = None, {}, {}
+
+    def add(name, values):
+        for labels, sql in values:
+            sql = " ".join(sql.split())
+            if not _SQL_START.match(sql) or (function, sql) in seen:
+                continue
+            seen.add((function, sql))
+            statements.append((f"{name} [{', '.join(labels)}]" if labels else name, sql))
+
+    events = sorted([(m.start(), "statement", m) for m in _STATEMENT.finditer(skeleton)]
+                    + [(m.start(), "prepare", m) for m in _PREPARE.finditer(skeleton)], key=lambda e: e[0])
+    for pos, kind, m in events:
+        if kind == "prepare":
+            arg = m.group(1)
+            if arg in env:
+                name = f"{function}.{arg}" if function else arg
+            else:
+                owner = re.search(r"(?:const|let|var)\s+(\w+)\s*=\s*\w+\s*$", skeleton[:pos])
+                name = function or (owner.group(1) if owner else Path(path).stem)
+                counts[name] = counts.get(name, 0) + 1
+                name += f"#{counts[name]}" if counts[name] > 1 else ""
+            add(name, evaluate(arg, literals, env))
+        elif m.group("function"):
+            function, env = m.group("fname"), {}
+        elif m.group("decl"):
+            values = evaluate(m.group("init"), literals, env)
+            if any(_SQL_START.match(text) for _, text in values):
+                env[m.group("decl")] = [{"alts": values, "subject": None}]
+        elif m.group("target") in env:
+            values = evaluate(m.group("append"), literals, env)
+            conds = _conditions(skeleton, pos, blocks, literals)
+            pieces = env[m.group("target")]
+            if not conds:
+                pieces.append({"alts": values, "subject": None})
+                continue
+            # consecutive `if (x === 'a') sql += …` appends are alternatives, not a product
+            subject = re.match(r"([\w.]+)\s*===?", conds[-1])
+            subject = subject.group(1) if subject else None
+            alts = [(labels + tuple(conds), text) for labels, text in values]
+            last = pieces[-1]
+            if subject and last["subject"] == subject:
+                last["alts"][-1:-1] = alts
+            else:
+                pieces.append({"alts": alts + [((), "")], "subject": subject})
+    return statements
+
+def app_statements(sources=SOURCES):
+    return [stmt for path in sources for stmt in extract(path)]
+
+
+# ---------------------------------------------------------------------------
+# Binding
+# ---------------------------------------------------------------------------
+def sample_values(conn):
+    """query_shapes.sample_values() plus a ticket of the sampled flight and new-row values."""
+    values = query_shapes.sample_values(conn)
+    ticket = conn.execute("SELECT code, airline_id FROM ticket WHERE flight_id = ? LIMIT 1",
+                          (values["flight"],)).fetchone() or ("XX0001-E", "XX")
+    values.update(ticket=ticket[0], airline=ticket[1], duration=600,
+                  new_user="plan-guard@example.com", password="x")
+    return values
+
+_INSERT_COLUMN = {"ticket_code": "ticket", "flight_id": "flight", "airline_id": "airline", "user_id": "user",
+                  "id": "new_user", "password": "password"}
+_EQUALS_COLUMN = {"user_id": "user", "ticket_code": "ticket", "flight_id": "flight", "airline_id": "airline",
+                  "class": "class", "code": "ticket"}
+_TABLE_KEY = {"flight": "flight", "user": "user", "ticket": "ticket", "airline": "airline"}
+
+def aliases(sql):
+    """alias → table for the FROM/JOIN items of `sql`."""
+    found = {}
+    for table, alias in re.findall(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", sql, re.I):
+        if alias.upper() in ("", "ON", "WHERE", "JOIN", "LEFT", "INNER", "CROSS", "GROUP", "ORDER", "LIMIT", "USING"):
+            alias = table
+        found[alias] = table
+        found.setdefault(table, table)
+    return found
+
+def bind_keys(sql):
+    """The sample_values() key for each `?` of `sql`, from what it is compared with (None if unknown)."""
+    insert = re.search(r"INSERT\b.*?\bINTO\s+\w+\s*\(([^)]*)\)\s*VALUES\s*\(", sql, re.I)
+    if insert:
+        return [_INSERT_COLUMN.get(col.strip()) for col in insert.group(1).split(",")]
+    tables = aliases(sql)
+    keys = []
+    for m in re.finditer(r"\?", sql):
+        before, after = sql[:m.start()], sql[m.end():]
+        city = re.search(r"(\w+)\.city\)?\s*=\s*(?:lower\()?\s*$", before, re.I)
+        column = re.search(r"(?:(\w+)\.)?(\w+)\)?\s*(?:=|<=)\s*(?:lower\()?\s*$", before, re.I)
+        if city:
+            role = re.search(rf"\.airport_(depart|arrive)_id\s*=\s*{city.group(1)}\.id\b", sql, re.I)
+            keys.append({"depart": "from", "arrive": "to"}.get(role.group(1)) if role else None)
+        elif re.search(r"\bBETWEEN\s*$", before, re.I):
+            keys.append("start")
+        elif re.search(r"\bBETWEEN\s*\?\s*AND\s*$", before, re.I):
+            keys.append("end")
+        elif re.search(r"\bDATE\([^()]*\)\s*(?:=|>=)\s*(?:DATE\()?\s*$", before, re.I):
+            keys.append("date")
+        elif re.search(r"\bLIMIT\s*$", before, re.I):
+            keys.append("limit")
+        elif re.search(r"\(\s*$", before) and re.match(r"\s*\+", after):  # (? + MIN(price))
+            keys.append("price")
+        elif column and column.group(2) in ("price", "duration_minutes"):
+            keys.append("price" if column.group(2) == "price" else "duration")
+        elif column and column.group(2) == "id":
+            keys.append(_TABLE_KEY.get(tables.get(column.group(1) or next(iter(tables), ""), "")))
+        elif column:
+            keys.append(_EQUALS_COLUMN.get(column.group(2)))
+        else:
+            keys.append(None)
+    return keys
+
+def bind(sql, values):
+    return tuple(values.get(key) if key else None for key in bind_keys(sql))
+
+
+# ---------------------------------------------------------------------------
+# Plans
+# ---------------------------------------------------------------------------
+def view_aliases(conn):
+    """alias → table inside the views (the --surrogate-keys layout), as plans name them."""
+    found = {}
+    for (sql,) in conn.execute("SELECT sql FROM sqlite_schema WHERE type = 'view'"):
+        found.update(aliases(sql))
+    return found
+
+def analyze(conn, sql, params, large_rows, row_counts, known_aliases):
+    """Plan lines plus the large tables it scans and the temp B-trees it builds."""
+    lines = query_shapes.explain(conn, sql, params)
+    tables = {**known_aliases, **aliases(sql)}
+    scans, temps = set(), set()
+    for line in lines:
+        detail = line.strip()
+        scan = re.match(r"SCAN (\w+)", detail)
+        if scan and scan.group(1) != "CONSTANT":
+            table = tables.get(scan.group(1), scan.group(1))
+            if table not in row_counts:  # views (rows materialized for INSTEAD OF triggers), CTEs: not tables
+                is_table = conn.execute("SELECT 1 FROM sqlite_schema WHERE type = 'table' AND name = ?",
+                                        (table,)).fetchone()
+                row_counts[table] = conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0] if is_table else 0
+            if row_counts[table] >= large_rows:
+                scans.add(table)
+        temp = re.match(r"USE TEMP B-TREE FOR (.+)", detail)
+        if temp:
+            temps.add(temp.group(1))
+    return {"plan": lines, "scans": sorted(scans), "temp_btrees": sorted(temps)}
+
+def current_plans(conn, statements, large_rows=LARGE_TABLE_ROWS):
+    values = sample_values(conn)
+    row_counts, known_aliases = {}, view_aliases(conn)
+    plans = {}
+    for name, sql in statements:
+        plans[name] = analyze(conn, sql, bind(sql, values), large_rows, row_counts, known_aliases)
+        plans[name]["sql_sha1"] = hashlib.sha1(sql.encode()).hexdigest()[:12]
+    return plans
+
+def regressions(plans, baseline):
+    """``[(name, problems)]`` for statements doing more than their baseline entry allows."""
+    found = []
+    for name, plan in plans.items():
+        allowed = baseline.get(name, {"scans": [], "temp_btrees": []})
+        problems = [f"scans {t}" for t in plan["scans"] if t not in allowed["scans"]]
+        problems += [f"temp B-tree for {k}" for k in plan["temp_btrees"] if k not in allowed["temp_btrees"]]
+        if problems:
+            found.append((name if name in baseline else f"{name} (not in baseline)", problems))
+    return found
+
+def load_baseline(path):
+    return json.loads(Path(path).read_text(encoding="utf-8"))["statements"] if Path(path).exists() else {}
+
+def write_baseline(path, plans, db_path, large_rows):
+    db_path = Path(db_path).resolve()
+    if db_path.is_relative_to(THIS_DIR):
+        db_path = db_path.relative_to(THIS_DIR)
+    doc = {"generated_at": datetime.now().isoformat(timespec="seconds"), "database": str(db_path),
+           "large_table_rows": large_rows, "statements": plans}
+    Path(path).write_text(json.dumps(doc, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Fail when an app query's plan regresses against the baseline.")
+    ap.add_argument("--db", type=Path, default=DB_PATH, help="generated database (default: data/flights.db)")
+    ap.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="checked-in plans to compare against")
+    ap.add_argument("--large-rows", type=int, default=LARGE_TABLE_ROWS,
+                    help="a SCAN of a table with at least this many rows counts (default: %(default)s)")
+    ap.add_argument("--update", action="store_true", help="write the current plans as the new baseline")
+    ap.add_argument("--list", action="store_true", help="print the extracted statements and their binds, then exit")
+    args = ap.parse_args()
+    if not args.db.exists():
+        ap.error(f"{args.db} not found; generate it first (python final_base_generation.py)")
+
+    statements = app_statements()
+    conn = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+    if args.list:
+        values = sample_values(conn)
+        for name, sql in statements:
+            print(f"{name}\n    {sql}\n    binds {dict(zip(bind_keys(sql), bind(sql, values)))}")
+        sys.exit(0)
+
+    plans = current_plans(conn, statements, args.large_rows)
+    baseline = load_baseline(args.baseline)
+    if args.update:
+        write_baseline(args.baseline, plans, args.db, args.large_rows)
+        print(f"✔ Baseline of {len(plans)} statements written to {args.baseline}")
+        sys.exit(0)
+
+    bad = regressions(plans, baseline)
+    for name, problems in bad:
+        print(f"✘ {name}: {', '.join(problems)}")
+        name = name.removesuffix(" (not in baseline)")
+        diff = unified_diff(baseline.get(name, {}).get("plan", []), plans[name]["plan"],
+                            "baseline", "current", lineterm="", n=len(plans[name]["plan"]))
+        print("\n".join(f"    {line}" for line in diff))
+    gone = sorted(set(baseline) - set(plans))
+    if gone:
+        print(f"• {len(gone)} baseline statements no longer in the app: {', '.join(gone)}")
+    print(f"{'✘' if bad else '✔'} {len(plans)} statements from {len(SOURCES)} files, "
+          f"{len(bad)} plan regressions (tables ≥ {args.large_rows:,} rows)")
+    sys.exit(1 if bad else 0)
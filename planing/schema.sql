@@ -1,56 +1,65 @@
-CREATE TABLE IF NOT EXISTS "USER" (
-    "id" STRING PRIMARY KEY,
-    "password" STRING
-);
+/* ===== USER ============================================================= */
+CREATE TABLE IF NOT EXISTS user (
+    id        TEXT PRIMARY KEY,
+    password  TEXT NOT NULL
+) STRICT;
 
-CREATE TABLE IF NOT EXISTS "AIRPORT" (
-    "id" STRING PRIMARY KEY,
-    "city" STRING,
-    "country" STRING
-);
+CREATE TABLE IF NOT EXISTS airport (
+    id      TEXT PRIMARY KEY,
+    city    TEXT NOT NULL,
+    country TEXT NOT NULL
+) STRICT;
 
-CREATE TABLE IF NOT EXISTS "AIRLINE" (
-    "id" STRING PRIMARY KEY,
-    "name" STRING,
-    "website_link" STRING
-);
+CREATE TABLE IF NOT EXISTS airline (
+    id           TEXT PRIMARY KEY,
+    name         TEXT NOT NULL,
+    website_link TEXT
+) STRICT;
 
-CREATE TABLE IF NOT EXISTS "FLIGHT" (
-    "id" STRING PRIMARY KEY,
-    "num_of_tickets" STRING,
-    "time_departure" STRING,
-    "time_arrival" STRING,
-    "airport_depart_id" STRING,
-    "airport_arrive_id" STRING,
-    "airline_id" STRING,
-    FOREIGN KEY ("airport_depart_id") REFERENCES "AIRPORT" ("id")
-        ON UPDATE RESTRICT ON DELETE RESTRICT,
-    FOREIGN KEY ("airport_arrive_id") REFERENCES "AIRPORT" ("id")
-        ON UPDATE RESTRICT ON DELETE RESTRICT,
-    FOREIGN KEY ("airline_id") REFERENCES "AIRLINE" ("id")
-        ON UPDATE RESTRICT ON DELETE RESTRICT
-);
+CREATE TABLE IF NOT EXISTS flight (
+    id                TEXT PRIMARY KEY,
+    airline_id        TEXT NOT NULL,
+    airport_depart_id TEXT NOT NULL,
+    airport_arrive_id TEXT NOT NULL,
+    time_departure    TEXT NOT NULL,
+    time_arrival      TEXT NOT NULL,
+    num_tickets       INTEGER NOT NULL CHECK (num_tickets >= 0),
+    FOREIGN KEY (airline_id)        REFERENCES airline (id),
+    FOREIGN KEY (airport_depart_id) REFERENCES airport (id),
+    FOREIGN KEY (airport_arrive_id) REFERENCES airport (id)
+) STRICT;
 
-CREATE TABLE IF NOT EXISTS "TICKET" (
-    "code" STRING,
-    "class" STRING,
-    "price" STRING,
-    "availability" STRING,
-    "flight_id" STRING,
-    "airline_id" STRING,
-    PRIMARY KEY ("code", "flight_id", "airline_id"),
-    FOREIGN KEY ("flight_id") REFERENCES "FLIGHT" ("id")
-        ON UPDATE RESTRICT ON DELETE RESTRICT,
-    FOREIGN KEY ("airline_id") REFERENCES "AIRLINE" ("id")
-        ON UPDATE RESTRICT ON DELETE RESTRICT
-);
+CREATE TABLE IF NOT EXISTS ticket (
+    code         TEXT NOT NULL,
+    flight_id    TEXT NOT NULL,
+    airline_id   TEXT NOT NULL,
+    class        TEXT NOT NULL,
+    price        INTEGER NOT NULL CHECK (price >= 0),
+    availability INTEGER NOT NULL CHECK (availability >= 0),
+    PRIMARY KEY (code, flight_id, airline_id),
+    FOREIGN KEY (flight_id)  REFERENCES flight  (id),
+    FOREIGN KEY (airline_id) REFERENCES airline (id)
+) STRICT, WITHOUT ROWID;
 
-CREATE TABLE IF NOT EXISTS "Hearts" (
-    "ticket_code" STRING,
-    "user_id" STRING,
-    PRIMARY KEY ("ticket_code", "user_id"),
-    FOREIGN KEY ("ticket_code") REFERENCES "TICKET" ("code")
-        ON UPDATE RESTRICT ON DELETE RESTRICT,
-    FOREIGN KEY ("user_id") REFERENCES "USER" ("id")
-        ON UPDATE RESTRICT ON DELETE RESTRICT
-);
+CREATE TABLE IF NOT EXISTS hearts (
+    ticket_code TEXT NOT NULL,
+    flight_id   TEXT NOT NULL,
+    airline_id  TEXT NOT NULL,
+    user_id     TEXT NOT NULL,
+    PRIMARY KEY (ticket_code, flight_id, airline_id, user_id),
+    FOREIGN KEY (ticket_code, flight_id, airline_id)
+        REFERENCES ticket (code, flight_id, airline_id),
+    FOREIGN KEY (user_id) REFERENCES user (id)
+) STRICT, WITHOUT ROWID;
+
+
+CREATE TABLE IF NOT EXISTS schedule_route (
+    airline_id        TEXT NOT NULL REFERENCES airline (id),
+    airport_depart_id TEXT NOT NULL REFERENCES airport (id),
+    airport_arrive_id TEXT NOT NULL REFERENCES airport (id),
+    freq_per_day      REAL NOT NULL
+) STRICT;
+CREATE TABLE IF NOT EXISTS schedule_meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) STRICT, WITHOUT ROWID;
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""Latency of the app's queries as the generated database grows.
+
+For every --scale a database is generated with database_generator_FIXED.py
+(into data/bench/), then each workload below runs --runs times with bind
+values drawn from that database: random routes and departure dates, classes,
+price caps, sortBy options and users with favourites. Reported per scale and
+workload: p50/p95/p99/mean latency, rows returned, SQLite VM steps (the
+closest thing to "rows scanned" the sqlite3 module exposes) and the query
+plan(s).
+
+    python query_bench.py --scales 0.1 0.3 1 --csv bench.csv
+    python query_bench.py --reuse --baseline data/bench/previous.json
+
+--baseline compares p95 against an earlier report and exits with status 1
+when a workload got more than --threshold times slower.
+"""
+from datetime import date, timedelta
+from pathlib import Path
+from random import Random
+from statistics import mean, quantiles
+from time import perf_counter
+import argparse, csv, json, shlex, sqlite3, subprocess, sys
+
+import query_shapes
+from index_pack import plan_summary
+
+THIS_DIR = Path(__file__).resolve().parent
+BENCH_DIR = THIS_DIR / "data" / "bench"
+GENERATOR = THIS_DIR / "database_generator_FIXED.py"
+ATHENS_TO_PARIS = THIS_DIR / "data" / "athenstoparisquery.sql"
+POOL_SIZE = 500
+VM_STEP_GRANULARITY = 100  # progress handler period, in VM instructions
+
+SORTS = [None, "price_asc", "price_desc", "duration_asc", "duration_desc"]
+CLASSES = ["economy", "business", "first"]
+
+
+# ---------------------------------------------------------------------------
+# Bind values
+# ---------------------------------------------------------------------------
+def value_pool(conn, size=POOL_SIZE, seed=0):
+    """Routes with a departure date, flight ids and hearting users sampled from `conn`."""
+    rng = Random(seed)
+    routes = conn.execute("""
+        SELECT lower(a1.city), lower(a2.city), DATE(f.time_departure), f.id
+        FROM flight f
+        JOIN airport a1 ON f.airport_depart_id = a1.id
+        JOIN airport a2 ON f.airport_arrive_id = a2.id
+    """).fetchall()
+    users = [row[0] for row in conn.execute("SELECT DISTINCT user_id FROM hearts")]
+    return {
+        "routes": rng.sample(routes, min(size, len(routes))),
+        "users": rng.sample(users, min(size, len(users))) or ["nobody@example.com"],
+    }
+
+def draw_values(pool, rng):
+    """One request's worth of sample_values()-style bind values."""
+    origin, destination, day, flight = rng.choice(pool["routes"])
+    start = date.fromisoformat(day)
+    month_end = (start.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+    return {
+        "from": origin, "to": destination, "date": day, "flight": flight,
+        "start": start.replace(day=1).isoformat(), "end": month_end.isoformat(),
+        "class": rng.choice(CLASSES), "price": rng.randrange(100, 2000), "duration": rng.randrange(90, 720),
+        "limit": 5, "user": rng.choice(pool["users"]),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Workloads: name → (rng, values) -> (sql, params)
+# ---------------------------------------------------------------------------
+def _shape(name):
+    return lambda rng, values: query_shapes.bind(name, values)
+
+def _search(sql_for):
+    """searchTickets() with the form's mix of sortBy / departureDate / maxPrice / maxDuration."""
+    def workload(rng, values):
+        flags = dict(departure_date=rng.random() < 0.8, max_price=rng.random() < 0.3,
+                     max_duration=rng.random() < 0.2, sort_by=rng.choice(SORTS))
+        names = ["from", "to", "class"]
+        names += ["date"] * flags["departure_date"] + ["price"] * flags["max_price"]
+        names += ["duration"] * flags["max_duration"] + ["limit"]
+        return sql_for(**flags), tuple(values[n] for n in names)
+    return workload
+
+def _date_grid_column(rng, values):
+    # the return half binds the outbound price found by the first half
+    return query_shapes.DATE_GRID_COLUMN_RET, (rng.randrange(40, 600), values["to"], values["from"], values["date"])
+
+WORKLOADS = {
+    "searchTickets": _search(query_shapes.search_tickets_sql),
+    "searchTickets:favorites": _shape("searchTickets:favorites"),
+    "getCalendarPrices": _shape("getCalendarPrices"),
+    "getDateGrid": _shape("getDateGrid"),
+    "getDateGrid:ret": _shape("getDateGrid:ret"),
+    "getDateGridDay": _shape("getDateGridDay"),
+    "getDateGridColumn:out": _shape("getDateGridColumn:out"),
+    "getDateGridColumn:ret": _date_grid_column,
+    "getFavorites": _shape("getFavorites"),
+    "getTopDestinations": _shape("getTopDestinations"),
+    "getFlightById": _shape("getFlightById"),
+    "athenstoparisquery.sql": lambda rng, values: (ATHENS_TO_PARIS.read_text(encoding="utf-8"), ()),
+}
+
+# the same requests answered from derived_tables.py
+DERIVED_WORKLOADS = {
+    "flight_search": _search(query_shapes.search_flights_sql),
+    "route_day_min_price:range": _shape("route_day_min_price:range"),
+    "route_day_min_price:day": _shape("route_day_min_price:day"),
+    "round_trip_matrix": lambda rng, values: (query_shapes.ROUND_TRIP_ROW, (values["from"], values["to"], "any")),
+    "destination_popularity": _shape("destination_popularity"),
+}
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+def _percentiles(samples):
+    if len(samples) < 2:
+        return samples * 3
+    cuts = quantiles(samples, n=100, method="inclusive")
+    return cuts[49], cuts[94], cuts[98]
+
+def vm_steps(conn, sql, params):
+    steps = 0
+    def tick():
+        nonlocal steps
+        steps += VM_STEP_GRANULARITY
+    conn.set_progress_handler(tick, VM_STEP_GRANULARITY)
+    try:
+        conn.execute(sql, params).fetchall()
+    finally:
+        conn.set_progress_handler(None, 0)
+    return steps
+
+def run_workload(conn, workload, pool, runs, seed=0):
+    rng = Random(seed)
+    requests = [workload(rng, draw_values(pool, rng)) for _ in range(runs)]
+    conn.execute(*requests[0]).fetchall()  # warm the page cache and statement cache
+
+    latencies, rows = [], []
+    for sql, params in requests:
+        t0 = perf_counter()
+        rows.append(len(conn.execute(sql, params).fetchall()))
+        latencies.append((perf_counter() - t0) * 1000)
+
+    # untimed: the progress handler slows the VM down
+    steps = [vm_steps(conn, sql, params) for sql, params in requests[:min(runs, 50)]]
+    plans = {}
+    for sql, params in requests:
+        plan = plan_summary(query_shapes.explain(conn, sql, params))
+        plans[plan] = plans.get(plan, 0) + 1
+
+    p50, p95, p99 = _percentiles(latencies)
+    return {
+        "runs": runs,
+        "p50_ms": round(p50, 4), "p95_ms": round(p95, 4), "p99_ms": round(p99, 4),
+        "mean_ms": round(mean(latencies), 4),
+        "rows_mean": round(mean(rows), 2),
+        "vm_steps_mean": round(mean(steps)),
+        "plans": plans,
+    }
+
+def table_counts(conn):
+    return {t: conn.execute(f'SELECT COUNT(*) FROM "{t}"').fetchone()[0]
+            for t in ("airport", "airline", "user", "flight", "ticket", "hearts")}
+
+def generate(scale, path, gen_args):
+    path.unlink(missing_ok=True)
+    cmd = [sys.executable, str(GENERATOR), "--scale", str(scale), "--db", str(path), *gen_args]
+    print(f"• Generating ×{scale:g}: {' '.join(cmd[1:])}", file=sys.stderr)
+    t0 = perf_counter()
+    done = subprocess.run(cmd, capture_output=True, text=True)
+    if done.returncode:
+        sys.exit(f"generator failed:\n{done.stderr}")
+    return perf_counter() - t0
+
+def bench_scale(scale, args):
+    path = BENCH_DIR / f"flights-x{scale:g}.db"
+    gen_seconds = None
+    if not (args.reuse and path.exists()):
+        gen_seconds = generate(scale, path, shlex.split(args.gen_args))
+
+    conn = sqlite3.connect(path)
+    pool = value_pool(conn)
+    has_derived = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'flight_search'").fetchone()
+    workloads = dict(WORKLOADS, **(DERIVED_WORKLOADS if has_derived else {}))
+    if args.only:
+        workloads = {name: w for name, w in workloads.items() if name in args.only}
+
+    queries = {}
+    for name, workload in workloads.items():
+        queries[name] = result = run_workload(conn, workload, pool, args.runs)
+        print(f"  ×{scale:<6g} {name:<28} p50 {result['p50_ms']:8.3f}  p95 {result['p95_ms']:8.3f}  "
+              f"p99 {result['p99_ms']:8.3f} ms  {result['vm_steps_mean']:>12,} steps", file=sys.stderr)
+    report = {"scale": scale, "database": str(path), "db_bytes": path.stat().st_size,
+              "generate_s": gen_seconds and round(gen_seconds, 2), "tables": table_counts(conn),
+              "queries": queries}
+    conn.close()
+    return report
+
+
+# ---------------------------------------------------------------------------
+# Reports
+# ---------------------------------------------------------------------------
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=THIS_DIR, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def write_csv(report, path):
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(["revision", "scale", "query", "runs", "p50_ms", "p95_ms", "p99_ms", "mean_ms",
+                         "rows_mean", "vm_steps_mean", "plan"])
+        for entry in report["scales"]:
+            for name, q in entry["queries"].items():
+                plan = max(q["plans"], key=q["plans"].get)
+                writer.writerow([report["revision"], entry["scale"], name, q["runs"], q["p50_ms"], q["p95_ms"],
+                                 q["p99_ms"], q["mean_ms"], q["rows_mean"], q["vm_steps_mean"], plan])
+
+def compare(report, baseline, threshold):
+    """Print p95 ratios against `baseline`; return the (scale, query) pairs over `threshold`."""
+    old = {(e["scale"], name): q for e in baseline["scales"] for name, q in e["queries"].items()}
+    regressions = []
+    print(f"p95 vs {baseline.get('revision') or 'baseline'}:")
+    for entry in report["scales"]:
+        for name, q in entry["queries"].items():
+            prev = old.get((entry["scale"], name))
+            if not prev:
+                continue
+            ratio = q["p95_ms"] / max(prev["p95_ms"], 1e-6)
+            flag = "  ✖ regression" if ratio > threshold else ""
+            print(f"  ×{entry['scale']:<6g} {name:<28} {prev['p95_ms']:9.3f} → {q['p95_ms']:9.3f} ms"
+                  f"  ({ratio:5.2f}×){flag}")
+            if flag:
+                regressions.append((entry["scale"], name))
+    return regressions
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Benchmark the app's queries across generated database scales.")
+    ap.add_argument("--scales", type=float, nargs="+", default=[0.1, 0.3, 1.0])
+    ap.add_argument("--runs", type=int, default=200, help="requests per workload and scale")
+    ap.add_argument("--only", nargs="+", help="workload names to run (default: all)")
+    ap.add_argument("--gen-args", default="--stream", help="extra database_generator_FIXED.py arguments")
+    ap.add_argument("--reuse", action="store_true", help="benchmark existing data/bench databases as they are")
+    ap.add_argument("--json", type=Path, default=BENCH_DIR / "query_bench.json", help="JSON report path")
+    ap.add_argument("--csv", type=Path, help="also write a flat CSV report")
+    ap.add_argument("--baseline", type=Path, help="earlier JSON report to compare p95 against")
+    ap.add_argument("--threshold", type=float, default=1.5, help="p95 slowdown counted as a regression")
+    args = ap.parse_args()
+
+    BENCH_DIR.mkdir(parents=True, exist_ok=True)
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline else None
+    report = {
+        "revision": git_revision(),
+        "sqlite_version": sqlite3.sqlite_version,
+        "runs": args.runs,
+        "generator_args": args.gen_args,
+        "scales": [bench_scale(scale, args) for scale in args.scales],
+    }
+    args.json.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"• Report written to {args.json}")
+    if args.csv:
+        write_csv(report, args.csv)
+        print(f"• CSV written to {args.csv}")
+    if baseline and compare(report, baseline, args.threshold):
+        sys.exit(1)
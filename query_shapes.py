@@ -0,0 +1,321 @@
+"""The SQL statements model/model-betterSqlite3.mjs and lib/db.js run, as Python data.
+
+Kept textually identical to the JavaScript (modulo the optional clauses
+searchTickets() splices in) so EXPLAIN QUERY PLAN here reflects what the app
+gets. sample_values() picks representative bind values from a generated DB.
+"""
+
+TOP_DESTINATIONS = """
+        SELECT a2.city AS name, COUNT(*) AS favorites_count
+        FROM hearts h
+        JOIN ticket t ON h.ticket_code = t.code
+        JOIN flight f ON t.flight_id = f.id
+        JOIN airport a2 ON f.airport_arrive_id = a2.id
+        GROUP BY a2.city
+        ORDER BY favorites_count DESC
+        LIMIT 5
+"""
+
+CITIES = "SELECT DISTINCT city FROM airport ORDER BY city"
+
+CALENDAR_PRICES = """
+        SELECT DATE(f.time_departure) AS date, MIN(t.price) AS price
+        FROM flight f
+        JOIN airport a1 ON f.airport_depart_id = a1.id
+        JOIN airport a2 ON f.airport_arrive_id = a2.id
+        JOIN ticket t ON f.id = t.flight_id
+        WHERE LOWER(a1.city) = LOWER(?) AND LOWER(a2.city) = LOWER(?)
+     AND DATE(f.time_departure) BETWEEN ? AND ?
+        GROUP BY DATE(f.time_departure)
+        ORDER BY date
+"""
+
+FAVORITES = """
+        SELECT t.code AS id,
+               t.flight_id AS flight_id,
+               t.airline_id AS airline_id,
+               f.time_departure,
+               f.time_arrival,
+               a1.city AS origin,
+               a2.city AS destination,
+               t.price
+        FROM hearts h
+        JOIN ticket t ON h.ticket_code = t.code
+        JOIN flight f ON t.flight_id = f.id
+        JOIN airport a1 ON f.airport_depart_id = a1.id
+        JOIN airport a2 ON f.airport_arrive_id = a2.id
+        WHERE h.user_id = ?
+"""
+
+FAVORITE_CODES = "SELECT ticket_code FROM hearts WHERE user_id = ?"
+
+DATE_GRID_OUT = """
+        SELECT DATE(f.time_departure) AS outDate, MIN(t.price) AS min_out_price
+        FROM flight f
+        JOIN airport a1 ON f.airport_depart_id = a1.id
+        JOIN airport a2 ON f.airport_arrive_id = a2.id
+        JOIN ticket t ON f.id = t.flight_id
+        WHERE lower(a1.city) = ?
+          AND lower(a2.city) = ?
+          AND DATE(f.time_departure) BETWEEN ? AND ?
+        GROUP BY outDate
+        LIMIT 7;
+"""
+
+DATE_GRID_RET = """
+        SELECT DATE(r.time_departure) AS retDate, MIN(t.price) AS min_ret_price
+        FROM flight r 
+        JOIN airport a2 ON r.airport_depart_id = a2.id
+        JOIN airport a1 ON r.airport_arrive_id = a1.id
+        JOIN ticket t ON r.id = t.flight_id
+        WHERE lower(a2.city) = ? 
+          AND lower(a1.city) = ?
+          AND DATE(r.time_departure) BETWEEN ? AND ?
+        GROUP BY retDate
+        LIMIT 7;
+"""
+
+DATE_GRID_DAY_OUT = """SELECT DATE(f.time_departure) AS outDate,
+                      MIN(t.price)         AS min_out_price
+               FROM flight f
+               JOIN airport a1 ON f.airport_depart_id = a1.id
+               JOIN airport a2 ON f.airport_arrive_id = a2.id
+               JOIN ticket  t  ON f.id = t.flight_id
+               WHERE lower(a1.city)=? AND lower(a2.city)=?
+                 AND DATE(f.time_departure)=?
+               GROUP BY outDate
+               LIMIT 1"""
+
+DATE_GRID_COLUMN_OUT = """
+        SELECT MIN(t_out.price) AS min_out_price
+        FROM flight f
+        JOIN airport a1 ON f.airport_depart_id = a1.id
+        JOIN airport a2 ON f.airport_arrive_id = a2.id
+        JOIN ticket t_out ON f.id = t_out.flight_id
+        WHERE lower(a1.city) = ?
+          AND lower(a2.city) = ?
+          AND DATE(f.time_departure) = ?
+"""
+
+DATE_GRID_COLUMN_RET = """
+        SELECT
+            DATE(r.time_departure) AS retDate,
+            (? + MIN(t_ret.price)) AS totalPrice
+        FROM flight r
+        JOIN airport a2 ON r.airport_depart_id = a2.id
+        JOIN airport a1 ON r.airport_arrive_id = a1.id
+        JOIN ticket t_ret ON r.id = t_ret.flight_id
+        WHERE lower(a2.city) = ?
+          AND lower(a1.city) = ?
+          AND DATE(r.time_departure) >= DATE(?)
+        GROUP BY retDate
+        ORDER BY retDate ASC;
+"""
+
+SEARCH_TICKETS = """
+        SELECT
+            f.id AS flight_id,
+            a1.city AS departure_city,
+            a2.city AS arrival_city,
+            f.time_departure,
+            f.time_arrival,
+            t.class,
+            t.price,
+            t.code AS code,
+            t.availability,
+            al.name AS airline_name,
+            al.id AS airline_id,
+            (strftime('%s', f.time_arrival) - strftime('%s', f.time_departure)) / 60 AS duration_minutes
+        FROM flight f
+        JOIN airport a1 ON f.airport_depart_id = a1.id
+        JOIN airport a2 ON f.airport_arrive_id = a2.id
+        JOIN ticket t ON f.id = t.flight_id
+        JOIN airline al ON f.airline_id = al.id
+        WHERE LOWER(a1.city) = LOWER(?)
+        AND LOWER(a2.city) = LOWER(?)
+        AND LOWER(t.class) = LOWER(?)
+        {date}
+        AND t.availability > 0
+        {max_price}
+        {max_duration}
+    {order} LIMIT ?"""
+
+SEARCH_ORDER = {
+    None: "",
+    "price_asc": " ORDER BY t.price ASC",
+    "price_desc": " ORDER BY t.price DESC",
+    "duration_asc": " ORDER BY duration_minutes ASC",
+    "duration_desc": " ORDER BY duration_minutes DESC",
+}
+
+def search_tickets_sql(departure_date=True, max_price=False, max_duration=False, sort_by=None):
+    return SEARCH_TICKETS.format(
+        date="AND DATE(f.time_departure) = DATE(?)" if departure_date else "",
+        max_price="AND t.price <= ?" if max_price else "",
+        max_duration="AND duration_minutes <= ?" if max_duration else "",
+        order=SEARCH_ORDER[sort_by],
+    )
+
+FLIGHT_BY_ID = """
+    SELECT f.*, a.name AS airline_name,
+           ap_from.city  AS depart_city,
+           ap_to.city    AS arrive_city
+    FROM   flight f
+    JOIN   airline a        ON a.id = f.airline_id
+    JOIN   airport ap_from  ON ap_from.id = f.airport_depart_id
+    JOIN   airport ap_to    ON ap_to.id   = f.airport_arrive_id
+    WHERE  f.id = ?
+"""
+
+# name → (sql, names of the sample_values() entries it binds, in order)
+SHAPES = {
+    "getTopDestinations": (TOP_DESTINATIONS, ()),
+    "getCities": (CITIES, ()),
+    "getCalendarPrices": (CALENDAR_PRICES, ("from", "to", "start", "end")),
+    "getFavorites": (FAVORITES, ("user",)),
+    "searchTickets:favorites": (FAVORITE_CODES, ("user",)),
+    "getDateGrid": (DATE_GRID_OUT, ("from", "to", "start", "end")),
+    "getDateGrid:ret": (DATE_GRID_RET, ("to", "from", "start", "end")),
+    "getDateGridDay": (DATE_GRID_DAY_OUT, ("from", "to", "date")),
+    "getDateGridColumn:out": (DATE_GRID_COLUMN_OUT, ("from", "to", "date")),
+    "getDateGridColumn:ret": (DATE_GRID_COLUMN_RET, ("price", "to", "from", "date")),
+    "searchTickets:price_asc": (search_tickets_sql(sort_by="price_asc"), ("from", "to", "class", "date", "limit")),
+    "searchTickets:duration_asc": (search_tickets_sql(departure_date=False, max_price=True, sort_by="duration_asc"),
+                                   ("from", "to", "class", "price", "limit")),
+    "getFlightById": (FLIGHT_BY_ID, ("flight",)),
+}
+
+
+# ---------------------------------------------------------------------------
+# The same reads served from derived_tables.py
+# ---------------------------------------------------------------------------
+SEARCH_FLIGHTS = """
+        SELECT
+            s.flight_id,
+            s.departure_city,
+            s.arrival_city,
+            s.time_departure,
+            s.time_arrival,
+            s.ticket_class AS class,
+            s.price,
+            s.ticket_code AS code,
+            s.availability,
+            s.airline_name,
+            s.airline_id,
+            s.duration_minutes
+        FROM flight_search s
+        WHERE s.origin = LOWER(?)
+        AND s.destination = LOWER(?)
+        AND s.class = LOWER(?)
+        {date}
+        AND s.availability > 0
+        {max_price}
+        {max_duration}
+    {order} LIMIT ?"""
+
+SEARCH_FLIGHTS_ORDER = {
+    None: "",
+    "price_asc": " ORDER BY s.price ASC",
+    "price_desc": " ORDER BY s.price DESC",
+    "duration_asc": " ORDER BY s.duration_minutes ASC",
+    "duration_desc": " ORDER BY s.duration_minutes DESC",
+}
+
+def search_flights_sql(departure_date=True, max_price=False, max_duration=False, sort_by=None):
+    """searchTickets() against flight_search: same filters, same result rows.
+
+    origin/destination/class hold the lower-cased keys the filters compare;
+    the city, class and times returned are the stored ones, as searchTickets()
+    shows them.
+    """
+    return SEARCH_FLIGHTS.format(
+        date="AND s.dep_date = DATE(?)" if departure_date else "",
+        max_price="AND s.price <= ?" if max_price else "",
+        max_duration="AND s.duration_minutes <= ?" if max_duration else "",
+        order=SEARCH_FLIGHTS_ORDER[sort_by],
+    )
+
+# getCalendarPrices()/getDateGrid() (range of days) and getDateGridDay() /
+# getDateGridColumn() outbound (one day): MIN over the per-class rows.
+ROUTE_DAY_PRICES = """
+        SELECT dep_date AS date, MIN(min_price) AS price
+        FROM route_day_min_price
+        WHERE origin = LOWER(?) AND destination = LOWER(?)
+          AND dep_date BETWEEN ? AND ?
+        GROUP BY dep_date
+        ORDER BY dep_date
+"""
+
+ROUTE_DAY_PRICE = """
+        SELECT MIN(min_price) AS price
+        FROM route_day_min_price
+        WHERE origin = LOWER(?) AND destination = LOWER(?) AND dep_date = ?
+"""
+
+# getDateGrid()/getDateGridColumn() as one read; derived_tables.round_trip_grid() slices it
+ROUND_TRIP_ROW = """
+        SELECT first_date, days, span, dtype, totals
+        FROM round_trip_matrix
+        WHERE origin = lower(?) AND destination = lower(?) AND class = lower(?)
+"""
+
+# getTopDestinations(), by plain or time-decayed heart count
+TOP_DESTINATIONS_COUNT = """
+        SELECT city AS name, hearts AS favorites_count
+        FROM destination_popularity
+        ORDER BY hearts DESC
+        LIMIT 5
+"""
+
+TOP_DESTINATIONS_TRENDING = """
+        SELECT city AS name, hearts AS favorites_count
+        FROM destination_popularity
+        ORDER BY score DESC
+        LIMIT 5
+"""
+
+DERIVED_SHAPES = {
+    "flight_search:date": (search_flights_sql(), ("from", "to", "class", "date", "limit")),
+    "flight_search:date+duration_asc": (search_flights_sql(sort_by="duration_asc"),
+                                        ("from", "to", "class", "date", "limit")),
+    "flight_search:price_desc": (search_flights_sql(departure_date=False, sort_by="price_desc"),
+                                 ("from", "to", "class", "limit")),
+    "flight_search:duration_asc": (search_flights_sql(departure_date=False, max_price=True, sort_by="duration_asc"),
+                                   ("from", "to", "class", "price", "limit")),
+    "route_day_min_price:range": (ROUTE_DAY_PRICES, ("from", "to", "start", "end")),
+    "route_day_min_price:day": (ROUTE_DAY_PRICE, ("from", "to", "date")),
+    "round_trip_matrix": (ROUND_TRIP_ROW, ("from", "to", "class")),
+    "destination_popularity": (TOP_DESTINATIONS_COUNT, ()),
+    "destination_popularity:trending": (TOP_DESTINATIONS_TRENDING, ()),
+}
+
+
+def sample_values(conn):
+    """Bind values taken from the first generated flight (a popular route), or constants on an empty DB."""
+    row = conn.execute("""
+        SELECT lower(a1.city), lower(a2.city), DATE(f.time_departure), f.id
+        FROM flight f
+        JOIN airport a1 ON f.airport_depart_id = a1.id
+        JOIN airport a2 ON f.airport_arrive_id = a2.id
+        LIMIT 1
+    """).fetchone() or ("athens", "london", "2025-06-01", "XX0001")
+    user = conn.execute("SELECT user_id FROM hearts LIMIT 1").fetchone()
+    return {
+        "from": row[0], "to": row[1], "date": row[2], "flight": row[3],
+        "start": row[2], "end": "9999-12-31", "class": "economy", "price": 500, "limit": 5,
+        "user": user[0] if user else "nobody@example.com",
+    }
+
+def bind(shape, values):
+    sql, names = SHAPES[shape] if shape in SHAPES else DERIVED_SHAPES[shape]
+    return sql, tuple(values[n] for n in names)
+
+def explain(conn, sql, params=()):
+    """EXPLAIN QUERY PLAN detail lines, indented by depth."""
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    depth = {0: -1}
+    lines = []
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append("  " * depth[node_id] + detail)
+    return lines
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""Bulk repricing of future tickets from demand rules.
+
+Generated prices never change (seasonal_price_adjustment() × class
+multiplier, fixed at seeding). This module simulates fare moves on an
+existing database: it loads the ticket and flight columns of every flight
+departing after --as-of into arrays and recomputes each price as
+
+    base fare × days-to-departure × load factor × season × route popularity
+
+with the step tables below. The load factor is the share of the ticket's
+class already sold, out of its seat map's cabin or CLASS_SEATS. The base
+fare is the ticket's price before it was first repriced, kept in fare_base,
+so runs do not compound: repricing again for the same --as-of gives the
+same prices. Changed prices are written back
+in batches through a temp table and one join UPDATE per batch. The
+min-price aggregates that derived_tables.py and itineraries.py keep are then
+refreshed: touched flights via derived_tables.refresh(), or a rebuild when
+most flights changed.
+
+The numpy engine evaluates the rules as whole-column array operations. The
+python engine is the same arithmetic one ticket at a time, for installs
+without numpy; both give identical prices.
+
+    python repricing.py --as-of 2026-01-20 [--db data/flights.db] [--engine numpy] [--dry-run]
+"""
+from bisect import bisect_right
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+import argparse, sqlite3, sys
+
+import derived_tables
+import itineraries
+import schema
+try:
+    import numpy as np
+except ImportError:  # the python engine does the same per ticket
+    np = None
+
+THIS_DIR = Path(__file__).resolve().parent
+DB_PATH = THIS_DIR / "data" / "flights.db"
+ENGINES = ("python", "numpy")
+
+# (upper bound, multiplier): the first bound above the value applies
+DAYS_TO_DEPARTURE = [(3, 1.6), (7, 1.35), (14, 1.15), (30, 1.0), (60, 0.95), (float("inf"), 0.9)]
+LOAD_FACTOR = [(0.5, 0.9), (0.7, 1.0), (0.85, 1.15), (0.95, 1.3), (float("inf"), 1.5)]  # 1 - seats left / class capacity
+SEASON_DEMAND = {6: 1.1, 7: 1.15, 8: 1.1, 12: 1.1}  # departure month → multiplier, on top of the seeded season
+# a class's capacity without seat maps: the most seats the generators leave in it
+CLASS_SEATS = {"economy": 200, "business": 50, "first": 50}
+POPULARITY_BOOST = 0.2  # the route with the most hearts gets +20%, the others pro rata
+WRITE_BATCH = 50_000  # changed tickets per temp-table fill + join UPDATE
+REBUILD_FRACTION = 0.2  # above this share of flights touched, rebuild the derived tables instead of refresh()
+
+FARE_BASE_SQL = """
+CREATE TABLE IF NOT EXISTS fare_base (
+    code       TEXT    NOT NULL,
+    flight_id  TEXT    NOT NULL,
+    airline_id TEXT    NOT NULL,
+    price      INTEGER NOT NULL,  -- ticket.price before the first repricing
+    PRIMARY KEY (code, flight_id, airline_id)
+) STRICT, WITHOUT ROWID
+"""
+
+# Two narrow reads joined in Python: departure times are parsed once per flight,
+# and ticket ⋈ fare_base in primary-key order is a sequential walk of both.
+FLIGHTS_QUERY = """
+SELECT id, CAST(strftime('%s', time_departure) AS INTEGER),
+       CAST(strftime('%m', time_departure) AS INTEGER), airport_depart_id, airport_arrive_id
+FROM flight WHERE time_departure >= ?
+"""
+TICKETS_QUERY = """
+SELECT t.code, t.flight_id, t.airline_id, t.price, b.price, t.availability, lower(t.class), {capacity}
+FROM ticket t
+JOIN fare_base b ON b.code = t.code AND b.flight_id = t.flight_id AND b.airline_id = t.airline_id
+{seats}
+ORDER BY t.code, t.flight_id, t.airline_id
+"""
+# with seat_inventory.py's maps, a class holds as many seats as its cabin layout
+SEAT_CAPACITY = {
+    "capacity": "l.rows * length(replace(l.pattern, ' ', ''))",
+    "seats": "LEFT JOIN seat_map m ON m.flight_id = t.flight_id AND m.class = lower(t.class) "
+             "LEFT JOIN seat_layout l ON l.layout = m.layout AND l.class = m.class",
+}
+
+ROUTE_HEARTS_QUERY = """
+SELECT f.airport_depart_id, f.airport_arrive_id, COUNT(*)
+FROM hearts h JOIN flight f ON f.id = h.flight_id
+GROUP BY 1, 2
+"""
+
+# No key on purpose: with one, the planner (no stats on a temp table) walks all
+# of ticket per batch and probes reprice; without, it scans reprice and seeks ticket.
+REPRICE_TEMP_SQL = "CREATE TEMP TABLE IF NOT EXISTS reprice (code TEXT, flight_id TEXT, airline_id TEXT, price INTEGER)"
+# --surrogate-keys: ticket is a view; code is UNIQUE on ticket_base, so write there directly
+UPDATE_FROM_TEMP = {
+    "surrogate": "UPDATE ticket_base SET price = r.price FROM temp.reprice r WHERE ticket_base.code = r.code",
+    None: "UPDATE ticket SET price = r.price FROM temp.reprice r "
+          "WHERE ticket.code = r.code AND ticket.flight_id = r.flight_id AND ticket.airline_id = r.airline_id",
+}
+
+
+def _steps(table):
+    return [bound for bound, _ in table], [mul for _, mul in table]
+
+def load(conn, as_of):
+    """Columns of the tickets departing at or after `as_of`: ``(keys, columns)``.
+
+    keys are ``(code, flight_id, airline_id)``; columns holds price, base,
+    seats_left, capacity (of the ticket's class: its seat map's cabin, else
+    CLASS_SEATS), days (to departure), month and route_hearts, one value per
+    ticket.
+    """
+    conn.execute(FARE_BASE_SQL)
+    conn.execute("INSERT OR IGNORE INTO fare_base SELECT code, flight_id, airline_id, price FROM ticket")
+    flights = {row[0]: row[1:] for row in conn.execute(FLIGHTS_QUERY, (as_of.strftime("%Y-%m-%d %H:%M"),))}
+    has_maps = conn.execute("SELECT 1 FROM sqlite_schema WHERE name = 'seat_map'").fetchone()
+    query = TICKETS_QUERY.format(**SEAT_CAPACITY) if has_maps else TICKETS_QUERY.format(capacity="NULL", seats="")
+    tickets = [row for row in conn.execute(query) if row[1] in flights]
+    route_hearts = {(src, dst): n for src, dst, n in conn.execute(ROUTE_HEARTS_QUERY)}
+    as_of_s = as_of.timestamp() if as_of.tzinfo else (as_of - datetime(1970, 1, 1)).total_seconds()
+
+    keys = [row[:3] for row in tickets]
+    flight = [flights[row[1]] for row in tickets]
+    columns = {
+        "price": [row[3] for row in tickets],
+        "base": [row[4] for row in tickets],
+        "seats_left": [row[5] for row in tickets],
+        "capacity": [row[7] or CLASS_SEATS.get(row[6], 0) for row in tickets],
+        "days": [(f[0] - as_of_s) / 86400 for f in flight],
+        "month": [f[1] for f in flight],
+        "route_hearts": [route_hearts.get((f[2], f[3]), 0) for f in flight],
+    }
+    return keys, columns
+
+def numpy_prices(columns):
+    """New prices for load()'s columns, as whole-array operations."""
+    c = {name: np.asarray(values) for name, values in columns.items()}
+    bounds, muls = _steps(DAYS_TO_DEPARTURE)
+    dtd = np.asarray(muls)[np.searchsorted(bounds, c["days"], side="right")]
+    load_factor = np.clip(1 - c["seats_left"] / np.maximum(c["capacity"], 1), 0, 1)
+    bounds, muls = _steps(LOAD_FACTOR)
+    occupancy = np.asarray(muls)[np.searchsorted(bounds, load_factor, side="right")]
+    season = np.asarray([SEASON_DEMAND.get(m, 1.0) for m in range(13)])[c["month"]]
+    most = max(int(c["route_hearts"].max(initial=0)), 1)
+    popularity = 1 + POPULARITY_BOOST * (c["route_hearts"] / most)
+    return np.maximum((c["base"] * dtd * occupancy * season * popularity).astype(np.int64), 1).tolist()
+
+def python_prices(columns):
+    """numpy_prices(), one ticket at a time."""
+    dtd_bounds, dtd_muls = _steps(DAYS_TO_DEPARTURE)
+    load_bounds, load_muls = _steps(LOAD_FACTOR)
+    most = max(max(columns["route_hearts"], default=0), 1)
+    prices = []
+    for base, days, seats_left, capacity, month, hearts in zip(
+            columns["base"], columns["days"], columns["seats_left"], columns["capacity"], columns["month"],
+            columns["route_hearts"]):
+        load_factor = min(max(1 - seats_left / max(capacity, 1), 0), 1)
+        multiplied = (base * dtd_muls[bisect_right(dtd_bounds, days)] * load_muls[bisect_right(load_bounds, load_factor)]
+                      * SEASON_DEMAND.get(month, 1.0) * (1 + POPULARITY_BOOST * (hearts / most)))
+        prices.append(max(int(multiplied), 1))
+    return prices
+
+def write(conn, changes, batch=WRITE_BATCH):
+    """Apply ``[(code, flight_id, airline_id, price), …]`` through temp.reprice, `batch` rows per UPDATE."""
+    conn.execute(REPRICE_TEMP_SQL)
+    update = UPDATE_FROM_TEMP.get(schema.layout_of(conn), UPDATE_FROM_TEMP[None])
+    for start in range(0, len(changes), batch):
+        conn.execute("DELETE FROM temp.reprice")
+        conn.executemany("INSERT INTO temp.reprice VALUES (?,?,?,?)", changes[start:start + batch])
+        conn.execute(update)
+    conn.execute("DELETE FROM temp.reprice")
+
+def refresh_aggregates(conn, flight_ids):
+    """Bring flight_search / route_day_min_price / round_trip_matrix and itinerary up to date."""
+    has = {name for (name,) in conn.execute("SELECT name FROM sqlite_schema WHERE type = 'table'")}
+    done = []
+    if flight_ids and "flight_search" in has:
+        n_flights = conn.execute("SELECT COUNT(*) FROM flight").fetchone()[0]
+        if len(flight_ids) > REBUILD_FRACTION * n_flights:
+            derived_tables.build(conn, ["flight_search", "route_day_min_price", "round_trip_matrix"])
+            done.append("derived tables rebuilt")
+        else:
+            keys = derived_tables.refresh(conn, flight_ids)
+            done.append(f"derived tables refreshed ({keys:,} route-days)")
+    if flight_ids and "itinerary" in has:
+        rows, _, _ = itineraries.build(conn)
+        done.append(f"itinerary rebuilt ({rows:,} rows)")
+    return done
+
+def reprice(conn, as_of, engine="numpy", dry_run=False):
+    """Reprice the tickets departing after `as_of` inside the caller's transaction.
+
+    With `dry_run` nothing is written back to ticket, but fare_base may have
+    been created and filled: roll the transaction back to leave no trace.
+
+    Returns ``(tickets evaluated, tickets changed, {phase: seconds}, refresh notes)``.
+    """
+    timings = {}
+    t0 = perf_counter()
+    keys, columns = load(conn, as_of)
+    timings["load"] = perf_counter() - t0
+
+    t0 = perf_counter()
+    prices = (numpy_prices if engine == "numpy" else python_prices)(columns) if keys else []
+    changes = [key + (new,) for key, old, new in zip(keys, columns["price"], prices) if new != old]
+    timings["compute"] = perf_counter() - t0
+    if dry_run:
+        return len(keys), len(changes), timings, []
+
+    t0 = perf_counter()
+    write(conn, changes)
+    timings["write"] = perf_counter() - t0
+    t0 = perf_counter()
+    notes = refresh_aggregates(conn, sorted({change[1] for change in changes}))
+    timings["refresh"] = perf_counter() - t0
+    return len(keys), len(changes), timings, notes
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Reprice future tickets from demand rules.")
+    ap.add_argument("--db", type=Path, default=DB_PATH, help="database file (default: data/flights.db)")
+    ap.add_argument("--as-of", type=datetime.fromisoformat, default=datetime.now().replace(second=0, microsecond=0),
+                    help="the simulated 'now' (YYYY-MM-DD[ HH:MM]); flights before it are left alone (default: now)")
+    ap.add_argument("--engine", choices=ENGINES, default="numpy" if np is not None else "python")
+    ap.add_argument("--dry-run", action="store_true", help="compute and count the changes, write nothing")
+    args = ap.parse_args()
+    if args.engine == "numpy" and np is None:
+        ap.error("--engine numpy requires numpy (pip install numpy)")
+    if not args.db.exists():
+        ap.error(f"{args.db} does not exist")
+
+    conn = sqlite3.connect(args.db)
+    conn.execute("BEGIN")
+    evaluated, changed, timings, notes = reprice(conn, args.as_of, args.engine, args.dry_run)
+    if args.dry_run:  # load() seeds fare_base on a first run; a dry run keeps none of it
+        conn.rollback()
+    else:
+        conn.commit()
+    conn.close()
+    for phase, secs in timings.items():
+        print(f"• {phase:<8} {secs:6.2f}s", file=sys.stderr)
+    for note in notes:
+        print(f"• {note}", file=sys.stderr)
+    busy = timings["load"] + timings["compute"] + timings.get("write", 0.0)
+    print(f"✔ {evaluated:,} tickets repriced as of {args.as_of:%Y-%m-%d %H:%M}, {changed:,} changed "
+          f"({evaluated / busy if busy else 0:,.0f} tickets/s, {args.engine}){' — dry run' if args.dry_run else ''}")
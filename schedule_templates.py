@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""Weekly schedule templates, expanded into flight/ticket rows on demand.
+
+The generators write one flight row (and three ticket rows) per departure, and
+every route's time of day is drawn again for each day, so a 120-day horizon
+stores each route 120 times. A template is the route as an airline would
+publish it:
+
+    airline, depart → arrive airport, weekday mask (bit 0 = Monday),
+    departure time, block time, validity range, seats and fare per cabin
+
+derive() turns the stored route plan (schedule_route, saved by the seed) into
+templates: a route flown n times a day becomes n daily templates, a route
+flown every few days one template on that many weekdays. The times and fares
+are drawn once per template from the seed. instances() lazily yields the
+flights (and their tickets) that the templates put in a date window. expand()
+inserts those, and extend() continues from the last expanded day. Expanding
+is idempotent: an instance's flight id is its flight number plus the date
+(DP0042-20260105).
+
+    python schedule_templates.py derive [--db data/flights.db] [--valid-days 365]
+    python schedule_templates.py expand --from 2026-01-05 --to 2026-02-05
+    python schedule_templates.py extend --days 30
+    python schedule_templates.py report    # template vs expanded storage, one validity period
+"""
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from random import Random
+from time import perf_counter
+import argparse, json, sqlite3, sys
+
+import database_generator_FIXED as generator
+import derived_tables
+import index_pack
+import schema
+import seat_inventory
+from id_allocator import ticket_code
+
+THIS_DIR = Path(__file__).resolve().parent
+DB_PATH = THIS_DIR / "data" / "flights.db"
+BENCH_DIR = THIS_DIR / "data" / "bench"
+VALID_DAYS = 365
+
+TEMPLATE_SQL = """
+CREATE TABLE IF NOT EXISTS schedule_template (
+    id                INTEGER PRIMARY KEY,
+    flight_number     TEXT    NOT NULL UNIQUE,  -- instances are '<flight_number>-YYYYMMDD'
+    airline_id        TEXT    NOT NULL REFERENCES airline (id),
+    airport_depart_id TEXT    NOT NULL REFERENCES airport (id),
+    airport_arrive_id TEXT    NOT NULL REFERENCES airport (id),
+    weekdays          INTEGER NOT NULL CHECK (weekdays BETWEEN 1 AND 127),  -- bit 0 = Monday
+    dep_minute        INTEGER NOT NULL CHECK (dep_minute BETWEEN 0 AND 1439),
+    block_minutes     INTEGER NOT NULL CHECK (block_minutes > 0),
+    valid_from        TEXT    NOT NULL,  -- first and last departure day, inclusive
+    valid_to          TEXT    NOT NULL,
+    num_tickets       INTEGER NOT NULL,
+    base_price        INTEGER NOT NULL,  -- economy fare before season and class multipliers
+    seats             TEXT    NOT NULL   -- seats per cabin, generator.CLASSES order, space-separated
+) STRICT
+"""
+
+INSERT_TEMPLATE = "INSERT INTO schedule_template VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)"
+WINDOW_KEY = "template_expanded"  # schedule_meta: [[first, last], …] expanded days, disjoint and sorted
+
+
+def create(conn):
+    """schedule_template, referencing the *_base tables' codes under --surrogate-keys."""
+    sql = TEMPLATE_SQL
+    if schema.layout_of(conn) == "surrogate":
+        sql = sql.replace("REFERENCES airline (id)", "REFERENCES airline_base (id)") \
+                 .replace("REFERENCES airport (id)", "REFERENCES airport_base (id)")
+    conn.execute(sql)
+
+def weekday_mask(freq_per_day, rng):
+    """Weekdays a route flown `freq_per_day` (< 1) operates, spread over the week like departure_days()."""
+    per_week = max(1, int(round(freq_per_day * 7)))
+    first = rng.randrange(7)
+    return sum(1 << (first + int(i * 7 / per_week)) % 7 for i in range(per_week))
+
+def template_rows(routes, seed, valid_from, valid_days=VALID_DAYS):
+    """schedule_template rows for schedule_route rows ``(airline, depart, arrive, freq_per_day)``."""
+    valid_to = valid_from + timedelta(days=valid_days - 1)
+    numbers = {}
+    for index, (al_code, src_id, dst_id, freq_per_day) in enumerate(routes):
+        rng = Random(f"{seed}:template:{index}")
+        if freq_per_day >= 1:
+            masks = [127] * int(freq_per_day)
+        else:
+            masks = [weekday_mask(freq_per_day, rng)]
+        for mask in masks:
+            numbers[al_code] = numbers.get(al_code, 0) + 1
+            seats = [rng.randint(80, 200) if cls == "economy" else rng.randint(10, 50) for cls, _ in generator.CLASSES]
+            yield (None, f"{al_code}{numbers[al_code]:04d}", al_code, src_id, dst_id, mask,
+                   rng.randint(0, 23) * 60 + rng.randint(0, 59), rng.randint(60, 720),
+                   valid_from.isoformat(), valid_to.isoformat(), 200, rng.randint(40, 600),
+                   " ".join(map(str, seats)))
+
+def derive(conn, valid_days=VALID_DAYS, valid_from=None):
+    """Replace the templates with ones derived from the stored route plan; returns the template count."""
+    meta, routes = generator.load_schedule(conn)
+    valid_from = valid_from or datetime.fromisoformat(meta["start_date"]).date()
+    create(conn)
+    conn.execute("DELETE FROM schedule_template")
+    conn.execute("DELETE FROM schedule_meta WHERE key = ?", (WINDOW_KEY,))
+    return conn.executemany(INSERT_TEMPLATE, template_rows(routes, meta["seed"], valid_from, valid_days)).rowcount
+
+def load_templates(conn):
+    """Templates by weekday: ``[[template, …] for Monday … Sunday]``, each list in departure-time order."""
+    by_weekday = [[] for _ in range(7)]
+    for row in conn.execute("SELECT flight_number, airline_id, airport_depart_id, airport_arrive_id, weekdays, "
+                            "dep_minute, block_minutes, valid_from, valid_to, num_tickets, base_price, seats "
+                            "FROM schedule_template ORDER BY dep_minute, flight_number"):
+        template = row[:7] + (date.fromisoformat(row[7]), date.fromisoformat(row[8]), row[9], row[10],
+                              [int(n) for n in row[11].split()])
+        for weekday in range(7):
+            if template[4] >> weekday & 1:
+                by_weekday[weekday].append(template)
+    return by_weekday
+
+def instances(by_weekday, first, last):
+    """Yield ``(flight row, ticket rows)`` for every departure from day `first` to `last` inclusive.
+
+    Rows are in the generators' INSERT_FLIGHT / INSERT_TICKET column order,
+    day by day and by departure time within a day.
+    """
+    day = first
+    while day <= last:
+        midnight = datetime.combine(day, datetime.min.time())
+        season = generator.seasonal_price_adjustment(midnight)
+        stamp = day.strftime("%Y%m%d")
+        for (number, al_code, src_id, dst_id, _, dep_minute, block, valid_from, valid_to, num_tickets,
+             base_price, seats) in by_weekday[day.weekday()]:
+            if not valid_from <= day <= valid_to:
+                continue
+            fid = f"{number}-{stamp}"
+            dep = midnight + timedelta(minutes=dep_minute)
+            flight = (fid, num_tickets, generator.iso(dep), generator.iso(dep + timedelta(minutes=block)),
+                      src_id, dst_id, al_code)
+            tickets = [(ticket_code(fid, cls), fid, al_code, cls, int(base_price * season * mul), seats[c])
+                       for c, (cls, mul) in enumerate(generator.CLASSES)]
+            yield flight, tickets
+        day += timedelta(days=1)
+
+def expanded_ranges(conn):
+    """The expanded days as sorted, non-touching ``[(first, last), …]`` (inclusive)."""
+    row = conn.execute("SELECT value FROM schedule_meta WHERE key = ?", (WINDOW_KEY,)).fetchone()
+    return [(date.fromisoformat(a), date.fromisoformat(b)) for a, b in json.loads(row[0])] if row else []
+
+def merge_range(ranges, first, last):
+    """`ranges` with ``(first, last)`` added; ranges that overlap or touch it are joined, gaps are kept."""
+    merged = []
+    for a, b in sorted(ranges + [(first, last)]):
+        if merged and a <= merged[-1][1] + timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(b, merged[-1][1]))
+        else:
+            merged.append((a, b))
+    return merged
+
+def expand(conn, first, last):
+    """Insert the instances from `first` to `last` inside the caller's transaction; returns the new flight ids.
+
+    Instances already present are skipped. New flights get seat maps when the
+    database keeps them, and the derived tables, when built, are refreshed for
+    them (rebuild `itinerary` with itineraries.py).
+    """
+    cur = conn.cursor()
+    new_ids = []
+    for chunk in generator.chunked(instances(load_templates(conn), first, last), generator.CHUNK_SIZE):
+        present = {fid for fid, in conn.execute(
+            f"SELECT id FROM flight WHERE id IN ({','.join('?' * len(chunk))})", [f[0] for f, _ in chunk])}
+        chunk = [(flight, tickets) for flight, tickets in chunk if flight[0] not in present]
+        cur.executemany(generator.INSERT_FLIGHT, [flight for flight, _ in chunk])
+        cur.executemany(generator.INSERT_TICKET, (t for _, tickets in chunk for t in tickets))
+        new_ids += [flight[0] for flight, _ in chunk]
+    ranges = merge_range(expanded_ranges(conn), first, last)
+    conn.execute("INSERT OR REPLACE INTO schedule_meta VALUES (?, ?)",
+                 (WINDOW_KEY, json.dumps([[a.isoformat(), b.isoformat()] for a, b in ranges])))
+    if new_ids and seat_inventory.enabled(conn):
+        seat_inventory.build(conn, new_ids, seed=f"template:{first.isoformat()}")
+    if new_ids and conn.execute("SELECT 1 FROM sqlite_schema WHERE name = 'flight_search'").fetchone():
+        derived_tables.refresh(conn, new_ids)
+    return new_ids
+
+def extend(conn, days):
+    """expand() the `days` after the last expanded day (or from the templates' first valid day).
+
+    Gaps left between earlier expand() ranges stay until expanded explicitly.
+    """
+    ranges = expanded_ranges(conn)
+    if ranges:
+        first = ranges[-1][1] + timedelta(days=1)
+    else:
+        first = date.fromisoformat(conn.execute("SELECT MIN(valid_from) FROM schedule_template").fetchone()[0])
+    return expand(conn, first, first + timedelta(days=days - 1))
+
+def report(src, valid_days=VALID_DAYS):
+    """Bytes for one validity period stored as templates vs expanded, each in its own file under data/bench/."""
+    BENCH_DIR.mkdir(parents=True, exist_ok=True)
+    sizes = {}
+    for name in ("templates", "expanded"):
+        path = BENCH_DIR / f"schedule-{name}.db"
+        path.unlink(missing_ok=True)
+        conn = sqlite3.connect(path)
+        schema.create(conn)
+        conn.executescript(schema.SCHEDULE_SQL)
+        conn.execute("ATTACH DATABASE ? AS src", (str(src),))
+        conn.execute("BEGIN")
+        for table in ("airport", "airline", "schedule_route", "schedule_meta"):
+            conn.execute(f"INSERT INTO main.{table} SELECT * FROM src.{table} WHERE 1")
+        conn.commit()
+        conn.execute("DETACH DATABASE src")
+        conn.execute("BEGIN")
+        n_templates = derive(conn, valid_days)
+        t0 = perf_counter()
+        if name == "expanded":
+            first = date.fromisoformat(conn.execute("SELECT MIN(valid_from) FROM schedule_template").fetchone()[0])
+            n_flights = len(expand(conn, first, first + timedelta(days=valid_days - 1)))
+            conn.execute("DROP TABLE schedule_template")
+        expand_s = perf_counter() - t0
+        conn.commit()
+        index_pack.apply(conn, show_plans=False)
+        conn.commit()
+        conn.execute("VACUUM")
+        by_table = schema.table_sizes(conn)
+        tables = ("schedule_template",) if name == "templates" else ("flight", "ticket")
+        sizes[name] = {table: by_table[table] for table in tables}
+        conn.close()
+        path.unlink()
+    print(f"{valid_days} days: {n_templates:,} templates → {n_flights:,} flights, "
+          f"{n_flights * len(generator.CLASSES):,} tickets (expanded in {expand_s:.2f}s)")
+    print(f"{'':>18} {'table MB':>9} {'index MB':>9}")
+    for tables in sizes.values():
+        for table, (data, index) in tables.items():
+            print(f"{table:>18} {data / 1e6:>9.2f} {index / 1e6:>9.2f}")
+    stored = {name: sum(map(sum, tables.values())) for name, tables in sizes.items()}
+    print(f"templates take {stored['templates'] / stored['expanded']:.2%} of the expanded rows' bytes")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Weekly schedule templates and their lazy expansion.")
+    ap.add_argument("command", choices=("derive", "expand", "extend", "report"))
+    ap.add_argument("--db", type=Path, default=DB_PATH, help="database file (default: data/flights.db)")
+    ap.add_argument("--valid-days", type=int, default=VALID_DAYS, help="derive/report: validity of each template")
+    ap.add_argument("--from", dest="first", type=date.fromisoformat, help="expand: first departure day")
+    ap.add_argument("--to", dest="last", type=date.fromisoformat, help="expand: last departure day (inclusive)")
+    ap.add_argument("--days", type=int, default=30, help="extend: days to add after the last expanded one")
+    args = ap.parse_args()
+    if not args.db.exists():
+        ap.error(f"{args.db} does not exist")
+    if args.command == "expand" and not (args.first and args.last):
+        ap.error("expand needs --from and --to")
+
+    if args.command == "report":
+        report(args.db, args.valid_days)
+        sys.exit(0)
+    conn = sqlite3.connect(args.db)
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("BEGIN")
+    t0 = perf_counter()
+    if args.command == "derive":
+        print(f"✔ {derive(conn, args.valid_days):,} templates derived from schedule_route")
+    else:
+        new_ids = expand(conn, args.first, args.last) if args.command == "expand" else extend(conn, args.days)
+        ranges = ", ".join(f"{a} → {b}" for a, b in expanded_ranges(conn))
+        print(f"✔ {len(new_ids):,} flights materialized in {perf_counter() - t0:.2f}s (expanded {ranges})")
+    conn.commit()
+    conn.close()
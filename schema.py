@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""The flights.db schema, shared by every generator (and mirrored in lib/db.js).
+
+Tables are STRICT, so a price or count that is not an integer is rejected at
+insert time instead of being stored as TEXT or REAL. ticket and hearts are
+keyed by wide composite text keys; as rowid tables every row was stored twice,
+once in the table and once in the primary-key index. WITHOUT ROWID stores the
+row in the primary-key B-tree itself. flight and user stay rowid tables
+(flight rows are wide).
+
+SURROGATE_SQL (--surrogate-keys) keys airports, airlines, flights and
+tickets by integers behind views with the usual columns; LEGACY_SCHEMA_SQL is
+the previous layout, kept for comparison:
+
+    python schema.py dump [--layout legacy|compact|surrogate] > planing/schema.sql
+    python schema.py report [--db data/flights.db] [--lookups 20000]
+
+report copies the core tables of an existing database into one file per
+layout under data/bench/, applies the index pack and compares load time,
+on-disk size per table and index, and lookup latency.
+"""
+from pathlib import Path
+from random import Random
+from time import perf_counter
+import argparse, sqlite3, sys
+
+import index_pack
+
+THIS_DIR = Path(__file__).resolve().parent
+DB_PATH = THIS_DIR / "data" / "flights.db"
+BENCH_DIR = THIS_DIR / "data" / "bench"
+
+SCHEMA_SQL = """/* ===== USER ============================================================= */
+CREATE TABLE IF NOT EXISTS user (
+    id        TEXT PRIMARY KEY,
+    password  TEXT NOT NULL
+) STRICT;
+
+CREATE TABLE IF NOT EXISTS airport (
+    id      TEXT PRIMARY KEY,
+    city    TEXT NOT NULL,
+    country TEXT NOT NULL
+) STRICT;
+
+CREATE TABLE IF NOT EXISTS airline (
+    id           TEXT PRIMARY KEY,
+    name         TEXT NOT NULL,
+    website_link TEXT
+) STRICT;
+
+CREATE TABLE IF NOT EXISTS flight (
+    id                TEXT PRIMARY KEY,
+    airline_id        TEXT NOT NULL,
+    airport_depart_id TEXT NOT NULL,
+    airport_arrive_id TEXT NOT NULL,
+    time_departure    TEXT NOT NULL,
+    time_arrival      TEXT NOT NULL,
+    num_tickets       INTEGER NOT NULL CHECK (num_tickets >= 0),
+    FOREIGN KEY (airline_id)        REFERENCES airline (id),
+    FOREIGN KEY (airport_depart_id) REFERENCES airport (id),
+    FOREIGN KEY (airport_arrive_id) REFERENCES airport (id)
+) STRICT;
+
+CREATE TABLE IF NOT EXISTS ticket (
+    code         TEXT NOT NULL,
+    flight_id    TEXT NOT NULL,
+    airline_id   TEXT NOT NULL,
+    class        TEXT NOT NULL,
+    price        INTEGER NOT NULL CHECK (price >= 0),
+    availability INTEGER NOT NULL CHECK (availability >= 0),
+    PRIMARY KEY (code, flight_id, airline_id),
+    FOREIGN KEY (flight_id)  REFERENCES flight  (id),
+    FOREIGN KEY (airline_id) REFERENCES airline (id)
+) STRICT, WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS hearts (
+    ticket_code TEXT NOT NULL,
+    flight_id   TEXT NOT NULL,
+    airline_id  TEXT NOT NULL,
+    user_id     TEXT NOT NULL,
+    PRIMARY KEY (ticket_code, flight_id, airline_id, user_id),
+    FOREIGN KEY (ticket_code, flight_id, airline_id)
+        REFERENCES ticket (code, flight_id, airline_id),
+    FOREIGN KEY (user_id) REFERENCES user (id)
+) STRICT, WITHOUT ROWID;
+
+"""
+
+# What database_generator_FIXED.py created before this module: plain rowid
+# tables with declared types (affinity only, nothing enforced).
+LEGACY_SCHEMA_SQL = (SCHEMA_SQL.replace(") STRICT, WITHOUT ROWID;", ");")
+                               .replace(") STRICT;", ");")
+                               .replace("code         TEXT NOT NULL,", "code         TEXT,"))
+
+# --surrogate-keys: airports, airlines, flights and tickets get INTEGER
+# PRIMARY KEYs and reference each other by them; the codes stay as UNIQUE
+# columns. Views named like the tables above expose the usual text columns
+# (same names, same order), and INSTEAD OF triggers turn the app's and the
+# seeders' inserts, deletes and fare updates on them into writes to the
+# *_base tables. A ticket's airline is its flight's.
+SURROGATE_SQL = """/* ===== USER ============================================================= */
+CREATE TABLE IF NOT EXISTS user (
+    id        TEXT PRIMARY KEY,
+    password  TEXT NOT NULL
+) STRICT;
+
+CREATE TABLE IF NOT EXISTS airport_base (
+    sk      INTEGER PRIMARY KEY,
+    id      TEXT NOT NULL UNIQUE,
+    city    TEXT NOT NULL,
+    country TEXT NOT NULL
+) STRICT;
+
+CREATE TABLE IF NOT EXISTS airline_base (
+    sk           INTEGER PRIMARY KEY,
+    id           TEXT NOT NULL UNIQUE,
+    name         TEXT NOT NULL,
+    website_link TEXT
+) STRICT;
+
+CREATE TABLE IF NOT EXISTS flight_base (
+    sk             INTEGER PRIMARY KEY,
+    id             TEXT NOT NULL UNIQUE,
+    airline_sk     INTEGER NOT NULL REFERENCES airline_base (sk),
+    depart_sk      INTEGER NOT NULL REFERENCES airport_base (sk),
+    arrive_sk      INTEGER NOT NULL REFERENCES airport_base (sk),
+    time_departure TEXT NOT NULL,
+    time_arrival   TEXT NOT NULL,
+    num_tickets    INTEGER NOT NULL CHECK (num_tickets >= 0)
+) STRICT;
+
+CREATE TABLE IF NOT EXISTS ticket_base (
+    sk           INTEGER PRIMARY KEY,
+    code         TEXT NOT NULL UNIQUE,
+    flight_sk    INTEGER NOT NULL REFERENCES flight_base (sk),
+    class        TEXT NOT NULL,
+    price        INTEGER NOT NULL CHECK (price >= 0),
+    availability INTEGER NOT NULL CHECK (availability >= 0)
+) STRICT;
+
+CREATE TABLE IF NOT EXISTS hearts_base (
+    ticket_sk INTEGER NOT NULL REFERENCES ticket_base (sk),
+    user_id   TEXT NOT NULL REFERENCES user (id),
+    PRIMARY KEY (ticket_sk, user_id)
+) STRICT, WITHOUT ROWID;
+
+CREATE VIEW IF NOT EXISTS airport AS SELECT id, city, country FROM airport_base;
+
+CREATE VIEW IF NOT EXISTS airline AS SELECT id, name, website_link FROM airline_base;
+
+CREATE VIEW IF NOT EXISTS flight AS
+SELECT f.id, al.id AS airline_id, dep.id AS airport_depart_id, arr.id AS airport_arrive_id,
+       f.time_departure, f.time_arrival, f.num_tickets
+FROM flight_base f
+JOIN airline_base al  ON al.sk = f.airline_sk
+JOIN airport_base dep ON dep.sk = f.depart_sk
+JOIN airport_base arr ON arr.sk = f.arrive_sk;
+
+CREATE VIEW IF NOT EXISTS ticket AS
+SELECT t.code, f.id AS flight_id, al.id AS airline_id, t.class, t.price, t.availability
+FROM ticket_base t
+JOIN flight_base f   ON f.sk = t.flight_sk
+JOIN airline_base al ON al.sk = f.airline_sk;
+
+CREATE VIEW IF NOT EXISTS hearts AS
+SELECT t.code AS ticket_code, f.id AS flight_id, al.id AS airline_id, h.user_id
+FROM hearts_base h
+JOIN ticket_base t   ON t.sk = h.ticket_sk
+JOIN flight_base f   ON f.sk = t.flight_sk
+JOIN airline_base al ON al.sk = f.airline_sk;
+
+/* A key that does not resolve raises the error the compact layout's foreign keys
+   give: RAISE(ABORT) is not overridden by the INSERT OR IGNORE the app and the
+   seed use, which would silently drop a NULL key. A ticket's airline and a
+   heart's flight and airline must be the ones the ticket belongs to. */
+CREATE TRIGGER IF NOT EXISTS airport_insert INSTEAD OF INSERT ON airport BEGIN
+    INSERT INTO airport_base (id, city, country) VALUES (NEW.id, NEW.city, NEW.country);
+END;
+
+CREATE TRIGGER IF NOT EXISTS airline_insert INSTEAD OF INSERT ON airline BEGIN
+    INSERT INTO airline_base (id, name, website_link) VALUES (NEW.id, NEW.name, NEW.website_link);
+END;
+
+CREATE TRIGGER IF NOT EXISTS flight_insert INSTEAD OF INSERT ON flight BEGIN
+    INSERT INTO flight_base (id, airline_sk, depart_sk, arrive_sk, time_departure, time_arrival, num_tickets)
+    VALUES (NEW.id,
+            COALESCE((SELECT sk FROM airline_base WHERE id = NEW.airline_id),
+                     RAISE(ABORT, 'FOREIGN KEY constraint failed')),
+            COALESCE((SELECT sk FROM airport_base WHERE id = NEW.airport_depart_id),
+                     RAISE(ABORT, 'FOREIGN KEY constraint failed')),
+            COALESCE((SELECT sk FROM airport_base WHERE id = NEW.airport_arrive_id),
+                     RAISE(ABORT, 'FOREIGN KEY constraint failed')),
+            NEW.time_departure, NEW.time_arrival, NEW.num_tickets);
+END;
+
+CREATE TRIGGER IF NOT EXISTS flight_delete INSTEAD OF DELETE ON flight BEGIN
+    DELETE FROM flight_base WHERE id = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS ticket_insert INSTEAD OF INSERT ON ticket BEGIN
+    INSERT INTO ticket_base (code, flight_sk, class, price, availability)
+    VALUES (NEW.code,
+            COALESCE((SELECT f.sk FROM flight_base f JOIN airline_base al ON al.sk = f.airline_sk
+                      WHERE f.id = NEW.flight_id AND al.id = NEW.airline_id),
+                     RAISE(ABORT, 'FOREIGN KEY constraint failed')),
+            NEW.class, NEW.price, NEW.availability);
+END;
+
+CREATE TRIGGER IF NOT EXISTS ticket_update INSTEAD OF UPDATE OF price, availability ON ticket BEGIN
+    UPDATE ticket_base SET price = NEW.price, availability = NEW.availability WHERE code = OLD.code;
+END;
+
+CREATE TRIGGER IF NOT EXISTS ticket_delete INSTEAD OF DELETE ON ticket BEGIN
+    DELETE FROM ticket_base WHERE code = OLD.code;
+END;
+
+CREATE TRIGGER IF NOT EXISTS hearts_insert INSTEAD OF INSERT ON hearts BEGIN
+    INSERT INTO hearts_base (ticket_sk, user_id)
+    VALUES (COALESCE((SELECT t.sk FROM ticket_base t
+                      JOIN flight_base f   ON f.sk = t.flight_sk
+                      JOIN airline_base al ON al.sk = f.airline_sk
+                      WHERE t.code = NEW.ticket_code AND f.id = NEW.flight_id AND al.id = NEW.airline_id),
+                     RAISE(ABORT, 'FOREIGN KEY constraint failed')),
+            NEW.user_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS hearts_delete INSTEAD OF DELETE ON hearts BEGIN
+    DELETE FROM hearts_base
+    WHERE ticket_sk = (SELECT sk FROM ticket_base WHERE code = OLD.ticket_code) AND user_id = OLD.user_id;
+END;
+
+"""
+
+# --advance bookkeeping (see database_generator_FIXED.save_schedule()).
+# schedule_route is read back in rowid order.
+SCHEDULE_SQL = """
+CREATE TABLE IF NOT EXISTS schedule_route (
+    airline_id        TEXT NOT NULL REFERENCES airline (id),
+    airport_depart_id TEXT NOT NULL REFERENCES airport (id),
+    airport_arrive_id TEXT NOT NULL REFERENCES airport (id),
+    freq_per_day      REAL NOT NULL
+) STRICT;
+CREATE TABLE IF NOT EXISTS schedule_meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) STRICT, WITHOUT ROWID;
+"""
+
+# the plan references codes, which are the UNIQUE id columns of the base tables there
+SURROGATE_SQL += (SCHEDULE_SQL.replace("REFERENCES airline (id)", "REFERENCES airline_base (id)")
+                              .replace("REFERENCES airport (id)", "REFERENCES airport_base (id)"))
+
+LAYOUTS = {"legacy": LEGACY_SCHEMA_SQL, "compact": SCHEMA_SQL, "surrogate": SURROGATE_SQL}
+TABLES = ["user", "airport", "airline", "flight", "ticket", "hearts"]  # parents first
+
+# name → (SQL, sample it binds: a ticket (code, flight_id, airline_id), a
+# heart (ticket_code, flight_id, airline_id, user_id) or a route (depart,
+# arrive), positions bound). SQL is the same for every layout, or a dict with
+# the statement a layout's own tables call for.
+_ROUTE_FARES = ("SELECT t.class, MIN(t.price) FROM flight f JOIN ticket t ON t.flight_id = f.id "
+                "WHERE f.airport_depart_id = ? AND f.airport_arrive_id = ? GROUP BY t.class")
+LOOKUPS = {
+    "ticket by key": ("SELECT price, availability FROM ticket WHERE code = ? AND flight_id = ? AND airline_id = ?",
+                      "ticket", (0, 1, 2)),
+    "ticket by code": ("SELECT flight_id, price FROM ticket WHERE code = ?", "ticket", (0,)),
+    "tickets of flight": ("SELECT class, price, availability FROM ticket WHERE flight_id = ?", "ticket", (1,)),
+    "hearts of user": ("SELECT ticket_code, flight_id, airline_id FROM hearts WHERE user_id = ?", "heart", (3,)),
+    "heart exists": ("SELECT 1 FROM hearts WHERE ticket_code = ? AND flight_id = ? AND airline_id = ? AND user_id = ?",
+                     "heart", (0, 1, 2, 3)),
+    "route fares": (_ROUTE_FARES, "route", (0, 1)),
+    "route fares (own)": ({"surrogate": "SELECT t.class, MIN(t.price) FROM flight_base f "
+                                        "JOIN ticket_base t ON t.flight_sk = f.sk "
+                                        "WHERE f.depart_sk = (SELECT sk FROM airport_base WHERE id = ?) "
+                                        "AND f.arrive_sk = (SELECT sk FROM airport_base WHERE id = ?) GROUP BY t.class"},
+                          "route", (0, 1)),
+}
+
+
+def create(conn, layout="compact"):
+    """Create any missing core table in `layout`, or in the layout `conn` already has (commits)."""
+    conn.executescript(LAYOUTS[layout_of(conn) or layout])
+
+def layout_of(conn):
+    """"surrogate", "compact" or "legacy" for the core tables in `conn`; None before they exist."""
+    kind = conn.execute("SELECT type FROM sqlite_schema WHERE name = 'flight'").fetchone()
+    if kind is None:
+        return None
+    if kind[0] == "view":
+        return "surrogate"
+    without_rowid = conn.execute("SELECT wr FROM pragma_table_list WHERE schema = 'main' AND name = 'ticket'").fetchone()
+    return "compact" if without_rowid and without_rowid[0] else "legacy"
+
+def copy_core(src, dest, layout):
+    """Create `dest` in `layout`, copy the core tables of `src` into it and apply the index pack.
+
+    Returns the seconds spent inserting (the index pack is not included).
+    """
+    dest.unlink(missing_ok=True)
+    conn = sqlite3.connect(dest)
+    create(conn, layout)
+    conn.execute("ATTACH DATABASE ? AS src", (str(src),))
+    t0 = perf_counter()
+    conn.execute("BEGIN")
+    for table in TABLES:  # WHERE 1 keeps SQLite from page-copying tables whose schema matches
+        conn.execute(f"INSERT INTO main.{table} SELECT * FROM src.{table} WHERE 1")
+    conn.execute("COMMIT")
+    insert_s = perf_counter() - t0
+    conn.execute("DETACH DATABASE src")
+    index_pack.apply(conn, show_plans=False)
+    conn.commit()
+    conn.close()
+    return insert_s
+
+def table_sizes(conn):
+    """table → (table bytes, index bytes), from the dbstat virtual table."""
+    sizes = {}
+    for table, is_index, size in conn.execute("""
+        SELECT s.tbl_name, s.type = 'index' AND s.name <> s.tbl_name, SUM(d.pgsize)
+        FROM dbstat d JOIN sqlite_schema s ON s.name = d.name
+        GROUP BY s.tbl_name, 2
+    """):
+        entry = sizes.setdefault(table, [0, 0])
+        entry[1 if is_index else 0] += size
+    return sizes
+
+def lookup_pool(conn, size, seed=0):
+    """``{"ticket": [...], "heart": [...]}`` key samples for LOOKUPS."""
+    rng = Random(seed)
+    pool = {}
+    for kind, sql in [("ticket", "SELECT code, flight_id, airline_id FROM ticket"),
+                      ("heart", "SELECT ticket_code, flight_id, airline_id, user_id FROM hearts"),
+                      ("route", "SELECT DISTINCT airport_depart_id, airport_arrive_id FROM flight")]:
+        rows = conn.execute(sql).fetchall()
+        pool[kind] = rng.sample(rows, min(size, len(rows)))
+    return pool
+
+def time_lookups(conn, pool, n, layout):
+    """name → mean microseconds per lookup over `n` lookups (after one warm-up pass)."""
+    timings = {}
+    for name, (sql, kind, positions) in LOOKUPS.items():
+        if isinstance(sql, dict):
+            sql = sql.get(layout, _ROUTE_FARES)
+        binds = [tuple(row[i] for i in positions) for row in pool[kind]]
+        if not binds:
+            continue
+        for values in binds:
+            conn.execute(sql, values).fetchall()
+        t0 = perf_counter()
+        for i in range(n):
+            conn.execute(sql, binds[i % len(binds)]).fetchall()
+        timings[name] = (perf_counter() - t0) / n * 1e6
+    return timings
+
+def report(src, lookups=20000, pool_size=2000):
+    """Compare every layout in LAYOUTS on a copy of `src`; returns the per-layout results."""
+    BENCH_DIR.mkdir(parents=True, exist_ok=True)
+    with sqlite3.connect(src) as conn:
+        pool = lookup_pool(conn, pool_size)
+    results = {}
+    for layout in LAYOUTS:
+        path = BENCH_DIR / f"schema-{layout}.db"
+        print(f"• Copying {src.name} into the {layout} layout …", file=sys.stderr)
+        insert_s = copy_core(src, path, layout)
+        conn = sqlite3.connect(path)
+        results[layout] = {"insert_s": insert_s, "file_bytes": path.stat().st_size,
+                           "sizes": table_sizes(conn), "lookups_us": time_lookups(conn, pool, lookups, layout)}
+        conn.close()
+        path.unlink()
+
+    mb = lambda n: f"{n / 2**20:.1f}"
+    print(f"\n{'MB (table + indexes)':<22}" + "".join(f"{layout:>18}" for layout in LAYOUTS))
+    for table in TABLES:  # a --surrogate-keys table is stored as <table>_base
+        cells = [r["sizes"].get(table) or r["sizes"][f"{table}_base"] for r in results.values()]
+        print(f"{table:<22}" + "".join(f"{mb(t):>10} + {mb(i):>5}" for t, i in cells))
+    print(f"{'file':<22}" + "".join(f"{mb(r['file_bytes']):>18}" for r in results.values()))
+    print(f"{'insert s':<22}" + "".join(f"{r['insert_s']:>18.2f}" for r in results.values()))
+    print(f"\n{'lookup µs':<22}" + "".join(f"{layout:>18}" for layout in LAYOUTS))
+    for name in LOOKUPS:
+        print(f"{name:<22}" + "".join(f"{r['lookups_us'].get(name, float('nan')):>18.1f}" for r in results.values()))
+    return results
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Print the schema or compare the legacy, compact and surrogate layouts.")
+    ap.add_argument("command", choices=("dump", "report"))
+    ap.add_argument("--layout", choices=LAYOUTS, default="compact", help="with dump: the layout to print")
+    ap.add_argument("--db", type=Path, default=DB_PATH, help="with report: database to copy (default: data/flights.db)")
+    ap.add_argument("--lookups", type=int, default=20000, help="with report: timed lookups per query")
+    args = ap.parse_args()
+
+    if args.command == "dump":
+        print((LAYOUTS[args.layout] + ("" if args.layout == "surrogate" else SCHEDULE_SQL)).strip())
+    else:
+        if not args.db.exists():
+            ap.error(f"{args.db} not found; generate it first (python final_base_generation.py)")
+        report(args.db, args.lookups)
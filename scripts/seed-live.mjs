@@ -138,7 +138,7 @@ for (const r of routes) {
       flight: flightId,
       airline: airlineCode,
       class : tp.fareDetailsBySegment[0].cabin,
-      price : offer.price.total,
+      price : Math.round(Number(offer.price.total)),   // "123.45" → 123: ticket.price is STRICT INTEGER (whole euros)
       avail : offer.numberOfBookableSeats ?? 0
     }));
 
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""Seat-level inventory: one bitmap per flight and cabin, kept in step with ticket.availability.
+
+ticket.availability is only a count. seat_map adds the seats behind it: for
+every ticket a BLOB with one bit per seat of the cabin (1 = free), in the
+order of the cabin's layout template in seat_layout:
+
+    layout    class     first row  rows  pattern     (a space is an aisle)
+    standard  first          1      13   "AC DF"
+    standard  business      14       9   "AB CD EF"
+    standard  economy       23      34   "ABC DEF"
+
+Bit i is seat (first row + i // width, letter i % width), so 23A is bit 0 of
+the economy map and the whole economy cabin is 26 bytes. As Python ints the
+maps answer the usual questions with a few big-int operations:
+
+    free_count()  popcount of the map: the seats left
+    find_block()  the first run of n free seats side by side within a row,
+                  without crossing an aisle (map & map >> 1 & … & the
+                  layout's valid block starts)
+    reserve()     take n adjacent seats, or named ones, and decrement the ticket's
+    release()     availability (and flight_search's copy) in the same savepoint;
+                  the map is written back only if it is unchanged since it was
+                  read, so two writers can never sell the same seat
+
+build() draws the maps for existing tickets: `availability` free seats at
+random, the rest taken (a ticket with more seats than its cabin has is
+lowered to the cabin size), and flight.num_tickets becomes the layout's
+seat count, so the flight and its maps agree on capacity.
+database_generator_FIXED.py --seat-maps builds them at seeding and keeps
+them for --advance; schedule_templates.py expands them with new flights.
+benchmark_seat_inventory.py compares the maps with a row-per-seat table.
+
+    python seat_inventory.py build [--db data/flights.db] [--engine numpy]
+    python seat_inventory.py show FLIGHT_ID [--class economy]
+    python seat_inventory.py reserve FLIGHT_ID --class economy (--seats 3 | --seat 24C --seat 24D)
+    python seat_inventory.py release FLIGHT_ID --class economy --seat 24C --seat 24D
+    python seat_inventory.py check    # maps whose popcount differs from ticket.availability
+"""
+from pathlib import Path
+from random import Random
+from time import perf_counter
+import argparse, sqlite3, sys
+
+import schema
+try:
+    import numpy as np
+except ImportError:  # build() draws the maps in plain Python
+    np = None
+
+THIS_DIR = Path(__file__).resolve().parent
+DB_PATH = THIS_DIR / "data" / "flights.db"
+ENGINES = ("python", "numpy")
+CHUNK_SIZE = 20_000  # tickets per build() batch
+LAYOUT = "standard"
+LAYOUTS = {  # layout → class → (first row, rows, row pattern)
+    "standard": {
+        "first": (1, 13, "AC DF"),
+        "business": (14, 9, "AB CD EF"),
+        "economy": (23, 34, "ABC DEF"),
+    },
+}
+
+SEAT_SQL = """
+CREATE TABLE IF NOT EXISTS seat_layout (
+    layout    TEXT    NOT NULL,
+    class     TEXT    NOT NULL,
+    first_row INTEGER NOT NULL,
+    rows      INTEGER NOT NULL,
+    pattern   TEXT    NOT NULL,  -- seat letters of one row, a space per aisle
+    PRIMARY KEY (layout, class)
+) STRICT, WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS seat_map (
+    flight_id TEXT NOT NULL REFERENCES flight (id),
+    class     TEXT NOT NULL,
+    layout    TEXT NOT NULL,
+    seats     BLOB NOT NULL,  -- bit i (little-endian) set = seat i free
+    PRIMARY KEY (flight_id, class),
+    FOREIGN KEY (layout, class) REFERENCES seat_layout (layout, class)
+) STRICT, WITHOUT ROWID;
+"""
+
+# the tickets to map, in primary-key order; the class is matched case-insensitively
+TICKETS_QUERY = "SELECT code, flight_id, lower(class), availability FROM ticket {where} ORDER BY code"
+# --surrogate-keys: ticket is a view; code is UNIQUE on ticket_base, so write there directly
+UPDATE_AVAILABILITY = {
+    "surrogate": "UPDATE ticket_base SET availability = ? WHERE code = ?",
+    None: "UPDATE ticket SET availability = ? WHERE code = ?",
+}
+# flight.num_tickets becomes the seats of the flight's mapped cabins (flight is a view under --surrogate-keys)
+UPDATE_NUM_TICKETS = {
+    "surrogate": "UPDATE flight_base SET num_tickets = ? WHERE id = ?",
+    None: "UPDATE flight SET num_tickets = ? WHERE id = ?",
+}
+UPDATE_SEARCH = "UPDATE flight_search SET availability = ? WHERE flight_id = ? AND ticket_code = ?"
+
+
+class SeatsUnavailable(RuntimeError):
+    pass
+
+
+class Cabin:
+    """One class of a layout template: seat labels ↔ bit indexes and the valid block starts."""
+
+    def __init__(self, first_row, rows, pattern):
+        self.first_row, self.rows, self.pattern = first_row, rows, pattern
+        self.letters = pattern.replace(" ", "")
+        self.width = len(self.letters)
+        self.capacity = rows * self.width
+        self.full = (1 << self.capacity) - 1
+        self.n_bytes = (self.capacity + 7) // 8
+        self.groups, col = [], 0  # (first column, columns) of each run of seats between aisles
+        for run in pattern.split():
+            self.groups.append((col, len(run)))
+            col += len(run)
+        self._starts = {}
+
+    def label(self, i):
+        return f"{self.first_row + i // self.width}{self.letters[i % self.width]}"
+
+    def index(self, label):
+        row, letter = int(label[:-1]), label[-1].upper()
+        if not (self.first_row <= row < self.first_row + self.rows and letter in self.letters):
+            raise ValueError(f"no seat {label} in rows {self.first_row}-{self.first_row + self.rows - 1} "
+                             f"{self.pattern!r}")
+        return (row - self.first_row) * self.width + self.letters.index(letter)
+
+    def starts(self, n):
+        """Bits of the seats that can open a block of `n` without leaving the row or crossing an aisle."""
+        mask = self._starts.get(n)
+        if mask is None:
+            row = sum(1 << (col + k) for col, size in self.groups for k in range(size - n + 1))
+            mask = self._starts[n] = sum(row << (r * self.width) for r in range(self.rows))
+        return mask
+
+
+def cabins(layout=LAYOUT):
+    return {cls: Cabin(*spec) for cls, spec in LAYOUTS[layout].items()}
+
+def free_count(seats):
+    """Seats left in a map (BLOB or int)."""
+    if isinstance(seats, (bytes, memoryview)):
+        seats = int.from_bytes(seats, "little")
+    return seats.bit_count()
+
+def find_block(cabin, seats, n):
+    """Bit index of the first of `n` adjacent free seats in map `seats` (an int), or None."""
+    if n < 1 or n > max(size for _, size in cabin.groups):
+        return None
+    runs = seats
+    for k in range(1, n):
+        runs &= seats >> k
+    runs &= cabin.starts(n)
+    return (runs & -runs).bit_length() - 1 if runs else None
+
+def free_seats(cabin, seats):
+    return [cabin.label(i) for i in range(cabin.capacity) if seats >> i & 1]
+
+def create(conn):
+    """seat_layout (with the templates above) and seat_map; under --surrogate-keys, keyed on flight_base codes."""
+    sql = SEAT_SQL
+    if schema.layout_of(conn) == "surrogate":
+        sql = sql.replace("REFERENCES flight (id)", "REFERENCES flight_base (id)")
+    for statement in sql.split(";")[:-1]:
+        conn.execute(statement)
+    conn.executemany("INSERT OR IGNORE INTO seat_layout VALUES (?,?,?,?,?)",
+                     [(layout, cls, *spec) for layout, classes in LAYOUTS.items() for cls, spec in classes.items()])
+
+def enabled(conn):
+    """Whether `conn` keeps seat maps (so loaders should build them for new flights)."""
+    return conn.execute("SELECT 1 FROM sqlite_schema WHERE name = 'seat_map'").fetchone() is not None
+
+def _set_availability(conn, rows):
+    """Write ``[(availability, code, flight_id), …]`` to ticket and, when built, flight_search."""
+    conn.executemany(UPDATE_AVAILABILITY.get(schema.layout_of(conn), UPDATE_AVAILABILITY[None]),
+                     [(n, code) for n, code, _ in rows])
+    if conn.execute("SELECT 1 FROM sqlite_schema WHERE name = 'flight_search'").fetchone():
+        conn.executemany(UPDATE_SEARCH, [(n, fid, code) for n, code, fid in rows])
+
+def python_maps(cabin, free, rng):
+    """One map per entry of `free` (seats left), the free seats drawn at random."""
+    seats = range(cabin.capacity)
+    maps = []
+    for n in free:
+        bits = 0
+        for i in rng.sample(seats, min(n, cabin.capacity - n)):  # draw whichever side is smaller
+            bits |= 1 << i
+        maps.append((bits if 2 * n <= cabin.capacity else cabin.full ^ bits).to_bytes(cabin.n_bytes, "little"))
+    return maps
+
+def numpy_maps(cabin, free, gen):
+    """python_maps() as array operations: rank random keys per row, keep the `free` lowest ranks."""
+    ranks = gen.random((len(free), cabin.capacity)).argsort(axis=1).argsort(axis=1)
+    bits = np.packbits(ranks < np.asarray(free)[:, None], axis=1, bitorder="little")
+    return [row.tobytes() for row in bits]
+
+def build(conn, flight_ids=None, engine="python", seed=0, layout=LAYOUT):
+    """Draw seat maps for the tickets of `flight_ids` (all tickets when None) in the caller's transaction.
+
+    Existing maps of those flights are replaced, and their num_tickets is
+    set to the seats of the cabins mapped (310 for the standard layout).
+    Returns ``(maps written, tickets lowered to their cabin size)``.
+    """
+    create(conn)
+    where = ""
+    if flight_ids is not None:
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS seat_flight (id TEXT PRIMARY KEY)")
+        conn.execute("DELETE FROM seat_flight")
+        conn.executemany("INSERT OR IGNORE INTO seat_flight VALUES (?)", ((fid,) for fid in flight_ids))
+        where = "WHERE flight_id IN (SELECT id FROM temp.seat_flight)"
+    by_class = cabins(layout)
+    rng = Random(seed)  # any hashable seed; numpy's generator is seeded from it
+    gen = np.random.default_rng(rng.getrandbits(64)) if engine == "numpy" else None
+    written, lowered, seats = 0, [], {}
+    tickets = conn.execute(TICKETS_QUERY.format(where=where)).fetchall()
+    for start in range(0, len(tickets), CHUNK_SIZE):
+        chunk = tickets[start:start + CHUNK_SIZE]
+        for cls, cabin in by_class.items():
+            rows = [(code, fid, min(n, cabin.capacity)) for code, fid, c, n in chunk if c == cls]
+            if not rows:
+                continue
+            lowered += [(cabin.capacity, code, fid) for code, fid, c, n in chunk if c == cls and n > cabin.capacity]
+            free = [n for _, _, n in rows]
+            maps = numpy_maps(cabin, free, gen) if gen is not None else python_maps(cabin, free, rng)
+            conn.executemany("INSERT OR REPLACE INTO seat_map VALUES (?,?,?,?)",
+                             [(fid, cls, layout, seats) for (_, fid, _), seats in zip(rows, maps)])
+            written += len(rows)
+            for _, fid, _ in rows:
+                seats[fid] = seats.get(fid, 0) + cabin.capacity
+    _set_availability(conn, lowered)
+    conn.executemany(UPDATE_NUM_TICKETS.get(schema.layout_of(conn), UPDATE_NUM_TICKETS[None]),
+                     ((n, fid) for fid, n in seats.items()))
+    return written, len(lowered)
+
+def load(conn, flight_id, cls):
+    """``(cabin, map as an int, the map BLOB as stored, ticket code)`` of one flight and class."""
+    row = conn.execute("SELECT m.seats, l.first_row, l.rows, l.pattern FROM seat_map m "
+                       "JOIN seat_layout l ON l.layout = m.layout AND l.class = m.class "
+                       "WHERE m.flight_id = ? AND m.class = ?", (flight_id, cls)).fetchone()
+    if row is None:
+        raise KeyError(f"no {cls} seat map for flight {flight_id}")
+    code = conn.execute("SELECT code FROM ticket WHERE flight_id = ? AND lower(class) = ?", (flight_id, cls)).fetchone()
+    return Cabin(*row[1:]), int.from_bytes(row[0], "little"), row[0], code[0] if code else None
+
+def _swap(conn, flight_id, cls, cabin, old_blob, new, code):
+    """Write map `new` only if the stored one is still `old_blob`, then the ticket's availability."""
+    updated = conn.execute("UPDATE seat_map SET seats = ? WHERE flight_id = ? AND class = ? AND seats = ?",
+                           (new.to_bytes(cabin.n_bytes, "little"), flight_id, cls, old_blob)).rowcount
+    if not updated:
+        raise SeatsUnavailable(f"{flight_id} {cls}: seat map changed concurrently, retry")
+    if code is not None:
+        _set_availability(conn, [(free_count(new), code, flight_id)])
+
+def reserve(conn, flight_id, cls, n=1, seats=None):
+    """Take `seats` (labels) or the first `n` adjacent free seats; returns the labels taken.
+
+    Runs in a savepoint, so it is atomic inside or outside the caller's
+    transaction. Raises SeatsUnavailable when the seats are taken or no block
+    of `n` is left.
+    """
+    conn.execute("SAVEPOINT reserve")
+    try:
+        cabin, bits, blob, code = load(conn, flight_id, cls)
+        if seats:
+            taken = [cabin.index(label) for label in seats]
+            busy = [cabin.label(i) for i in taken if not bits >> i & 1]
+            if busy:
+                raise SeatsUnavailable(f"{flight_id} {cls}: {' '.join(busy)} already taken")
+        else:
+            first = find_block(cabin, bits, n)
+            if first is None:
+                raise SeatsUnavailable(f"{flight_id} {cls}: no {n} adjacent seats free ({free_count(bits)} left)")
+            taken = range(first, first + n)
+        mask = sum(1 << i for i in set(taken))
+        _swap(conn, flight_id, cls, cabin, blob, bits & ~mask, code)
+    except BaseException:
+        conn.execute("ROLLBACK TO reserve")
+        conn.execute("RELEASE reserve")
+        raise
+    conn.execute("RELEASE reserve")
+    return [cabin.label(i) for i in taken]
+
+def release(conn, flight_id, cls, seats):
+    """Give back `seats` (labels) taken by reserve(); atomic like reserve()."""
+    conn.execute("SAVEPOINT release")
+    try:
+        cabin, bits, blob, code = load(conn, flight_id, cls)
+        mask = sum(1 << cabin.index(label) for label in set(seats))
+        if bits & mask:
+            free = [cabin.label(i) for i in range(cabin.capacity) if (bits & mask) >> i & 1]
+            raise SeatsUnavailable(f"{flight_id} {cls}: {' '.join(free)} not reserved")
+        _swap(conn, flight_id, cls, cabin, blob, bits | mask, code)
+    except BaseException:
+        conn.execute("ROLLBACK TO release")
+        conn.execute("RELEASE release")
+        raise
+    conn.execute("RELEASE release")
+
+def check(conn):
+    """Tickets whose availability differs from their map's popcount: ``[(code, availability, free seats)]``."""
+    return [(code, n, free_count(seats)) for code, n, seats in conn.execute(
+        "SELECT t.code, t.availability, m.seats FROM ticket t "
+        "JOIN seat_map m ON m.flight_id = t.flight_id AND m.class = lower(t.class)")
+        if free_count(seats) != n]
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Per-flight seat bitmaps behind ticket.availability.")
+    ap.add_argument("command", choices=("build", "show", "reserve", "release", "check"))
+    ap.add_argument("flight_id", nargs="?")
+    ap.add_argument("--db", type=Path, default=DB_PATH, help="database file (default: data/flights.db)")
+    ap.add_argument("--class", dest="cls", choices=tuple(LAYOUTS[LAYOUT]), default="economy")
+    ap.add_argument("--seats", type=int, default=1, help="reserve: adjacent seats to take")
+    ap.add_argument("--seat", action="append", default=[], help="reserve/release: a seat label (repeatable)")
+    ap.add_argument("--engine", choices=ENGINES, default="numpy" if np is not None else "python",
+                    help="build: how the maps are drawn")
+    ap.add_argument("--seed", type=int, default=0, help="build: random seed for the taken seats")
+    args = ap.parse_args()
+    if args.engine == "numpy" and np is None:
+        ap.error("--engine numpy requires numpy (pip install numpy)")
+    if not args.db.exists():
+        ap.error(f"{args.db} does not exist")
+    if args.command in ("show", "reserve", "release") and not args.flight_id:
+        ap.error(f"{args.command} needs a FLIGHT_ID")
+    if args.command == "release" and not args.seat:
+        ap.error("release needs --seat")
+
+    conn = sqlite3.connect(args.db)
+    conn.execute("PRAGMA foreign_keys = ON")
+    t0 = perf_counter()
+    try:
+        if args.command == "build":
+            conn.execute("BEGIN")
+            written, lowered = build(conn, engine=args.engine, seed=args.seed)
+            conn.commit()
+            print(f"✔ {written:,} seat maps in {perf_counter() - t0:.2f}s ({args.engine})"
+                  f"{f', {lowered:,} tickets lowered to their cabin size' if lowered else ''}")
+        elif args.command == "check":
+            bad = check(conn)
+            for row in bad[:10]:
+                print("  ", row)
+            print(f"{'✖' if bad else '✔'} {len(bad):,} tickets out of step with their seat map")
+            sys.exit(1 if bad else 0)
+        elif args.command == "show":
+            cabin, bits, _, _ = load(conn, args.flight_id, args.cls)
+            for r in range(cabin.rows):
+                row, i = [], r * cabin.width
+                for run in cabin.pattern.split():
+                    row.append("".join(ch if bits >> (i + k) & 1 else "·" for k, ch in enumerate(run)))
+                    i += len(run)
+                print(f"{cabin.first_row + r:>4}  {'  '.join(row)}")
+            print(f"{free_count(bits)} of {cabin.capacity} free")
+        elif args.command == "reserve":
+            taken = reserve(conn, args.flight_id, args.cls, args.seats, args.seat)
+            conn.commit()
+            print(f"✔ reserved {' '.join(taken)} on {args.flight_id} ({args.cls})")
+        else:
+            release(conn, args.flight_id, args.cls, args.seat)
+            conn.commit()
+            print(f"✔ released {' '.join(args.seat)} on {args.flight_id} ({args.cls})")
+    except (KeyError, ValueError, SeatsUnavailable) as e:
+        sys.exit(f"✖ {e.args[0]}")
+    finally:
+        conn.close()
@@ -0,0 +1,47 @@
+import sqlite3, unittest
+
+import derived_tables
+import query_shapes
+import schema
+
+
+def two_routes():
+    """Generator-style rows and live-seeded ones (mixed-case city and class, ISO times) on Cairo → Berlin."""
+    conn = sqlite3.connect(":memory:")
+    schema.create(conn)
+    conn.executemany("INSERT INTO airport VALUES (?,?,?)", [("CAI", "Cairo", "EG"), ("BER", "Berlin", "DE")])
+    conn.execute("INSERT INTO airline VALUES ('XX', 'Example Air', NULL)")
+    conn.executemany("INSERT INTO flight VALUES (?, 'XX', 'CAI', 'BER', ?, ?, 300)",
+                     [("XX0001", "2026-03-10 10:00", "2026-03-10 14:15"),
+                      ("XX0002", "2026-03-10T22:30:00", "2026-03-11T02:05:00"),
+                      ("XX0003", "2026-03-11 07:00", "2026-03-11 11:00")])
+    conn.executemany("INSERT INTO ticket VALUES (?,?,'XX',?,?,?)",
+                     [("XX0001-E", "XX0001", "economy", 120, 10), ("XX0001-B", "XX0001", "business", 400, 5),
+                      ("XX0002-M-0", "XX0002", "ECONOMY", 90, 3), ("XX0003-E", "XX0003", "economy", 150, 0)])
+    derived_tables.build_flight_search(conn)
+    return conn
+
+
+class FlightSearchTest(unittest.TestCase):
+    SEARCHES = [  # (search_*_sql() options, bound values after from/to/class)
+        ({"sort_by": "price_asc"}, ["2026-03-10"]),
+        ({"departure_date": False, "max_price": True, "sort_by": "duration_asc"}, [200]),
+        ({"departure_date": False, "max_duration": True}, [240]),
+    ]
+
+    def test_rows_match_search_tickets(self):
+        conn = two_routes()
+        for options, values in self.SEARCHES:
+            for origin, destination in (("Cairo", "Berlin"), ("cairo", "BERLIN")):
+                params = [origin, destination, "Economy", *values, 50]
+                with self.subTest(options=options, origin=origin):
+                    app = conn.execute(query_shapes.search_tickets_sql(**options), params).fetchall()
+                    derived = conn.execute(query_shapes.search_flights_sql(**options), params).fetchall()
+                    self.assertTrue(app)
+                    self.assertEqual(sorted(derived), sorted(app))
+                    if "sort_by" in options:
+                        self.assertEqual(derived, app)
+
+
+if __name__ == "__main__":
+    unittest.main()
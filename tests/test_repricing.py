@@ -0,0 +1,43 @@
+from datetime import datetime
+import sqlite3, unittest
+
+import repricing
+import schema
+
+
+def two_flights(availability):
+    """Two flights on one route and day with a 100 € economy ticket each, `availability` seats left."""
+    conn = sqlite3.connect(":memory:")
+    schema.create(conn)
+    conn.executemany("INSERT INTO airport VALUES (?,?,?)", [("AAA", "Athens", "GR"), ("BBB", "Berlin", "DE")])
+    conn.execute("INSERT INTO airline VALUES ('XX', 'Example Air', NULL)")
+    for fid, seats_left in zip(("XX0001", "XX0002"), availability):
+        conn.execute("INSERT INTO flight VALUES (?, 'XX', 'AAA', 'BBB', '2026-03-10 10:00', '2026-03-10 13:00', 200)",
+                     (fid,))
+        conn.execute("INSERT INTO ticket VALUES (?, ?, 'XX', 'economy', 100, ?)", (f"{fid}-E", fid, seats_left))
+    return conn
+
+
+class LoadFactorTest(unittest.TestCase):
+    def prices(self, engine):
+        conn = two_flights([190, 20])  # 5% and 90% of the economy cabin sold
+        repricing.reprice(conn, datetime(2026, 2, 1), engine)
+        return dict(conn.execute("SELECT flight_id, price FROM ticket"))
+
+    def test_occupancy_band_changes_the_price(self):
+        # 37 days out (× 0.95), March (× 1.0), no hearts: only the load factor differs
+        self.assertEqual(self.prices("python"), {"XX0001": int(100 * 0.95 * 0.9), "XX0002": int(100 * 0.95 * 1.3)})
+
+    @unittest.skipIf(repricing.np is None, "numpy is not installed")
+    def test_engines_agree(self):
+        self.assertEqual(self.prices("numpy"), self.prices("python"))
+
+    def test_dry_run_writes_no_price(self):
+        conn = two_flights([190, 20])
+        evaluated, changed, _, _ = repricing.reprice(conn, datetime(2026, 2, 1), "python", dry_run=True)
+        self.assertEqual((evaluated, changed), (2, 2))
+        self.assertEqual({price for price, in conn.execute("SELECT price FROM ticket")}, {100})
+
+
+if __name__ == "__main__":
+    unittest.main()
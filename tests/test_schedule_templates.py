@@ -0,0 +1,51 @@
+from datetime import date
+import json, sqlite3, unittest
+
+import schema
+import schedule_templates
+
+
+def seeded(start="2026-10-01"):
+    """An in-memory database with two airports, one airline and a daily route in the stored plan."""
+    conn = sqlite3.connect(":memory:")
+    schema.create(conn)
+    conn.executescript(schema.SCHEDULE_SQL)
+    conn.executemany("INSERT INTO airport VALUES (?,?,?)", [("AAA", "Athens", "GR"), ("BBB", "Berlin", "DE")])
+    conn.execute("INSERT INTO airline VALUES ('XX', 'Example Air', NULL)")
+    conn.execute("INSERT INTO schedule_route VALUES ('XX', 'AAA', 'BBB', 1.0)")
+    conn.executemany("INSERT INTO schedule_meta VALUES (?, ?)",
+                     [("seed", json.dumps(1)), ("start_date", json.dumps(start))])
+    schedule_templates.derive(conn)
+    return conn
+
+
+class ExpandRangesTest(unittest.TestCase):
+    def test_separate_ranges_keep_their_gap(self):
+        conn = seeded()
+        schedule_templates.expand(conn, date(2026, 10, 1), date(2026, 10, 10))
+        schedule_templates.expand(conn, date(2026, 11, 1), date(2026, 11, 3))
+        self.assertEqual(schedule_templates.expanded_ranges(conn),
+                         [(date(2026, 10, 1), date(2026, 10, 10)), (date(2026, 11, 1), date(2026, 11, 3))])
+
+        new_ids = schedule_templates.expand(conn, date(2026, 10, 11), date(2026, 10, 31))
+        self.assertEqual(len(new_ids), 21)  # the gap was never built
+        self.assertEqual(schedule_templates.expanded_ranges(conn), [(date(2026, 10, 1), date(2026, 11, 3))])
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM flight").fetchone()[0], 34)
+
+    def test_adjacent_ranges_merge_and_extend_continues(self):
+        conn = seeded()
+        schedule_templates.expand(conn, date(2026, 10, 1), date(2026, 10, 10))
+        schedule_templates.expand(conn, date(2026, 10, 11), date(2026, 10, 12))
+        self.assertEqual(schedule_templates.expanded_ranges(conn), [(date(2026, 10, 1), date(2026, 10, 12))])
+        self.assertEqual(len(schedule_templates.extend(conn, 3)), 3)
+        self.assertEqual(schedule_templates.expanded_ranges(conn), [(date(2026, 10, 1), date(2026, 10, 15))])
+
+    def test_expanding_again_inserts_nothing(self):
+        conn = seeded()
+        schedule_templates.expand(conn, date(2026, 10, 1), date(2026, 10, 5))
+        self.assertEqual(schedule_templates.expand(conn, date(2026, 10, 1), date(2026, 10, 5)), [])
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM ticket").fetchone()[0], 15)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import sqlite3, unittest
+
+import schema
+
+# model/model-betterSqlite3.mjs addFavorite()
+ADD_FAVORITE = "INSERT OR IGNORE INTO hearts (ticket_code, flight_id, airline_id, user_id) VALUES (?, ?, ?, ?)"
+
+
+def with_ticket(layout):
+    """A `layout` database holding one flight XX0001 (airline XX) with ticket XX0001-E and user u1."""
+    conn = sqlite3.connect(":memory:")
+    conn.execute("PRAGMA foreign_keys = ON")
+    schema.create(conn, layout)
+    conn.executemany("INSERT INTO airport VALUES (?,?,?)", [("AAA", "Athens", "GR"), ("BBB", "Berlin", "DE")])
+    conn.executemany("INSERT INTO airline VALUES (?, ?, NULL)", [("XX", "Example Air"), ("YY", "Other Air")])
+    conn.execute("INSERT INTO user VALUES ('u1', 'secret')")
+    conn.execute("INSERT INTO flight VALUES ('XX0001', 'XX', 'AAA', 'BBB', '2026-03-10 10:00', '2026-03-10 13:00', 300)")
+    conn.execute("INSERT INTO ticket VALUES ('XX0001-E', 'XX0001', 'XX', 'economy', 100, 200)")
+    return conn
+
+
+class KeyResolutionTest(unittest.TestCase):
+    """The surrogate layout's view triggers reject what the compact layout's foreign keys reject."""
+
+    def test_add_favorite(self):
+        for layout in ("compact", "surrogate"):
+            with self.subTest(layout=layout):
+                conn = with_ticket(layout)
+                conn.execute(ADD_FAVORITE, ("XX0001-E", "XX0001", "XX", "u1"))
+                conn.execute(ADD_FAVORITE, ("XX0001-E", "XX0001", "XX", "u1"))  # already there: ignored
+                for heart in [("NOPE-E", "XX0001", "XX", "u1"), ("XX0001-E", "BOGUS", "XX", "u1"),
+                              ("XX0001-E", "XX0001", "YY", "u1")]:
+                    with self.assertRaisesRegex(sqlite3.IntegrityError, "FOREIGN KEY constraint failed"):
+                        conn.execute(ADD_FAVORITE, heart)
+                self.assertEqual(conn.execute("SELECT * FROM hearts").fetchall(),
+                                 [("XX0001-E", "XX0001", "XX", "u1")])
+
+    def test_flight_and_ticket_keys(self):
+        for layout in ("compact", "surrogate"):
+            with self.subTest(layout=layout):
+                conn = with_ticket(layout)
+                for sql in ["INSERT OR IGNORE INTO flight VALUES "
+                            "('XX0002', 'ZZ', 'AAA', 'BBB', '2026-03-11 10:00', '2026-03-11 13:00', 300)",
+                            "INSERT OR IGNORE INTO flight VALUES "
+                            "('XX0002', 'XX', 'AAA', 'CCC', '2026-03-11 10:00', '2026-03-11 13:00', 300)",
+                            "INSERT OR IGNORE INTO ticket VALUES ('XX0002-E', 'XX0002', 'XX', 'economy', 100, 200)"]:
+                    with self.assertRaisesRegex(sqlite3.IntegrityError, "FOREIGN KEY constraint failed"):
+                        conn.execute(sql)
+                self.assertEqual(conn.execute("SELECT COUNT(*) FROM flight").fetchone()[0], 1)
+                self.assertEqual(conn.execute("SELECT COUNT(*) FROM ticket").fetchone()[0], 1)
+
+    def test_ticket_airline_is_its_flights(self):
+        conn = with_ticket("surrogate")  # ticket_base has no airline of its own to store another one in
+        with self.assertRaisesRegex(sqlite3.IntegrityError, "FOREIGN KEY constraint failed"):
+            conn.execute("INSERT OR IGNORE INTO ticket VALUES ('XX0001-B', 'XX0001', 'YY', 'business', 300, 50)")
+
+
+if __name__ == "__main__":
+    unittest.main()
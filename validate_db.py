@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Referential-integrity validation for data/flights.db.
+
+Every FOREIGN KEY declared in the schema (flight → airport/airline,
+ticket → flight/airline, hearts → ticket/user, …) is checked with one SQL
+anti-join, so the cost is a single indexed pass per relation no matter how many
+rows are bad. Violations are counted and sampled into a JSON-serializable
+report.
+
+    python validate_db.py [--db data/flights.db] [--report validation.json]
+
+Exits with status 1 when any violation is found.
+"""
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+import argparse, json, sqlite3, sys
+
+THIS_DIR = Path(__file__).resolve().parent
+DB_PATH = THIS_DIR / "data" / "flights.db"
+SAMPLE_SIZE = 5
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+def _primary_key(conn, table):
+    cols = [(row[5], row[1]) for row in conn.execute(f"PRAGMA table_info({_quote(table)})") if row[5]]
+    return [name for _, name in sorted(cols)]
+
+def foreign_keys(conn):
+    """Yield ``(child, child_columns, parent, parent_columns)`` for every declared FK."""
+    tables = [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name")]
+    for table in tables:
+        groups = {}
+        for fk_id, seq, parent, child_col, parent_col, *_ in conn.execute(f"PRAGMA foreign_key_list({_quote(table)})"):
+            groups.setdefault(fk_id, []).append((seq, parent, child_col, parent_col))
+        for fk_id in sorted(groups):
+            cols = sorted(groups[fk_id])
+            parent = cols[0][1]
+            parent_cols = [c[3] for c in cols]
+            if parent_cols[0] is None:  # REFERENCES parent without a column list → its primary key
+                parent_cols = _primary_key(conn, parent)
+            yield table, [c[2] for c in cols], parent, parent_cols
+
+def check_relation(conn, child, child_cols, parent, parent_cols, sample=SAMPLE_SIZE):
+    """Count (and sample, keyed by the child's primary key) rows of `child` with no parent."""
+    shown = list(dict.fromkeys(_primary_key(conn, child) + child_cols))
+    select = ", ".join(f"c.{_quote(c)}" for c in shown)
+    not_null = " AND ".join(f"c.{_quote(c)} IS NOT NULL" for c in child_cols)
+    match = " AND ".join(f"p.{_quote(pc)} = c.{_quote(cc)}" for cc, pc in zip(child_cols, parent_cols))
+    orphans = (f"SELECT {select} FROM {_quote(child)} c WHERE {not_null} "
+               f"AND NOT EXISTS (SELECT 1 FROM {_quote(parent)} p WHERE {match})")
+
+    count = conn.execute(f"SELECT COUNT(*) FROM ({orphans})").fetchone()[0]
+    rows = conn.execute(f"{orphans} LIMIT ?", (sample,)).fetchall() if count else []
+    return {
+        "relation": f"{child}({', '.join(child_cols)}) → {parent}({', '.join(parent_cols)})",
+        "child": child,
+        "parent": parent,
+        "violations": count,
+        "sample": [dict(zip(shown, row)) for row in rows],
+    }
+
+def validate(conn, sample=SAMPLE_SIZE):
+    """Check every FK relation in `conn` and return the report dict."""
+    t0 = perf_counter()
+    checks = [check_relation(conn, *fk, sample=sample) for fk in foreign_keys(conn)]
+    violations = sum(c["violations"] for c in checks)
+    return {
+        "checked_at": datetime.now().isoformat(timespec="seconds"),
+        "ok": violations == 0,
+        "violations": violations,
+        "elapsed_s": round(perf_counter() - t0, 3),
+        "checks": checks,
+    }
+
+def summary(report):
+    bad = [c for c in report["checks"] if c["violations"]]
+    if not bad:
+        return f"✔ {len(report['checks'])} FK relations valid ({report['elapsed_s']:.2f}s)"
+    return "✖ FK violations: " + "; ".join(f"{c['relation']}: {c['violations']:,}" for c in bad)
+
+def write_report(report, path):
+    Path(path).write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Validate referential integrity of the flights database.")
+    ap.add_argument("--db", type=Path, default=DB_PATH, help="database file (default: data/flights.db)")
+    ap.add_argument("--report", type=Path, help="write the JSON report here")
+    ap.add_argument("--sample", type=int, default=SAMPLE_SIZE, help="violating rows to keep per relation")
+    args = ap.parse_args()
+
+    if not args.db.exists():
+        ap.error(f"{args.db} does not exist")
+    conn = sqlite3.connect(args.db)
+    report = validate(conn, args.sample)
+    report["database"] = str(args.db)
+    conn.close()
+
+    print(summary(report))
+    if args.report:
+        write_report(report, args.report)
+        print(f"• Report written to {args.report}")
+    sys.exit(0 if report["ok"] else 1)